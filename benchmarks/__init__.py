@@ -0,0 +1,7 @@
+"""
+基准测试
+
+- run_benchmark: 分阶段耗时和端到端吞吐测量，结果保存为JSON便于回归对比
+- synthetic: 合成日期标签生成
+- fake_backend: 模拟PaddleOCR模块，耗时可配置
+"""
@@ -0,0 +1,77 @@
+"""
+模拟的PaddleOCR模块（基准测试用）
+
+目录 benchmarks/fake_backend 加入 sys.path 最前面后，`from paddleocr import PaddleOCR`
+得到本模块，在未安装PaddleOCR的环境中也能测量解码、分析、ROI、预处理、解析和缓存等阶段。
+
+识别耗时 = BENCHMARK_OCR_LATENCY + BENCHMARK_OCR_LATENCY_PER_MP × 输入图像百万像素数（秒），
+通过环境变量配置，OCR工作进程同样生效。返回的文本依次轮换 SAMPLE_TEXTS，
+设置 BENCHMARK_OCR_TEXT 时固定返回该文本。
+"""
+
+import os
+import time
+import itertools
+import threading
+
+import cv2
+
+SAMPLE_TEXTS = [
+    '生产日期2024.06.15',
+    '生产日期：2023-11-02',
+    '保质期至2026/01/31',
+    '2025年03月08日',
+    'MFG 20240105',
+    '批号A2301 净含量500g',
+]
+
+_counter = itertools.count()
+_counter_lock = threading.Lock()
+
+
+def configure(latency: float = 0.05, latency_per_mp: float = 0.0, text: str = None):
+    """设置模拟识别耗时和返回文本（写入环境变量，之后启动的子进程也使用该设置）
+
+    Args:
+        latency: 每次调用的固定耗时(秒)
+        latency_per_mp: 每百万像素增加的耗时(秒)
+        text: 固定返回的文本，为None时轮换示例文本
+    """
+    os.environ['BENCHMARK_OCR_LATENCY'] = str(latency)
+    os.environ['BENCHMARK_OCR_LATENCY_PER_MP'] = str(latency_per_mp)
+    if text is None:
+        os.environ.pop('BENCHMARK_OCR_TEXT', None)
+    else:
+        os.environ['BENCHMARK_OCR_TEXT'] = text
+
+
+class PaddleOCR:
+    """与 PaddleOCR 2.x 的 ocr() 接口和返回格式一致的模拟实现"""
+
+    is_fake = True
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.calls = 0
+
+    def ocr(self, img, **kwargs):
+        self.calls += 1
+        if isinstance(img, str):
+            img = cv2.imread(img)
+        if img is None:
+            return [None]
+
+        height, width = img.shape[:2]
+        latency = float(os.environ.get('BENCHMARK_OCR_LATENCY', 0.05))
+        latency += float(os.environ.get('BENCHMARK_OCR_LATENCY_PER_MP', 0.0)) * width * height / 1e6
+        if latency > 0:
+            time.sleep(latency)
+
+        text = os.environ.get('BENCHMARK_OCR_TEXT')
+        if text is None:
+            with _counter_lock:
+                text = SAMPLE_TEXTS[next(_counter) % len(SAMPLE_TEXTS)]
+
+        line_height = max(10, min(height, 40))
+        box = [[0, 0], [width - 1, 0], [width - 1, line_height], [0, line_height]]
+        return [[[box, (text, 0.93)]]]
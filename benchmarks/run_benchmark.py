@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+识别流水线基准测试
+
+数据集为 test_image/ 中的实拍图片加上按固定种子生成的合成标签（见 synthetic.py）。
+测量内容:
+- 各阶段耗时: 解码、图像分析、ROI检测、各策略预处理、OCR、日期解析、缓存读写
+- 端到端吞吐: 不同工作线程/进程数下批量处理的图片数/秒（冷缓存和热缓存各一次）
+
+结果保存为JSON，--compare 指定基线文件时逐项对比并标出退化。
+默认使用模拟OCR后端（benchmarks/fake_backend），识别耗时可配置，无需安装PaddleOCR。
+
+示例:
+    python benchmarks/run_benchmark.py
+    python benchmarks/run_benchmark.py --workers 1,2,4 --ocr-latency 0.2 -o baseline.json
+    python benchmarks/run_benchmark.py --compare baseline.json --fail-on-regression
+    python benchmarks/run_benchmark.py --backend paddle --synthetic 0
+"""
+
+import os
+import sys
+import copy
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+BENCHMARK_DIR = Path(__file__).parent.resolve()
+PROJECT_ROOT = BENCHMARK_DIR.parent
+FAKE_BACKEND_DIR = BENCHMARK_DIR / 'fake_backend'
+
+sys.path.insert(0, str(PROJECT_ROOT))
+
+logger = logging.getLogger(__name__)
+
+PREPROCESS_STRATEGIES = ['standard', 'enhanced', 'aggressive', 'super_aggressive']
+
+# 对比时视为退化的相对变化阈值
+DEFAULT_REGRESSION_THRESHOLD = 0.15
+
+
+# ---- 环境准备 ----
+
+def setup_backend(args: argparse.Namespace):
+    """选择OCR后端，必须在导入 core 模块之前调用"""
+    if args.backend == 'fake':
+        sys.path.insert(0, str(FAKE_BACKEND_DIR))
+        import paddleocr
+        paddleocr.configure(args.ocr_latency, args.ocr_latency_per_mp)
+
+
+def load_dataset(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """加载实拍图片并生成合成标签
+
+    实拍图片以日期命名（如 2025.06.21.jpg），文件名即期望日期
+    """
+    from benchmarks.synthetic import generate_dataset
+    from utils.file_scanner import FileScanner
+
+    items = []
+    if args.images and os.path.isdir(args.images):
+        for path in FileScanner(max_workers=1).scan(args.images):
+            stem = Path(path).stem
+            parts = stem.split('.')
+            expected = '-'.join(parts) if len(parts) == 3 and all(p.isdigit() for p in parts) else None
+            items.append({'path': path, 'source': 'test_image', 'expected_date': expected})
+
+    if args.synthetic > 0:
+        for item in generate_dataset(args.synthetic_dir, args.synthetic, args.seed, args.max_side):
+            items.append({'path': item['path'], 'source': 'synthetic', 'expected_date': item['expected_date']})
+
+    if args.limit:
+        items = items[:args.limit]
+    return items
+
+
+def build_config(cache_dir: str) -> Dict[str, Any]:
+    """基准测试使用的配置：全局配置 + 独立的缓存目录"""
+    from utils.config_loader import get_config
+
+    config = copy.deepcopy(get_config().config)
+    config.setdefault('cache', {})['cache_dir'] = cache_dir
+    config['cache']['backend'] = 'sqlite'
+    config.setdefault('ocr', {})['timeout_mode'] = 'thread'
+    config.setdefault('performance', {})['cache_enabled'] = False
+    return config
+
+
+@contextlib.contextmanager
+def quiet(enabled: bool):
+    """屏蔽引擎的控制台输出"""
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, 'w', encoding='utf-8') as devnull:
+        with contextlib.redirect_stdout(devnull):
+            yield
+
+
+def summarize(samples: List[float]) -> Dict[str, Any]:
+    """耗时样本（秒）的统计值（毫秒）"""
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+    last = len(ordered) - 1
+    return {
+        'count': len(ordered),
+        'total_ms': round(sum(ordered) * 1000, 3),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3),
+        'p50_ms': round(ordered[int(last * 0.50)] * 1000, 3),
+        'p95_ms': round(ordered[int(last * 0.95)] * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3)
+    }
+
+
+# ---- 分阶段测量 ----
+
+def bench_stages(items: List[Dict[str, Any]], config: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    """逐个阶段测量每张图片的耗时
+
+    Args:
+        items: 数据集
+        config: 配置字典
+        repeat: 每张图片重复次数
+
+    Returns:
+        {阶段名: 统计值}
+    """
+    from core.image_context import ImageContext
+    from core.models import TextResult
+    from core.date_parser import create_date_parser
+    from core.cache_manager import CacheManager
+    from core.ocr_worker_pool import format_ocr_results
+    from core.optimized_paddleocr_engine import OptimizedPaddleOCREngine
+    import cv2
+
+    engine = OptimizedPaddleOCREngine(config)
+    parser = create_date_parser(config)
+    cache = CacheManager(cache_dir=os.path.join(config['cache']['cache_dir'], 'stages'),
+                         max_cache_size=max(1000, len(items) * 2), memory_cache_size=0,
+                         compaction_interval=0, fingerprint='benchmark')
+
+    samples: Dict[str, List[float]] = {}
+
+    def timed(stage: str, func, *func_args, **func_kwargs):
+        start = time.perf_counter()
+        value = func(*func_args, **func_kwargs)
+        samples.setdefault(stage, []).append(time.perf_counter() - start)
+        return value
+
+    for _ in range(repeat):
+        for item in items:
+            context = ImageContext(image_path=item['path'])
+            image = timed('decode', lambda: context.bgr)
+            if image is None:
+                logger.warning(f"无法解码: {item['path']}")
+                continue
+            timed('gray', lambda: context.gray)
+            timed('analysis', engine.image_analyzer.analyze_context, context)
+            timed('roi', engine.roi_detector.crop_text_regions_array, image, padding=30, gray=context.gray)
+
+            preprocessed = {}
+            for strategy in PREPROCESS_STRATEGIES:
+                preprocessed[strategy] = timed(f'preprocess.{strategy}', engine._preprocess_array, image, strategy)
+
+            ocr_input = preprocessed['standard']
+            if ocr_input.ndim == 2:
+                ocr_input = cv2.cvtColor(ocr_input, cv2.COLOR_GRAY2BGR)
+            raw = timed('ocr', engine.reader.ocr, ocr_input)
+            formatted = format_ocr_results(raw)
+
+            text_results = [TextResult(text=text, confidence=confidence, bbox=bbox)
+                            for bbox, (text, confidence) in formatted]
+            timed('parse', parser.parse_dates_from_text, text_results)
+
+            timed('cache.save', cache.save_result, item['path'], [formatted], 0.0, 'benchmark')
+            timed('cache.get', cache.get_cached_result, item['path'])
+
+    paths = [item['path'] for item in items]
+    for _ in range(repeat):
+        timed('cache.lookup_many', cache.lookup_many, paths)
+
+    cache.close()
+    return {stage: summarize(values) for stage, values in samples.items()}
+
+
+# ---- 端到端吞吐 ----
+
+def bench_throughput(items: List[Dict[str, Any]], config: Dict[str, Any], worker_counts: List[int],
+                     execution_mode: str, cache_root: str, score_accuracy: bool) -> List[Dict[str, Any]]:
+    """不同并发数下的批量处理吞吐
+
+    每个并发数使用独立的空缓存目录先处理一次（冷缓存），再处理一次（热缓存）
+    score_accuracy 为True时按期望日期统计准确率（模拟后端的文本与图片无关，不统计）
+
+    Returns:
+        每个并发数的测量结果列表
+    """
+    from v1.handlers.batch_processor import BatchProcessor
+
+    paths = [item['path'] for item in items]
+    expected = {item['path']: item['expected_date'] for item in items}
+    runs = []
+
+    for workers in worker_counts:
+        run_config = copy.deepcopy(config)
+        run_config['cache']['cache_dir'] = os.path.join(cache_root, f'{execution_mode}_{workers}')
+        performance = run_config['performance']
+        performance['execution_mode'] = execution_mode
+        performance['max_workers'] = workers
+        performance['ocr_processes'] = workers
+
+        processor = BatchProcessor(run_config)
+        try:
+            for phase in ['cold', 'warm']:
+                start = time.perf_counter()
+                batch_result = processor.process_files(paths)
+                elapsed = time.perf_counter() - start
+
+                correct = sum(1 for result in batch_result.results
+                              if expected.get(result.image_path) in result.dates_found)
+                labelled = sum(1 for result in batch_result.results if expected.get(result.image_path))
+                runs.append({
+                    'execution_mode': execution_mode,
+                    'workers': workers,
+                    'phase': phase,
+                    'images': len(paths),
+                    'processed': batch_result.total_processed,
+                    'successful': batch_result.successful_recognitions,
+                    'seconds': round(elapsed, 3),
+                    'images_per_second': round(len(paths) / elapsed, 3) if elapsed > 0 else None,
+                    'accuracy': round(correct / labelled, 4) if labelled and score_accuracy else None
+                })
+        finally:
+            processor.shutdown()
+
+    return runs
+
+
+# ---- 结果 ----
+
+def collect_metadata(args: argparse.Namespace, items: List[Dict[str, Any]],
+                     config: Dict[str, Any]) -> Dict[str, Any]:
+    """运行环境和参数，用于判断两次结果是否可比"""
+    import cv2
+    import numpy
+    from core.date_parser import PARSER_VERSION
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+
+    ocr_config = config.get('ocr', {})
+    return {
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'git_commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': numpy.__version__,
+        'opencv': cv2.__version__,
+        'backend': args.backend,
+        'ocr_latency': args.ocr_latency if args.backend == 'fake' else None,
+        'ocr_latency_per_mp': args.ocr_latency_per_mp if args.backend == 'fake' else None,
+        'parser_version': PARSER_VERSION,
+        'pipeline': {key: ocr_config.get(key) for key in
+                     ['in_memory_pipeline', 'strategy_mode', 'batch_ocr', 'acceptance']},
+        'dataset': {
+            'test_image': sum(1 for item in items if item['source'] == 'test_image'),
+            'synthetic': sum(1 for item in items if item['source'] == 'synthetic'),
+            'seed': args.seed,
+            'max_side': args.max_side
+        },
+        'repeat': args.repeat
+    }
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any],
+                    threshold: float) -> List[str]:
+    """与基线对比，打印对比表
+
+    Returns:
+        退化项描述列表
+    """
+    regressions = []
+    print(f"\n与基线对比 (基线: {baseline['metadata'].get('git_commit')} "
+          f"{baseline['metadata'].get('timestamp')}, 阈值 {threshold:.0%})")
+
+    for key in ['backend', 'ocr_latency', 'ocr_latency_per_mp', 'dataset']:
+        if current['metadata'].get(key) != baseline['metadata'].get(key):
+            print(f"  注意: {key} 不同 ({baseline['metadata'].get(key)} -> {current['metadata'].get(key)})，"
+                  f"结果可能不可比")
+
+    print(f"  {'阶段':<28}{'基线(ms)':>12}{'当前(ms)':>12}{'变化':>10}")
+    for stage, stats in current.get('stages', {}).items():
+        base_stats = baseline.get('stages', {}).get(stage)
+        if not base_stats or not base_stats.get('mean_ms') or 'mean_ms' not in stats:
+            continue
+        change = stats['mean_ms'] / base_stats['mean_ms'] - 1
+        flag = ' !' if change > threshold else ''
+        print(f"  {stage:<28}{base_stats['mean_ms']:>12.2f}{stats['mean_ms']:>12.2f}{change:>+10.1%}{flag}")
+        if change > threshold:
+            regressions.append(f"{stage} 平均耗时 +{change:.1%}")
+
+    base_runs = {(run['execution_mode'], run['workers'], run['phase']): run
+                 for run in baseline.get('throughput', [])}
+    print(f"  {'吞吐':<28}{'基线(张/秒)':>12}{'当前(张/秒)':>12}{'变化':>10}")
+    for run in current.get('throughput', []):
+        key = (run['execution_mode'], run['workers'], run['phase'])
+        base_run = base_runs.get(key)
+        if not base_run or not base_run.get('images_per_second') or not run.get('images_per_second'):
+            continue
+        change = run['images_per_second'] / base_run['images_per_second'] - 1
+        flag = ' !' if change < -threshold else ''
+        label = f"{key[0]} x{key[1]} {key[2]}"
+        print(f"  {label:<28}{base_run['images_per_second']:>12.2f}{run['images_per_second']:>12.2f}"
+              f"{change:>+10.1%}{flag}")
+        if change < -threshold:
+            regressions.append(f"{label} 吞吐 {change:.1%}")
+
+    return regressions
+
+
+def print_summary(result: Dict[str, Any]):
+    """打印本次测量结果"""
+    if result.get('stages'):
+        print(f"\n  {'阶段':<28}{'次数':>8}{'平均(ms)':>12}{'P50(ms)':>12}{'P95(ms)':>12}")
+        for stage, stats in result['stages'].items():
+            if stats.get('count'):
+                print(f"  {stage:<28}{stats['count']:>8}{stats['mean_ms']:>12.2f}"
+                      f"{stats['p50_ms']:>12.2f}{stats['p95_ms']:>12.2f}")
+    if result.get('throughput'):
+        print(f"\n  {'模式':<10}{'并发':>6}{'缓存':>8}{'耗时(秒)':>12}{'张/秒':>10}{'准确率':>10}")
+        for run in result['throughput']:
+            accuracy = f"{run['accuracy']:.1%}" if run['accuracy'] is not None else '-'
+            print(f"  {run['execution_mode']:<10}{run['workers']:>6}{run['phase']:>8}"
+                  f"{run['seconds']:>12.2f}{run['images_per_second']:>10.2f}{accuracy:>10}")
+
+
+# ---- 入口 ----
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="识别流水线基准测试")
+    parser.add_argument('--backend', choices=['fake', 'paddle'], default='fake',
+                        help='OCR后端: fake=模拟后端(默认), paddle=真实PaddleOCR')
+    parser.add_argument('--ocr-latency', type=float, default=0.05, help='模拟OCR每次调用的固定耗时(秒)')
+    parser.add_argument('--ocr-latency-per-mp', type=float, default=0.02,
+                        help='模拟OCR每百万像素增加的耗时(秒)')
+    parser.add_argument('--images', default=str(PROJECT_ROOT / 'test_image'), help='实拍图片目录')
+    parser.add_argument('--synthetic', type=int, default=21, help='合成标签数量 (0=不使用)')
+    parser.add_argument('--synthetic-dir', default=str(BENCHMARK_DIR / 'data' / 'synthetic'),
+                        help='合成标签保存目录')
+    parser.add_argument('--seed', type=int, default=42, help='合成标签随机种子')
+    parser.add_argument('--max-side', type=int, default=4000, help='合成标签最大长边(像素)')
+    parser.add_argument('--limit', type=int, help='只使用前N张图片')
+    parser.add_argument('--repeat', type=int, default=3, help='分阶段测量的重复次数')
+    parser.add_argument('--workers', default='1,2,4', help='吞吐测量的并发数，逗号分隔')
+    parser.add_argument('--execution-mode', choices=['thread', 'process'], default='thread',
+                        help='吞吐测量的执行模式')
+    parser.add_argument('--skip-stages', action='store_true', help='跳过分阶段测量')
+    parser.add_argument('--skip-throughput', action='store_true', help='跳过吞吐测量')
+    parser.add_argument('-o', '--output', help='结果JSON路径（默认 benchmarks/results/<时间>.json）')
+    parser.add_argument('--compare', help='基线结果JSON，与之对比')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help='退化阈值（相对变化，默认0.15）')
+    parser.add_argument('--fail-on-regression', action='store_true', help='有退化时以非零状态退出')
+    parser.add_argument('--verbose', action='store_true', help='显示引擎输出')
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    for name in ['images', 'synthetic_dir', 'output', 'compare']:
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+    worker_counts = [int(value) for value in args.workers.split(',') if value.strip()]
+
+    # 配置文件使用相对路径
+    os.chdir(PROJECT_ROOT)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s - %(levelname)s - %(message)s")
+    setup_backend(args)
+
+    items = load_dataset(args)
+    if not items:
+        print("错误: 数据集为空", file=sys.stderr)
+        return 2
+    print(f"数据集: {len(items)} 张图片, OCR后端: {args.backend}")
+
+    cache_root = tempfile.mkdtemp(prefix='ocr_benchmark_')
+    config = build_config(cache_root)
+    result = {'metadata': collect_metadata(args, items, config)}
+
+    try:
+        with quiet(not args.verbose):
+            if not args.skip_stages:
+                result['stages'] = bench_stages(items, config, max(1, args.repeat))
+            if not args.skip_throughput:
+                result['throughput'] = bench_throughput(items, config, worker_counts,
+                                                        args.execution_mode, cache_root,
+                                                        score_accuracy=args.backend != 'fake')
+    finally:
+        shutil.rmtree(cache_root, ignore_errors=True)
+
+    print_summary(result)
+
+    output = args.output or str(BENCHMARK_DIR / 'results' / f"{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存: {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(result, baseline, args.threshold)
+        if regressions:
+            print("\n退化项:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            if args.fail_on_regression:
+                return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
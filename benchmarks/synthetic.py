@@ -0,0 +1,189 @@
+"""
+合成日期标签生成
+
+按固定随机种子渲染包含日期文字的包装标签图片，叠加噪声、模糊和旋转，
+长边尺寸最大4000像素。相同参数生成的图片和标注完全一致，便于不同版本之间对比。
+"""
+
+import os
+import json
+import random
+import logging
+from datetime import date, timedelta
+from typing import List, Dict, Any, Optional
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+
+# 标签模板: (模板, 日期格式)，{date} 处填入按日期格式渲染的日期
+LABEL_TEMPLATES = [
+    ('生产日期{date}', '%Y.%m.%d'),
+    ('生产日期：{date}', '%Y-%m-%d'),
+    ('保质期至{date}', '%Y/%m/%d'),
+    ('{date}', '%Y年%m月%d日'),
+    ('MFG {date}', '%Y%m%d'),
+    ('PRD:{date}', '%Y.%m.%d'),
+    ('EXP {date}', '%d/%m/%Y'),
+]
+
+# 长边尺寸（像素）
+IMAGE_SIZES = [480, 800, 1280, 1920, 2600, 3200, 4000]
+
+# 常见系统中的中文字体，均不可用时只渲染ASCII标签
+CJK_FONT_CANDIDATES = [
+    'C:/Windows/Fonts/simhei.ttf',
+    'C:/Windows/Fonts/msyh.ttc',
+    '/System/Library/Fonts/PingFang.ttc',
+    '/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc',
+    '/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc',
+    '/usr/share/fonts/truetype/wqy/wqy-microhei.ttc',
+    '/usr/share/fonts/wenquanyi/wqy-microhei/wqy-microhei.ttc',
+]
+LATIN_FONT_CANDIDATES = [
+    'C:/Windows/Fonts/arial.ttf',
+    '/System/Library/Fonts/Helvetica.ttc',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+]
+
+
+def _find_font(candidates: List[str]) -> Optional[str]:
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def _load_font(font_path: Optional[str], size: int):
+    if font_path:
+        return ImageFont.truetype(font_path, size)
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:
+        # Pillow < 10.1 的默认字体不支持指定大小
+        return ImageFont.load_default()
+
+
+def _render_label(rng: random.Random, text: str, long_side: int, font_path: Optional[str]) -> np.ndarray:
+    """渲染一张标签图片（BGR数组）"""
+    aspect = rng.uniform(1.3, 2.2)
+    width, height = long_side, max(120, int(long_side / aspect))
+    if rng.random() < 0.3:
+        width, height = height, width
+
+    # 浅色渐变背景 + 若干装饰色块，模拟包装印刷
+    base = np.array([rng.randint(170, 250) for _ in range(3)], dtype=np.float32)
+    gradient = np.linspace(0.85, 1.0, width, dtype=np.float32)[None, :, None]
+    background = np.clip(base[None, None, :] * gradient * np.ones((height, 1, 1), np.float32), 0, 255)
+    image = Image.fromarray(background.astype(np.uint8))
+    draw = ImageDraw.Draw(image)
+    for _ in range(rng.randint(2, 6)):
+        x0, y0 = rng.randint(0, width - 1), rng.randint(0, height - 1)
+        x1, y1 = x0 + rng.randint(20, max(21, width // 3)), y0 + rng.randint(20, max(21, height // 3))
+        color = tuple(rng.randint(120, 255) for _ in range(3))
+        draw.rectangle([x0, y0, x1, y1], fill=color)
+
+    # 日期文字：字号约为短边的1/12到1/6
+    font_size = max(14, int(min(width, height) / rng.uniform(6, 12)))
+    font = _load_font(font_path, font_size)
+    left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+    text_width, text_height = right - left, bottom - top
+    # 留出边距，旋转后文字不被裁掉
+    margin = int(min(width, height) * 0.08)
+    x = rng.randint(margin, max(margin, width - text_width - margin))
+    y = rng.randint(margin, max(margin, height - text_height - margin))
+    ink = tuple(rng.randint(0, 70) for _ in range(3))
+    draw.text((x - left, y - top), text, font=font, fill=ink)
+
+    return cv2.cvtColor(np.asarray(image), cv2.COLOR_RGB2BGR)
+
+
+def _degrade(rng: random.Random, image: np.ndarray, params: Dict[str, Any]) -> np.ndarray:
+    """叠加旋转、模糊和噪声"""
+    height, width = image.shape[:2]
+    if params['rotation']:
+        matrix = cv2.getRotationMatrix2D((width / 2, height / 2), params['rotation'], 1.0)
+        image = cv2.warpAffine(image, matrix, (width, height), borderMode=cv2.BORDER_REPLICATE)
+    if params['blur']:
+        kernel = params['blur'] * 2 + 1
+        image = cv2.GaussianBlur(image, (kernel, kernel), 0)
+    if params['noise']:
+        noise = np.random.default_rng(rng.randint(0, 2 ** 31)).normal(0, params['noise'], image.shape)
+        image = np.clip(image.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+    return image
+
+
+def generate_dataset(output_dir: str, count: int = 24, seed: int = 42,
+                     max_side: int = 4000) -> List[Dict[str, Any]]:
+    """生成合成标签数据集
+
+    已存在参数相同的数据集时直接复用
+
+    Args:
+        output_dir: 输出目录
+        count: 图片数量
+        seed: 随机种子
+        max_side: 最大长边尺寸（像素）
+
+    Returns:
+        标注列表，每项包含 path, text, expected_date 和退化参数
+    """
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    cjk_font = _find_font(CJK_FONT_CANDIDATES)
+    font_path = cjk_font or _find_font(LATIN_FONT_CANDIDATES)
+    options = {'count': count, 'seed': seed, 'max_side': max_side, 'font': font_path}
+
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('options') == options and all(
+                os.path.exists(os.path.join(output_dir, item['file'])) for item in manifest['items']):
+            return [dict(item, path=os.path.join(output_dir, item['file'])) for item in manifest['items']]
+
+    if cjk_font is None:
+        logger.warning("未找到中文字体，合成标签只包含ASCII文字")
+
+    os.makedirs(output_dir, exist_ok=True)
+    rng = random.Random(seed)
+    sizes = [size for size in IMAGE_SIZES if size <= max_side] or [max_side]
+    templates = LABEL_TEMPLATES if cjk_font else [
+        (template, fmt) for template, fmt in LABEL_TEMPLATES
+        if template.isascii() and fmt.isascii()
+    ]
+
+    items = []
+    for index in range(count):
+        day = date(2015, 1, 1) + timedelta(days=rng.randint(0, 365 * 12))
+        template, date_format = templates[index % len(templates)]
+        text = template.format(date=day.strftime(date_format))
+        params = {
+            'long_side': sizes[index % len(sizes)],
+            'rotation': round(rng.uniform(-8, 8), 1) if rng.random() < 0.6 else 0.0,
+            'blur': rng.choice([0, 0, 1, 2]),
+            'noise': rng.choice([0, 4, 8, 16])
+        }
+
+        image = _render_label(rng, text, params['long_side'], font_path)
+        image = _degrade(rng, image, params)
+
+        file_name = f"synthetic_{index:03d}.jpg"
+        cv2.imwrite(os.path.join(output_dir, file_name), image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        items.append({
+            'file': file_name,
+            'text': text,
+            'expected_date': day.isoformat(),
+            'width': image.shape[1],
+            'height': image.shape[0],
+            **params
+        })
+
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump({'options': options, 'items': items}, f, ensure_ascii=False, indent=2)
+    logger.info(f"已生成 {count} 张合成标签: {output_dir}")
+
+    return [dict(item, path=os.path.join(output_dir, item['file'])) for item in items]
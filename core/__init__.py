@@ -14,6 +14,7 @@ __all__ = [
     'BatchResult',
     'TextResult',
     'DateInfo',
+    'RecognitionSummary',
     'create_recognition_result',
     'create_batch_result',
     # 核心组件
@@ -21,19 +22,25 @@ __all__ = [
     'OCREngine',
     'DateParser',
     'DateRecognizer',
+    'ImageContext',
+    'OCRWorkerPool',
+    'CacheServer',
     # 工厂函数
     'create_image_processor',
     'create_ocr_engine',
     'create_date_parser',
-    'create_date_recognizer'
+    'create_date_recognizer',
+    'create_image_context',
+    'create_ocr_worker_pool',
+    'create_cache_server'
 ]
 
 def __getattr__(name):
     """延迟导入核心组件"""
     if name in ['RecognitionResult', 'BatchResult', 'TextResult', 'DateInfo',
-                'create_recognition_result', 'create_batch_result']:
+                'RecognitionSummary', 'create_recognition_result', 'create_batch_result']:
         from .models import (
-            RecognitionResult, BatchResult, TextResult, DateInfo,
+            RecognitionResult, BatchResult, TextResult, DateInfo, RecognitionSummary,
             create_recognition_result, create_batch_result
         )
         return locals()[name]
@@ -49,4 +56,13 @@ def __getattr__(name):
     elif name in ['DateRecognizer', 'create_date_recognizer']:
         from .date_recognizer import DateRecognizer, create_date_recognizer
         return locals()[name]
+    elif name in ['ImageContext', 'create_image_context']:
+        from .image_context import ImageContext, create_image_context
+        return locals()[name]
+    elif name in ['OCRWorkerPool', 'create_ocr_worker_pool']:
+        from .ocr_worker_pool import OCRWorkerPool, create_ocr_worker_pool
+        return locals()[name]
+    elif name in ['CacheServer', 'create_cache_server']:
+        from .cache_server import CacheServer, create_cache_server
+        return locals()[name]
     raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
@@ -0,0 +1,483 @@
+"""
+OCR结果缓存后端
+
+缓存管理器的持久层接口及实现:
+- SQLiteCacheBackend: 本地SQLite数据库（默认）
+- RemoteCacheBackend: 通过HTTP访问共享缓存服务（见 cache_server.py），
+  多台主机处理同一共享目录时共用一份OCR结果；过期、超量和压缩清理由服务端统一执行
+
+条目以 (文件内容哈希, 引擎/配置指纹) 为键，查询按批进行，一次往返可查询数千个哈希
+"""
+
+import json
+import time
+import logging
+import sqlite3
+import threading
+import http.client
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# 单条SQL语句中IN列表的最大参数个数（低于SQLite默认的变量上限）
+SQL_BATCH_SIZE = 500
+
+
+class CacheBackendError(Exception):
+    """缓存后端异常"""
+    pass
+
+
+class CacheBackend(ABC):
+    """缓存持久层接口
+
+    条目字典字段: file_hash, fingerprint, file_size, file_mtime, ocr_results,
+    processing_time, strategy_used, created_at, recognition, parser_version
+    """
+
+    name = 'base'
+
+    @abstractmethod
+    def get_many(self, file_hashes: List[str], fingerprint: str) -> Dict[str, Dict[str, Any]]:
+        """批量查询条目
+
+        Args:
+            file_hashes: 文件内容哈希列表
+            fingerprint: 引擎/配置指纹
+
+        Returns:
+            file_hash -> 条目，未命中的哈希不在结果中
+        """
+
+    @abstractmethod
+    def put_many(self, entries: List[Dict[str, Any]]):
+        """批量写入条目（相同键的条目被替换，识别结论随之清空）"""
+
+    @abstractmethod
+    def update_recognition(self, file_hash: str, fingerprint: str, file_size: int,
+                           file_mtime: float, recognition: Dict[str, Any],
+                           parser_version: str) -> bool:
+        """更新条目的识别结论
+
+        Returns:
+            是否存在对应条目
+        """
+
+    @abstractmethod
+    def touch_many(self, updates: List[Tuple[str, str, float, int]]):
+        """批量更新访问记录
+
+        Args:
+            updates: (file_hash, fingerprint, 最后访问时间, 新增访问次数) 列表
+        """
+
+    @abstractmethod
+    def delete(self, file_hash: str, fingerprint: str):
+        """删除条目"""
+
+    @abstractmethod
+    def cleanup(self, expire_before: float, max_entries: int) -> int:
+        """删除创建时间早于 expire_before 的条目，并按最近访问淘汰超出 max_entries 的条目
+
+        max_entries 为0时不限条数，只做过期清理
+
+        Returns:
+            删除的条目数
+        """
+
+    @abstractmethod
+    def compact(self, fingerprint: Optional[str], accessed_before: float) -> int:
+        """删除其他指纹中最后访问早于 accessed_before 的条目，fingerprint为None时不区分指纹
+
+        Returns:
+            删除的条目数
+        """
+
+    @abstractmethod
+    def stats(self, fingerprint: str) -> Dict[str, int]:
+        """获取条目数(count)、结果数据大小(size_bytes)和其他指纹条目数(stale_count)"""
+
+    @abstractmethod
+    def clear(self):
+        """清空所有条目"""
+
+    def close(self):
+        """释放资源"""
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """本地SQLite缓存后端
+
+    可以与缓存管理器共用连接和锁（同一数据库中还保存文件状态索引），
+    也可以独立打开数据库（共享缓存服务使用）
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, db_path: str, conn: Optional[sqlite3.Connection] = None,
+                 lock: Optional[threading.RLock] = None):
+        """
+        Args:
+            db_path: 数据库文件路径
+            conn: 已打开的连接，None时自行打开（WAL模式）
+            lock: 保护连接的锁，None时自行创建
+        """
+        self.db_path = Path(db_path)
+        self._owns_conn = conn is None
+        if conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn = conn
+        self._lock = lock or threading.RLock()
+
+        with self._lock:
+            self._init_schema()
+
+    def _init_schema(self):
+        """创建缓存表，迁移旧版表结构"""
+        conn = self._conn
+        has_legacy_table = self._rename_legacy_table()
+
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS ocr_cache (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_hash TEXT NOT NULL,
+                fingerprint TEXT NOT NULL DEFAULT '',
+                file_size INTEGER NOT NULL,
+                file_mtime REAL NOT NULL,
+                ocr_results TEXT NOT NULL,
+                processing_time REAL NOT NULL,
+                strategy_used TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                access_count INTEGER DEFAULT 1,
+                recognition TEXT,
+                parser_version TEXT,
+                UNIQUE(file_hash, fingerprint)
+            )
+        ''')
+        self._add_missing_columns()
+
+        # 创建索引
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_fingerprint ON ocr_cache(fingerprint)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_accessed_at ON ocr_cache(accessed_at)')
+
+        if has_legacy_table:
+            self._copy_legacy_rows()
+        conn.commit()
+
+    def _rename_legacy_table(self) -> bool:
+        """旧版缓存表（file_hash唯一、没有指纹列）改名待迁移
+
+        Returns:
+            是否存在需要迁移的旧版表
+        """
+        conn = self._conn
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(ocr_cache)')]
+        if not columns or 'fingerprint' in columns:
+            return False
+
+        logger.info("迁移旧版缓存表: 添加指纹列")
+        conn.execute('ALTER TABLE ocr_cache RENAME TO ocr_cache_legacy')
+        conn.execute('DROP INDEX IF EXISTS idx_file_hash')
+        conn.execute('DROP INDEX IF EXISTS idx_accessed_at')
+        return True
+
+    def _add_missing_columns(self):
+        """为上一版缓存表补充识别结论列（已有条目保留，识别结论为空）"""
+        columns = [row[1] for row in self._conn.execute('PRAGMA table_info(ocr_cache)')]
+        for column in ('recognition', 'parser_version'):
+            if column not in columns:
+                logger.info(f"迁移缓存表: 添加 {column} 列")
+                self._conn.execute(f'ALTER TABLE ocr_cache ADD COLUMN {column} TEXT')
+
+    def _copy_legacy_rows(self):
+        """将旧版表中的条目以 'legacy' 指纹复制到新表后删除旧表"""
+        self._conn.execute('''
+            INSERT INTO ocr_cache
+            (file_hash, fingerprint, file_size, file_mtime, ocr_results, processing_time,
+             strategy_used, created_at, accessed_at, access_count)
+            SELECT file_hash, 'legacy', file_size, file_mtime, ocr_results, processing_time,
+                   strategy_used, created_at, accessed_at, access_count
+            FROM ocr_cache_legacy
+        ''')
+        self._conn.execute('DROP TABLE ocr_cache_legacy')
+
+    def get_many(self, file_hashes: List[str], fingerprint: str) -> Dict[str, Dict[str, Any]]:
+        entries = {}
+        with self._lock:
+            for start in range(0, len(file_hashes), SQL_BATCH_SIZE):
+                chunk = file_hashes[start:start + SQL_BATCH_SIZE]
+                placeholders = ','.join('?' * len(chunk))
+                cursor = self._conn.execute(f'''
+                    SELECT file_hash, file_size, file_mtime, ocr_results, processing_time,
+                           strategy_used, created_at, recognition, parser_version
+                    FROM ocr_cache
+                    WHERE fingerprint = ? AND file_hash IN ({placeholders})
+                ''', [fingerprint] + chunk)
+                for row in cursor:
+                    entries[row[0]] = {
+                        'file_hash': row[0],
+                        'fingerprint': fingerprint,
+                        'file_size': row[1],
+                        'file_mtime': row[2],
+                        'ocr_results': json.loads(row[3]),
+                        'processing_time': row[4],
+                        'strategy_used': row[5],
+                        'created_at': row[6],
+                        'recognition': json.loads(row[7]) if row[7] else None,
+                        'parser_version': row[8]
+                    }
+        return entries
+
+    def put_many(self, entries: List[Dict[str, Any]]):
+        rows = [(entry['file_hash'], entry['fingerprint'], entry['file_size'], entry['file_mtime'],
+                 json.dumps(entry['ocr_results'], ensure_ascii=False), entry['processing_time'],
+                 entry['strategy_used'], entry['created_at'], entry['created_at'])
+                for entry in entries]
+        with self._lock:
+            self._conn.executemany('''
+                INSERT OR REPLACE INTO ocr_cache
+                (file_hash, fingerprint, file_size, file_mtime, ocr_results, processing_time,
+                 strategy_used, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            self._conn.commit()
+
+    def update_recognition(self, file_hash: str, fingerprint: str, file_size: int,
+                           file_mtime: float, recognition: Dict[str, Any],
+                           parser_version: str) -> bool:
+        recognition_json = json.dumps(recognition, ensure_ascii=False)
+        with self._lock:
+            cursor = self._conn.execute('''
+                UPDATE ocr_cache SET recognition = ?, parser_version = ?
+                WHERE file_hash = ? AND fingerprint = ? AND file_size = ? AND file_mtime = ?
+            ''', (recognition_json, parser_version, file_hash, fingerprint, file_size, file_mtime))
+            self._conn.commit()
+            return cursor.rowcount > 0
+
+    def touch_many(self, updates: List[Tuple[str, str, float, int]]):
+        rows = [(accessed_at, count, file_hash, fingerprint)
+                for file_hash, fingerprint, accessed_at, count in updates]
+        with self._lock:
+            self._conn.executemany('''
+                UPDATE ocr_cache
+                SET accessed_at = ?, access_count = access_count + ?
+                WHERE file_hash = ? AND fingerprint = ?
+            ''', rows)
+            self._conn.commit()
+
+    def delete(self, file_hash: str, fingerprint: str):
+        with self._lock:
+            self._conn.execute('DELETE FROM ocr_cache WHERE file_hash = ? AND fingerprint = ?',
+                               (file_hash, fingerprint))
+            self._conn.commit()
+
+    def cleanup(self, expire_before: float, max_entries: int) -> int:
+        with self._lock:
+            conn = self._conn
+
+            # 删除过期缓存
+            removed = conn.execute('DELETE FROM ocr_cache WHERE created_at < ?',
+                                   (expire_before,)).rowcount
+
+            # 检查缓存数量
+            cache_count = conn.execute('SELECT COUNT(*) FROM ocr_cache').fetchone()[0]
+
+            if 0 < max_entries < cache_count:
+                # 删除最少使用的缓存
+                removed += conn.execute('''
+                    DELETE FROM ocr_cache
+                    WHERE id IN (
+                        SELECT id FROM ocr_cache
+                        ORDER BY accessed_at ASC
+                        LIMIT ?
+                    )
+                ''', (cache_count - max_entries,)).rowcount
+
+            conn.commit()
+            return removed
+
+    def compact(self, fingerprint: Optional[str], accessed_before: float) -> int:
+        with self._lock:
+            if fingerprint is None:
+                cursor = self._conn.execute('DELETE FROM ocr_cache WHERE accessed_at < ?',
+                                            (accessed_before,))
+            else:
+                cursor = self._conn.execute(
+                    'DELETE FROM ocr_cache WHERE fingerprint != ? AND accessed_at < ?',
+                    (fingerprint, accessed_before)
+                )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def stats(self, fingerprint: str) -> Dict[str, int]:
+        with self._lock:
+            count, size_bytes = self._conn.execute(
+                'SELECT COUNT(*), SUM(LENGTH(ocr_results)) FROM ocr_cache'
+            ).fetchone()
+            stale_count = self._conn.execute(
+                'SELECT COUNT(*) FROM ocr_cache WHERE fingerprint != ?', (fingerprint,)
+            ).fetchone()[0]
+        return {'count': count, 'size_bytes': size_bytes or 0, 'stale_count': stale_count}
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM ocr_cache')
+            self._conn.commit()
+
+    def close(self):
+        if not self._owns_conn:
+            return
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class RemoteCacheBackend(CacheBackend):
+    """共享缓存服务客户端
+
+    每个线程持有一个HTTP长连接；请求失败后的 retry_interval 秒内直接报错，
+    不再等待超时，缓存管理器按未命中处理。
+
+    共享缓存的保留策略（有效期、最大条目数、其他指纹的保留期）由服务端配置并执行，
+    客户端的 cleanup/compact 不做任何操作，避免各主机按各自的配置互相删除条目；
+    也不能远程清空共享缓存
+    """
+
+    name = 'remote'
+
+    def __init__(self, server_url: str, timeout: float = 5.0, retry_interval: float = 30.0,
+                 token: Optional[str] = None):
+        """
+        Args:
+            server_url: 缓存服务地址，如 http://192.168.1.10:8765
+            timeout: 单次请求超时(秒)
+            retry_interval: 请求失败后暂停访问服务的时间(秒)
+            token: 与缓存服务约定的共享令牌，服务端启用令牌时必须一致
+        """
+        parts = urlsplit(server_url)
+        if parts.scheme != 'http' or not parts.hostname:
+            raise CacheBackendError(f"无效的缓存服务地址: {server_url}")
+
+        self.server_url = server_url
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.base_path = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self.token = token
+
+        self._local = threading.local()
+        self._unavailable_until = 0.0
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _reset_connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _call(self, method: str, **params) -> Any:
+        """调用缓存服务的一个方法
+
+        Raises:
+            CacheBackendError: 服务不可用或返回错误
+        """
+        if time.time() < self._unavailable_until:
+            raise CacheBackendError("缓存服务暂不可用")
+
+        body = json.dumps(params, ensure_ascii=False).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+        path = f"{self.base_path}/{method}"
+
+        # 服务端可能已关闭空闲长连接，失败时重连重试一次
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.request('POST', path, body=body, headers=headers)
+                response = conn.getresponse()
+                payload = json.loads(response.read().decode('utf-8'))
+                break
+            except (http.client.HTTPException, ConnectionError, OSError, ValueError) as e:
+                self._reset_connection()
+                if attempt == 1:
+                    self._unavailable_until = time.time() + self.retry_interval
+                    raise CacheBackendError(f"缓存服务请求失败: {e}") from e
+
+        if response.status != 200:
+            raise CacheBackendError(f"缓存服务返回错误: {payload.get('error', response.status)}")
+        return payload.get('result')
+
+    def get_many(self, file_hashes: List[str], fingerprint: str) -> Dict[str, Dict[str, Any]]:
+        return self._call('get_many', file_hashes=file_hashes, fingerprint=fingerprint)
+
+    def put_many(self, entries: List[Dict[str, Any]]):
+        self._call('put_many', entries=entries)
+
+    def update_recognition(self, file_hash: str, fingerprint: str, file_size: int,
+                           file_mtime: float, recognition: Dict[str, Any],
+                           parser_version: str) -> bool:
+        return self._call('update_recognition', file_hash=file_hash, fingerprint=fingerprint,
+                          file_size=file_size, file_mtime=file_mtime,
+                          recognition=recognition, parser_version=parser_version)
+
+    def touch_many(self, updates: List[Tuple[str, str, float, int]]):
+        self._call('touch_many', updates=[list(update) for update in updates])
+
+    def delete(self, file_hash: str, fingerprint: str):
+        self._call('delete', file_hash=file_hash, fingerprint=fingerprint)
+
+    def cleanup(self, expire_before: float, max_entries: int) -> int:
+        # 由缓存服务按服务端配置清理
+        return 0
+
+    def compact(self, fingerprint: Optional[str], accessed_before: float) -> int:
+        # 由缓存服务按服务端配置压缩
+        return 0
+
+    def stats(self, fingerprint: str) -> Dict[str, int]:
+        return self._call('stats', fingerprint=fingerprint)
+
+    def clear(self):
+        raise CacheBackendError("共享缓存不支持远程清空，请停止缓存服务后删除其数据库文件")
+
+    def close(self):
+        self._reset_connection()
+
+
+# 工厂函数
+def create_cache_backend(cache_config: Dict[str, Any]) -> Optional[CacheBackend]:
+    """根据 cache 配置节创建缓存后端
+
+    Args:
+        cache_config: cache 配置节
+
+    Returns:
+        远程缓存后端；配置为本地SQLite时返回None（由缓存管理器与文件状态索引共用连接创建）
+    """
+    backend = cache_config.get('backend', 'sqlite')
+    if backend == 'sqlite':
+        return None
+    if backend == 'remote':
+        return RemoteCacheBackend(
+            cache_config.get('server_url', 'http://127.0.0.1:8765'),
+            timeout=cache_config.get('remote_timeout', 5),
+            retry_interval=cache_config.get('remote_retry_interval', 30),
+            token=cache_config.get('server_token')
+        )
+    raise CacheBackendError(f"不支持的缓存后端: {backend}")
@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 """
 智能缓存管理器 - 提升重复文件处理速度
+
+两级缓存: 进程内LRU(按内容哈希) → SQLite(单个持久WAL连接)
 """
 
 import os
@@ -8,22 +10,144 @@ import json
 import time
 import hashlib
 import sqlite3
-from typing import Optional, Dict, Any, Tuple
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Tuple, List
 from pathlib import Path
 
+from .cache_backends import CacheBackend, SQLiteCacheBackend, create_cache_backend
+
+# 优先使用xxhash，未安装时使用标准库的BLAKE2（均远快于MD5，缓存场景无需密码学强度）
+try:
+    import xxhash
+    HASH_ALGORITHM = 'xxh3_128'
+except ImportError:
+    xxhash = None
+    HASH_ALGORITHM = 'blake2b'
+
+logger = logging.getLogger(__name__)
+
+
+def _new_hasher():
+    """创建文件内容哈希对象"""
+    if xxhash is not None:
+        return xxhash.xxh3_128()
+    return hashlib.blake2b(digest_size=16)
+
+
+def calculate_file_hash(file_path: str, file_size: Optional[int] = None) -> Optional[str]:
+    """计算文件哈希值
+    
+    Args:
+        file_path: 文件路径
+        file_size: 已知的文件大小，None时重新获取
+    """
+    try:
+        if file_size is None:
+            file_size = os.path.getsize(file_path)
+        
+        # 对于大文件，使用快速哈希策略
+        if file_size > 10 * 1024 * 1024:  # 10MB
+            return _fast_hash(file_path, file_size)
+        else:
+            return _full_hash(file_path)
+            
+    except Exception as e:
+        logger.warning(f"计算文件哈希失败: {e}")
+        return None
+
+
+def _fast_hash(file_path: str, file_size: int) -> Optional[str]:
+    """大文件快速哈希：文件头+尾+大小"""
+    try:
+        hasher = _new_hasher()
+        
+        with open(file_path, 'rb') as f:
+            # 读取文件头 (前8KB)
+            head = f.read(8192)
+            hasher.update(head)
+            
+            # 读取文件尾 (后8KB)
+            if file_size > 16384:
+                f.seek(-8192, 2)
+                tail = f.read(8192)
+                hasher.update(tail)
+            
+            # 添加文件大小
+            hasher.update(str(file_size).encode())
+        
+        return hasher.hexdigest()
+        
+    except Exception as e:
+        logger.warning(f"快速哈希计算失败: {e}")
+        return None
+
+
+def _full_hash(file_path: str) -> Optional[str]:
+    """小文件完整哈希"""
+    try:
+        hasher = _new_hasher()
+        
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                hasher.update(chunk)
+        
+        return hasher.hexdigest()
+        
+    except Exception as e:
+        logger.warning(f"完整哈希计算失败: {e}")
+        return None
+
+
+def make_fingerprint(components: Dict[str, Any]) -> str:
+    """根据引擎版本、模型和相关配置生成缓存指纹
+
+    Args:
+        components: 影响识别结果的各项配置
+
+    Returns:
+        16位十六进制指纹
+    """
+    payload = json.dumps(components, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=8).hexdigest()
+
 
 class CacheManager:
-    """OCR结果缓存管理器"""
+    """OCR结果缓存管理器
+
+    - 内存层: 进程内LRU，按文件内容哈希索引，命中只需一次字典查找
+    - 持久层: 缓存后端（默认本地SQLite单个持久连接(WAL模式)，也可以是多台主机共用的缓存服务），
+      访问时间批量写回，过期/超量清理按写入次数摊销
+    - 文件状态索引: (路径, 大小, mtime_ns, inode) → 内容哈希，文件未变化时只需一次stat
+    - 缓存指纹: 条目按 (内容哈希, 引擎/配置指纹) 存储，其他指纹的条目保留但不使用，
+      由后台压缩任务在保留期后删除
+    """
     
-    def __init__(self, cache_dir: str = "cache", max_cache_size: int = 1000, 
-                 max_cache_days: int = 30):
+    def __init__(self, cache_dir: str = "cache", max_cache_size: int = 200000, 
+                 max_cache_days: int = 30, memory_cache_size: int = 256,
+                 access_flush_batch: int = 64, cleanup_every: int = 500,
+                 stat_index: bool = True, stat_index_size: int = 100000,
+                 fingerprint: str = "", stale_retention_days: float = 7,
+                 compaction_interval: float = 3600,
+                 backend: Optional[CacheBackend] = None):
         """
         初始化缓存管理器
         
         Args:
             cache_dir: 缓存目录
-            max_cache_size: 最大缓存条目数
+            max_cache_size: 最大缓存条目数，0表示不限条数（只按有效期清理）
             max_cache_days: 缓存有效期(天)
+            memory_cache_size: 内存LRU缓存条目数，0表示不使用内存层
+            access_flush_batch: 累积多少条访问记录后批量写回数据库
+            cleanup_every: 每写入多少条结果执行一次过期和超量清理
+            stat_index: 是否启用文件状态索引（文件未变化时跳过哈希计算）
+            stat_index_size: 内存中文件状态索引的最大条目数
+            fingerprint: 引擎/配置指纹，只使用相同指纹的缓存条目
+            stale_retention_days: 其他指纹的条目在最后一次访问后保留的天数
+            compaction_interval: 后台压缩任务的执行间隔(秒)，0表示不启动后台任务
+            backend: 持久层缓存后端，None时使用本地SQLite
         """
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
@@ -31,6 +155,31 @@ class CacheManager:
         self.db_path = self.cache_dir / "ocr_cache.db"
         self.max_cache_size = max_cache_size
         self.max_cache_days = max_cache_days
+        self.memory_cache_size = memory_cache_size
+        self.access_flush_batch = access_flush_batch
+        self.cleanup_every = cleanup_every
+        self.stat_index = stat_index
+        self.stat_index_size = stat_index_size
+        self.fingerprint = fingerprint
+        self.stale_retention_days = stale_retention_days
+        self.compaction_interval = compaction_interval
+        self.backend = backend
+        
+        # 文件状态索引: path -> (file_size, mtime_ns, inode, file_hash)
+        self._stat_index = OrderedDict()
+        self._pending_index = {}
+        
+        # 内存层: file_hash -> 缓存条目
+        self._memory_cache = OrderedDict()
+        self._memory_lock = threading.Lock()
+        
+        # 待写回的访问记录: file_hash -> (最后访问时间, 新增访问次数)
+        self._pending_access = {}
+        self._writes_since_cleanup = 0
+        
+        # 持久连接，所有数据库操作通过锁串行化
+        self._conn = None
+        self._db_lock = threading.RLock()
         
         # 统计信息
         self.stats = {
@@ -38,271 +187,685 @@ class CacheManager:
             'cache_hits': 0,
             'cache_misses': 0,
             'cache_writes': 0,
-            'cache_errors': 0
+            'recognition_writes': 0,
+            'cache_errors': 0,
+            'memory_hits': 0,
+            'memory_misses': 0,
+            'backend_hits': 0,
+            'backend_misses': 0,
+            'batch_lookups': 0,
+            'lookup_time': 0.0,
+            'stat_index_hits': 0,
+            'stat_index_misses': 0,
+            'hash_computed': 0,
+            'hash_time': 0.0,
+            'compactions': 0,
+            'compacted_entries': 0
         }
         
         # 初始化数据库
         self._init_database()
+        
+        # 后台压缩任务
+        self._compaction_stop = threading.Event()
+        self._compaction_thread = None
+        if self.compaction_interval > 0:
+            self.start_background_compaction()
     
     def _init_database(self):
         """初始化缓存数据库"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            
+            with self._db_lock:
+                conn = self._conn
+                
+                # 本地SQLite后端与文件状态索引共用连接
+                if self.backend is None:
+                    self.backend = SQLiteCacheBackend(self.db_path, conn=conn, lock=self._db_lock)
+                
+                # 文件状态索引表（路径相关，始终保存在本机）
                 conn.execute('''
-                    CREATE TABLE IF NOT EXISTS ocr_cache (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        file_hash TEXT UNIQUE NOT NULL,
+                    CREATE TABLE IF NOT EXISTS file_index (
+                        path TEXT PRIMARY KEY,
                         file_size INTEGER NOT NULL,
-                        file_mtime REAL NOT NULL,
-                        ocr_results TEXT NOT NULL,
-                        processing_time REAL NOT NULL,
-                        strategy_used TEXT NOT NULL,
-                        created_at REAL NOT NULL,
-                        accessed_at REAL NOT NULL,
-                        access_count INTEGER DEFAULT 1
+                        mtime_ns INTEGER NOT NULL,
+                        inode INTEGER NOT NULL,
+                        file_hash TEXT NOT NULL,
+                        indexed_at REAL NOT NULL
                     )
                 ''')
                 
-                # 创建索引
-                conn.execute('CREATE INDEX IF NOT EXISTS idx_file_hash ON ocr_cache(file_hash)')
-                conn.execute('CREATE INDEX IF NOT EXISTS idx_accessed_at ON ocr_cache(accessed_at)')
-                
                 conn.commit()
-                print("缓存数据库初始化完成")
+                logger.info("缓存数据库初始化完成")
                 
         except Exception as e:
-            print(f"缓存数据库初始化失败: {e}")
+            logger.warning(f"缓存数据库初始化失败: {e}")
     
     def _calculate_file_hash(self, file_path: str) -> Optional[str]:
         """计算文件哈希值"""
-        try:
-            file_size = os.path.getsize(file_path)
-            
-            # 对于大文件，使用快速哈希策略
-            if file_size > 10 * 1024 * 1024:  # 10MB
-                return self._fast_hash(file_path, file_size)
-            else:
-                return self._full_hash(file_path)
-                
-        except Exception as e:
-            print(f"计算文件哈希失败: {e}")
-            return None
+        return calculate_file_hash(file_path)
     
-    def _fast_hash(self, file_path: str, file_size: int) -> str:
-        """大文件快速哈希：文件头+尾+大小"""
-        try:
-            hasher = hashlib.md5()
-            
-            with open(file_path, 'rb') as f:
-                # 读取文件头 (前8KB)
-                head = f.read(8192)
-                hasher.update(head)
-                
-                # 读取文件尾 (后8KB)
-                if file_size > 16384:
-                    f.seek(-8192, 2)
-                    tail = f.read(8192)
-                    hasher.update(tail)
-                
-                # 添加文件大小
-                hasher.update(str(file_size).encode())
-            
-            return hasher.hexdigest()
-            
-        except Exception as e:
-            print(f"快速哈希计算失败: {e}")
+    def resolve_file_hash(self, file_path: str,
+                          file_stat: Optional[os.stat_result] = None) -> Optional[str]:
+        """获取文件内容哈希，优先查询文件状态索引
+
+        (路径, 大小, mtime_ns, inode) 与索引一致时直接返回记录的哈希，
+        否则计算哈希并更新索引
+
+        Args:
+            file_path: 文件路径
+            file_stat: 已获取的文件状态，None时重新获取
+
+        Returns:
+            文件内容哈希，失败时返回None
+        """
+        if file_stat is None:
+            file_stat = os.stat(file_path)
+        key = (file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ino)
+
+        if self.stat_index:
+            path = os.path.abspath(file_path)
+            file_hash = self._stat_index_get(path, key)
+            if file_hash is not None:
+                self.stats['stat_index_hits'] += 1
+                return file_hash
+            self.stats['stat_index_misses'] += 1
+
+        hash_start = time.perf_counter()
+        file_hash = calculate_file_hash(file_path, file_stat.st_size)
+        self.stats['hash_time'] += time.perf_counter() - hash_start
+        self.stats['hash_computed'] += 1
+
+        if file_hash and self.stat_index:
+            self._stat_index_put(path, key, file_hash)
+        return file_hash
+
+    def _stat_index_get(self, path: str, key: Tuple[int, int, int]) -> Optional[str]:
+        """查询文件状态索引（内存 → SQLite），文件状态不一致时返回None"""
+        with self._memory_lock:
+            entry = self._stat_index.get(path)
+            if entry is not None:
+                self._stat_index.move_to_end(path)
+        
+        if entry is None:
+            with self._db_lock:
+                pending = self._pending_index.get(path)
+                if pending is not None:
+                    entry = pending
+                elif self._conn is not None:
+                    row = self._conn.execute(
+                        'SELECT file_size, mtime_ns, inode, file_hash FROM file_index WHERE path = ?',
+                        (path,)
+                    ).fetchone()
+                    entry = tuple(row) if row else None
+            if entry is not None:
+                self._stat_index_remember(path, entry)
+
+        if entry is not None and entry[:3] == key:
+            return entry[3]
+        return None
+
+    def _stat_index_remember(self, path: str, entry: Tuple):
+        """写入内存中的文件状态索引"""
+        with self._memory_lock:
+            self._stat_index[path] = entry
+            self._stat_index.move_to_end(path)
+            while len(self._stat_index) > self.stat_index_size:
+                self._stat_index.popitem(last=False)
+
+    def _stat_index_put(self, path: str, key: Tuple[int, int, int], file_hash: str):
+        """更新文件状态索引，数据库写入与访问记录一起批量执行"""
+        entry = key + (file_hash,)
+        self._stat_index_remember(path, entry)
+        with self._db_lock:
+            self._pending_index[path] = entry
+            need_flush = len(self._pending_index) >= self.access_flush_batch
+        # 在锁外写回，远程后端的网络请求不阻塞其他缓存查询
+        if need_flush:
+            self._flush_access_updates()
+
+    def _get_file_hash(self, file_path: str, image_context=None) -> Tuple[Optional[str], os.stat_result]:
+        """获取文件哈希和文件状态，复用图像上下文中已有的信息"""
+        file_stat = image_context.stat if image_context is not None else os.stat(file_path)
+
+        if image_context is not None and image_context.has_file_hash:
+            return image_context.file_hash, file_stat
+
+        file_hash = self.resolve_file_hash(file_path, file_stat)
+        if image_context is not None and file_hash:
+            image_context.seed_file_hash(file_hash)
+        return file_hash, file_stat
+
+    def _is_expired(self, created_at: float) -> bool:
+        """缓存条目是否已过期"""
+        return time.time() - created_at > self.max_cache_days * 24 * 3600
+    
+    def _memory_get(self, file_hash: str) -> Optional[Dict[str, Any]]:
+        """从内存层获取条目并标记为最近使用"""
+        if not self.memory_cache_size:
             return None
+        with self._memory_lock:
+            entry = self._memory_cache.get(file_hash)
+            if entry is not None:
+                self._memory_cache.move_to_end(file_hash)
+            return entry
+    
+    def _memory_put(self, file_hash: str, entry: Dict[str, Any]):
+        """写入内存层，超出容量时淘汰最久未使用的条目"""
+        if not self.memory_cache_size:
+            return
+        with self._memory_lock:
+            self._memory_cache[file_hash] = entry
+            self._memory_cache.move_to_end(file_hash)
+            while len(self._memory_cache) > self.memory_cache_size:
+                self._memory_cache.popitem(last=False)
     
-    def _full_hash(self, file_path: str) -> str:
-        """小文件完整哈希"""
+    def _memory_discard(self, file_hash: str):
+        """从内存层移除条目"""
+        with self._memory_lock:
+            self._memory_cache.pop(file_hash, None)
+    
+    def _record_access(self, file_hash: str):
+        """记录一次命中，累积到一定数量后批量写回访问时间"""
+        with self._db_lock:
+            _, count = self._pending_access.get(file_hash, (0.0, 0))
+            self._pending_access[file_hash] = (time.time(), count + 1)
+            need_flush = len(self._pending_access) >= self.access_flush_batch
+        if need_flush:
+            self._flush_access_updates()
+    
+    def _flush_access_updates(self):
+        """批量写回访问时间、访问次数和文件状态索引
+
+        只在取出待写记录和写本地索引时持有 _db_lock，调用方不能持有该锁，
+        否则远程后端的网络请求会阻塞所有缓存查询
+        """
+        with self._db_lock:
+            if not self._pending_access and not self._pending_index:
+                return
+            updates = [(file_hash, self.fingerprint, accessed_at, count)
+                       for file_hash, (accessed_at, count) in self._pending_access.items()]
+            index_rows = [(path,) + entry + (time.time(),)
+                          for path, entry in self._pending_index.items()]
+            self._pending_access.clear()
+            self._pending_index.clear()
+            try:
+                if index_rows and self._conn is not None:
+                    self._conn.executemany('''
+                        INSERT OR REPLACE INTO file_index
+                        (path, file_size, mtime_ns, inode, file_hash, indexed_at)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    ''', index_rows)
+                    self._conn.commit()
+            except Exception as e:
+                logger.warning(f"文件状态索引写回失败: {e}")
+        
+        # 远程后端的网络请求不占用本地锁
         try:
-            hasher = hashlib.md5()
-            
-            with open(file_path, 'rb') as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hasher.update(chunk)
-            
-            return hasher.hexdigest()
-            
+            if updates:
+                self.backend.touch_many(updates)
         except Exception as e:
-            print(f"完整哈希计算失败: {e}")
-            return None
+            logger.warning(f"访问记录写回失败: {e}")
     
-    def get_cached_result(self, file_path: str) -> Optional[Dict[str, Any]]:
-        """获取缓存的OCR结果"""
+    def get_cached_result(self, file_path: str, image_context=None) -> Optional[Dict[str, Any]]:
+        """获取缓存的OCR结果
+        
+        Args:
+            file_path: 文件路径
+            image_context: 图像上下文，提供时复用其中已计算的哈希和文件状态
+
+        Returns:
+            缓存条目；recognition 为保存的识别结论（未保存时为None），
+            parser_version 为生成该结论的解析器指纹
+        """
         self.stats['total_requests'] += 1
+        lookup_start = time.perf_counter()
         
         try:
-            # 计算文件哈希
-            file_hash = self._calculate_file_hash(file_path)
+            # 获取文件哈希（文件未变化时直接使用状态索引中的哈希）
+            file_hash, file_stat = self._get_file_hash(file_path, image_context)
             if not file_hash:
                 self.stats['cache_errors'] += 1
                 return None
             
-            # 获取文件信息
-            file_stat = os.stat(file_path)
-            file_size = file_stat.st_size
-            file_mtime = file_stat.st_mtime
+            # 1. 内存层
+            entry = self._memory_lookup(file_hash, file_stat)
             
-            # 查询缓存
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.execute('''
-                    SELECT ocr_results, processing_time, strategy_used, created_at
-                    FROM ocr_cache 
-                    WHERE file_hash = ? AND file_size = ? AND file_mtime = ?
-                ''', (file_hash, file_size, file_mtime))
-                
-                row = cursor.fetchone()
-                
-                if row:
-                    # 检查缓存是否过期
-                    created_at = row[3]
-                    if time.time() - created_at > self.max_cache_days * 24 * 3600:
-                        # 缓存过期，删除
-                        conn.execute('DELETE FROM ocr_cache WHERE file_hash = ?', (file_hash,))
-                        conn.commit()
-                        self.stats['cache_misses'] += 1
-                        return None
-                    
-                    # 更新访问时间和次数
-                    conn.execute('''
-                        UPDATE ocr_cache 
-                        SET accessed_at = ?, access_count = access_count + 1
-                        WHERE file_hash = ?
-                    ''', (time.time(), file_hash))
-                    conn.commit()
-                    
-                    # 解析结果
-                    ocr_results = json.loads(row[0])
-                    processing_time = row[1]
-                    strategy_used = row[2]
-                    
-                    self.stats['cache_hits'] += 1
-                    
-                    print(f"✅ 缓存命中: {os.path.basename(file_path)} (策略: {strategy_used}, 原耗时: {processing_time:.2f}秒)")
-                    
-                    return {
-                        'ocr_results': ocr_results,
-                        'processing_time': processing_time,
-                        'strategy_used': strategy_used,
-                        'from_cache': True
-                    }
-                else:
+            if entry is None:
+                # 2. 持久层
+                fetched = self.backend.get_many([file_hash], self.fingerprint)
+                entry = self._accept_backend_entry(file_hash, fetched.get(file_hash), file_stat)
+                if entry is None:
                     self.stats['cache_misses'] += 1
                     return None
+            
+            self._record_access(file_hash)
+            self.stats['cache_hits'] += 1
+            
+            logger.debug(f"缓存命中: {os.path.basename(file_path)} (策略: {entry['strategy_used']}, 原耗时: {entry['processing_time']:.2f}秒)")
+            
+            return self._as_result(entry)
                     
         except Exception as e:
-            print(f"缓存查询失败: {e}")
+            logger.warning(f"缓存查询失败: {e}")
             self.stats['cache_errors'] += 1
             return None
+        finally:
+            self.stats['lookup_time'] += time.perf_counter() - lookup_start
+    
+    def lookup_many(self, file_paths: List[str], max_workers: int = 1,
+                    file_hashes: Optional[Dict[str, str]] = None) -> Dict[str, Dict[str, Any]]:
+        """批量查询缓存，内存层未命中的文件通过一次后端请求查询
+
+        Args:
+            file_paths: 文件路径列表
+            max_workers: 获取文件状态和计算哈希的并行线程数
+            file_hashes: 提供时填入 文件路径 -> 内容哈希，供后续识别复用，无需再次计算或查询
+
+        Returns:
+            文件路径 -> 缓存条目（格式同 get_cached_result），未命中的文件不在结果中
+        """
+        results = {}
+        pending = {}  # file_hash -> [(file_path, file_stat), ...]
+        lookup_start = time.perf_counter()
+        self.stats['total_requests'] += len(file_paths)
+        self.stats['batch_lookups'] += 1
+        
+        if max_workers > 1 and len(file_paths) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                resolved = list(executor.map(self._try_get_file_hash, file_paths))
+        else:
+            resolved = [self._try_get_file_hash(file_path) for file_path in file_paths]
+        
+        for file_path, (file_hash, file_stat) in zip(file_paths, resolved):
+            if not file_hash:
+                self.stats['cache_errors'] += 1
+                continue
+            if file_hashes is not None:
+                file_hashes[file_path] = file_hash
+            
+            entry = self._memory_lookup(file_hash, file_stat)
+            if entry is not None:
+                results[file_path] = self._as_result(entry)
+                self._record_access(file_hash)
+            else:
+                pending.setdefault(file_hash, []).append((file_path, file_stat))
+        
+        if pending:
+            try:
+                fetched = self.backend.get_many(list(pending), self.fingerprint)
+            except Exception as e:
+                logger.warning(f"批量缓存查询失败: {e}")
+                self.stats['cache_errors'] += 1
+                fetched = {}
+            
+            for file_hash, items in pending.items():
+                for file_path, file_stat in items:
+                    entry = self._accept_backend_entry(file_hash, fetched.get(file_hash), file_stat)
+                    if entry is not None:
+                        results[file_path] = self._as_result(entry)
+                        self._record_access(file_hash)
+        
+        self.stats['cache_hits'] += len(results)
+        self.stats['cache_misses'] += len(file_paths) - len(results)
+        self.stats['lookup_time'] += time.perf_counter() - lookup_start
+        return results
+    
+    def _try_get_file_hash(self, file_path: str) -> Tuple[Optional[str], Optional[os.stat_result]]:
+        """获取文件哈希和文件状态，文件不可访问时返回 (None, None)"""
+        try:
+            return self._get_file_hash(file_path)
+        except OSError:
+            return None, None
+    
+    def _memory_lookup(self, file_hash: str, file_stat: os.stat_result) -> Optional[Dict[str, Any]]:
+        """查询内存层，文件状态不一致或已过期的条目视为未命中"""
+        entry = self._memory_get(file_hash)
+        if entry is not None and (entry['file_size'] != file_stat.st_size or
+                                  entry['file_mtime'] != file_stat.st_mtime):
+            entry = None
+        if entry is not None and self._is_expired(entry['created_at']):
+            self._memory_discard(file_hash)
+            entry = None
+        
+        if entry is not None:
+            self.stats['memory_hits'] += 1
+        else:
+            self.stats['memory_misses'] += 1
+        return entry
+    
+    def _accept_backend_entry(self, file_hash: str, entry: Optional[Dict[str, Any]],
+                              file_stat: os.stat_result) -> Optional[Dict[str, Any]]:
+        """校验持久层返回的条目，命中时写入内存层，过期条目从后端删除"""
+        if entry is not None and (entry['file_size'] != file_stat.st_size or
+                                  entry['file_mtime'] != file_stat.st_mtime):
+            entry = None
+        if entry is not None and self._is_expired(entry['created_at']):
+            try:
+                self.backend.delete(file_hash, self.fingerprint)
+            except Exception as e:
+                logger.warning(f"删除过期缓存失败: {e}")
+            entry = None
+        
+        if entry is None:
+            self.stats['backend_misses'] += 1
+            return None
+        
+        self.stats['backend_hits'] += 1
+        self._memory_put(file_hash, entry)
+        return entry
+    
+    @staticmethod
+    def _as_result(entry: Dict[str, Any]) -> Dict[str, Any]:
+        """缓存条目转换为查询结果"""
+        return {
+            'ocr_results': entry['ocr_results'],
+            'processing_time': entry['processing_time'],
+            'strategy_used': entry['strategy_used'],
+            'recognition': entry.get('recognition'),
+            'parser_version': entry.get('parser_version'),
+            'from_cache': True
+        }
     
     def save_result(self, file_path: str, ocr_results: list, 
-                   processing_time: float, strategy_used: str):
+                   processing_time: float, strategy_used: str, image_context=None):
         """保存OCR结果到缓存"""
         try:
-            # 计算文件哈希
-            file_hash = self._calculate_file_hash(file_path)
+            # 获取文件哈希
+            file_hash, file_stat = self._get_file_hash(file_path, image_context)
             if not file_hash:
                 return
             
-            # 获取文件信息
-            file_stat = os.stat(file_path)
-            file_size = file_stat.st_size
-            file_mtime = file_stat.st_mtime
+            entry = {
+                'file_hash': file_hash,
+                'fingerprint': self.fingerprint,
+                'file_size': file_stat.st_size,
+                'file_mtime': file_stat.st_mtime,
+                'ocr_results': ocr_results,
+                'processing_time': processing_time,
+                'strategy_used': strategy_used,
+                'created_at': time.time(),
+                'recognition': None,
+                'parser_version': None
+            }
             
-            # 序列化结果
-            results_json = json.dumps(ocr_results, ensure_ascii=False)
-            current_time = time.time()
+            # 保存到持久层
+            self.backend.put_many([entry])
             
-            # 保存到数据库
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute('''
-                    INSERT OR REPLACE INTO ocr_cache 
-                    (file_hash, file_size, file_mtime, ocr_results, processing_time, 
-                     strategy_used, created_at, accessed_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (file_hash, file_size, file_mtime, results_json, processing_time,
-                      strategy_used, current_time, current_time))
-                
-                conn.commit()
+            with self._db_lock:
+                # 新写入的条目无需再更新访问时间
+                self._pending_access.pop(file_hash, None)
+                self._writes_since_cleanup += 1
+                need_cleanup = self._writes_since_cleanup >= self.cleanup_every
+            
+            self._memory_put(file_hash, entry)
             
             self.stats['cache_writes'] += 1
             
-            # 清理过期缓存
-            self._cleanup_cache()
+            # 清理过期缓存（按写入次数摊销）
+            if need_cleanup:
+                self._cleanup_cache()
             
         except Exception as e:
-            print(f"缓存保存失败: {e}")
+            logger.warning(f"缓存保存失败: {e}")
             self.stats['cache_errors'] += 1
     
+    def save_recognition(self, file_path: str, recognition: Dict[str, Any],
+                         parser_version: str, image_context=None) -> bool:
+        """在已缓存的OCR结果旁保存识别结论（日期、置信度、图片尺寸、警告）
+
+        Args:
+            file_path: 文件路径
+            recognition: 识别结论字典
+            parser_version: 生成该结论的解析器指纹
+            image_context: 图像上下文
+
+        Returns:
+            是否保存成功（没有对应的OCR缓存条目时返回False）
+        """
+        try:
+            file_hash, file_stat = self._get_file_hash(file_path, image_context)
+            if not file_hash:
+                return False
+
+            if not self.backend.update_recognition(file_hash, self.fingerprint,
+                                                   file_stat.st_size, file_stat.st_mtime,
+                                                   recognition, parser_version):
+                return False
+
+            with self._memory_lock:
+                entry = self._memory_cache.get(file_hash)
+                if entry is not None:
+                    entry['recognition'] = recognition
+                    entry['parser_version'] = parser_version
+
+            self.stats['recognition_writes'] += 1
+            return True
+
+        except Exception as e:
+            logger.warning(f"识别结论保存失败: {e}")
+            self.stats['cache_errors'] += 1
+            return False
+
     def _cleanup_cache(self):
         """清理过期和过多的缓存"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                current_time = time.time()
-                expire_time = current_time - self.max_cache_days * 24 * 3600
-                
-                # 删除过期缓存
-                conn.execute('DELETE FROM ocr_cache WHERE created_at < ?', (expire_time,))
-                
-                # 检查缓存数量
-                cursor = conn.execute('SELECT COUNT(*) FROM ocr_cache')
-                cache_count = cursor.fetchone()[0]
-                
-                if cache_count > self.max_cache_size:
-                    # 删除最少使用的缓存
-                    excess_count = cache_count - self.max_cache_size
-                    conn.execute('''
-                        DELETE FROM ocr_cache 
-                        WHERE id IN (
-                            SELECT id FROM ocr_cache 
-                            ORDER BY accessed_at ASC 
-                            LIMIT ?
-                        )
-                    ''', (excess_count,))
-                
-                conn.commit()
+            with self._db_lock:
+                self._writes_since_cleanup = 0
+            
+            # 先写回访问时间，保证按最近访问淘汰
+            self._flush_access_updates()
+            
+            expire_time = time.time() - self.max_cache_days * 24 * 3600
+            self.backend.cleanup(expire_time, self.max_cache_size)
                 
         except Exception as e:
-            print(f"缓存清理失败: {e}")
+            logger.warning(f"缓存清理失败: {e}")
+    
+    def compact_stale_entries(self, retention_days: Optional[float] = None) -> int:
+        """删除其他指纹中超过保留期未被访问的条目
+
+        Args:
+            retention_days: 保留天数，None时使用配置的 stale_retention_days
+
+        Returns:
+            删除的条目数
+        """
+        if retention_days is None:
+            retention_days = self.stale_retention_days
+        cutoff = time.time() - retention_days * 24 * 3600
+        
+        try:
+            removed = self.backend.compact(self.fingerprint, cutoff)
+            self._prune_file_index()
+            
+            self.stats['compactions'] += 1
+            self.stats['compacted_entries'] += removed
+            if removed:
+                logger.info(f"缓存压缩完成: 删除 {removed} 条其他配置指纹的过期条目")
+            return removed
+            
+        except Exception as e:
+            logger.warning(f"缓存压缩失败: {e}")
+            return 0
+    
+    def _prune_file_index(self) -> int:
+        """删除文件状态索引中的失效行
+
+        超过 max_cache_days 未重新索引的行一律删除；本地SQLite后端时还删除
+        哈希在缓存表中已不存在的行（文件已删除、改名或缓存已淘汰）
+
+        Returns:
+            删除的行数
+        """
+        # 先写回待写索引，避免刚索引的路径被误删后又被写回
+        self._flush_access_updates()
+        
+        expire_time = time.time() - self.max_cache_days * 24 * 3600
+        # 远程后端的缓存表不在本地数据库中，只能按时间清理
+        shares_db = isinstance(self.backend, SQLiteCacheBackend) and self.backend._conn is self._conn
+        
+        try:
+            with self._db_lock:
+                removed = self._conn.execute(
+                    'DELETE FROM file_index WHERE indexed_at < ?', (expire_time,)
+                ).rowcount
+                if shares_db:
+                    removed += self._conn.execute('''
+                        DELETE FROM file_index
+                        WHERE file_hash NOT IN (SELECT file_hash FROM ocr_cache)
+                    ''').rowcount
+                self._conn.commit()
+            
+            if removed:
+                logger.info(f"文件状态索引清理完成: 删除 {removed} 行")
+            return removed
+            
+        except Exception as e:
+            logger.warning(f"文件状态索引清理失败: {e}")
+            return 0
+    
+    def start_background_compaction(self):
+        """启动后台压缩线程，按 compaction_interval 定期执行 compact_stale_entries"""
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        
+        def run():
+            while not self._compaction_stop.wait(self.compaction_interval):
+                self.compact_stale_entries()
+        
+        self._compaction_stop.clear()
+        self._compaction_thread = threading.Thread(target=run, name="cache-compaction", daemon=True)
+        self._compaction_thread.start()
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """获取缓存统计信息"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.execute('SELECT COUNT(*) FROM ocr_cache')
-                cache_count = cursor.fetchone()[0]
-                
-                cursor = conn.execute('SELECT SUM(LENGTH(ocr_results)) FROM ocr_cache')
-                cache_size = cursor.fetchone()[0] or 0
+            self._flush_access_updates()
+            backend_stats = self.backend.stats(self.fingerprint)
+            cache_count = backend_stats['count']
+            cache_size = backend_stats['size_bytes']
+            stale_count = backend_stats['stale_count']
         except:
             cache_count = 0
             cache_size = 0
+            stale_count = 0
         
         total_requests = self.stats['total_requests']
         cache_hits = self.stats['cache_hits']
         
         hit_rate = (cache_hits / total_requests * 100) if total_requests > 0 else 0
+        avg_lookup_us = (self.stats['lookup_time'] / total_requests * 1e6) if total_requests > 0 else 0
         
         return {
             'total_requests': total_requests,
             'cache_hits': cache_hits,
             'cache_misses': self.stats['cache_misses'],
             'cache_writes': self.stats['cache_writes'],
+            'recognition_writes': self.stats['recognition_writes'],
             'cache_errors': self.stats['cache_errors'],
             'hit_rate': f"{hit_rate:.1f}%",
             'cache_count': cache_count,
-            'cache_size_mb': f"{cache_size / 1024 / 1024:.2f}MB"
+            'cache_size_mb': f"{cache_size / 1024 / 1024:.2f}MB",
+            'memory_tier': {
+                'hits': self.stats['memory_hits'],
+                'misses': self.stats['memory_misses'],
+                'size': len(self._memory_cache),
+                'max_size': self.memory_cache_size
+            },
+            'backend_tier': {
+                'backend': self.backend.name if self.backend is not None else None,
+                'hits': self.stats['backend_hits'],
+                'misses': self.stats['backend_misses'],
+                'batch_lookups': self.stats['batch_lookups'],
+                'pending_access_updates': len(self._pending_access)
+            },
+            'avg_lookup_us': f"{avg_lookup_us:.1f}",
+            'fingerprint': self.fingerprint,
+            'stale_fingerprint_entries': stale_count,
+            'compacted_entries': self.stats['compacted_entries'],
+            'stat_index': {
+                'enabled': self.stat_index,
+                'hits': self.stats['stat_index_hits'],
+                'misses': self.stats['stat_index_misses'],
+                'hash_computed': self.stats['hash_computed'],
+                'hash_time': f"{self.stats['hash_time']:.3f}s",
+                'hash_algorithm': HASH_ALGORITHM
+            }
         }
     
     def clear_cache(self):
         """清空所有缓存"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute('DELETE FROM ocr_cache')
-                conn.commit()
+            with self._db_lock:
+                self._pending_access.clear()
+                self._pending_index.clear()
+                self._conn.execute('DELETE FROM file_index')
+                self._conn.commit()
+            
+            with self._memory_lock:
+                self._stat_index.clear()
+            
+            with self._memory_lock:
+                self._memory_cache.clear()
             
-            print("缓存已清空")
+            # 远程后端不支持清空，此时只清空本机的索引和内存层
+            self.backend.clear()
+            
+            logger.info("缓存已清空")
             
         except Exception as e:
-            print(f"清空缓存失败: {e}")
+            logger.warning(f"清空缓存失败: {e}")
+    
+    def close(self):
+        """停止后台压缩任务，写回未保存的访问记录并关闭数据库连接"""
+        self._compaction_stop.set()
+        if self._conn is not None:
+            self._flush_access_updates()
+        with self._db_lock:
+            if self._conn is None:
+                return
+            try:
+                # 写回上面一次写回之后新增的少量记录（关闭时持锁无妨）
+                self._flush_access_updates()
+                self.backend.close()
+                self._conn.close()
+            except Exception as e:
+                logger.warning(f"关闭缓存数据库失败: {e}")
+            finally:
+                self._conn = None
+
+
+# 工厂函数
+def create_cache_manager(config: Optional[Dict] = None, fingerprint: str = "") -> CacheManager:
+    """创建缓存管理器实例
+    
+    Args:
+        config: 配置字典，如果为None则使用全局配置
+        fingerprint: 引擎/配置指纹
+        
+    Returns:
+        缓存管理器实例
+    """
+    if config is None:
+        from utils.config_loader import get_config
+        config = get_config().config
+    cache_config = config.get('cache', {})
+    
+    return CacheManager(
+        cache_dir=cache_config.get('cache_dir', 'cache'),
+        max_cache_size=cache_config.get('max_cache_size', 200000),
+        max_cache_days=cache_config.get('max_cache_days', 30),
+        memory_cache_size=cache_config.get('memory_cache_size', 256),
+        access_flush_batch=cache_config.get('access_flush_batch', 64),
+        cleanup_every=cache_config.get('cleanup_every', 500),
+        stat_index=cache_config.get('stat_index', True),
+        stat_index_size=cache_config.get('stat_index_size', 100000),
+        fingerprint=fingerprint,
+        stale_retention_days=cache_config.get('stale_retention_days', 7),
+        compaction_interval=cache_config.get('compaction_interval', 3600),
+        backend=create_cache_backend(cache_config)
+    )
@@ -0,0 +1,262 @@
+"""
+共享OCR缓存服务
+
+多台主机处理同一共享目录时，各主机的缓存管理器配置为 remote 后端，
+通过本服务共用一份OCR结果，同一张图片只需识别一次。
+
+协议: HTTP POST /<方法名>，请求体为JSON参数，响应 {"result": ...} 或 {"error": ...}；
+方法与 CacheBackend 接口一致，GET /health 用于健康检查。
+默认只监听本机；供多台主机访问时应设置共享令牌，客户端在 Authorization: Bearer <令牌>
+请求头中携带（对应 cache.server_token 配置），否则任何能访问端口的主机都能写入缓存。
+
+保留策略只由服务端执行（--max-entries / --max-days / --retention-days），
+客户端不能远程清理、压缩或清空共享缓存，避免各主机按各自的配置互相删除条目。
+
+运行:
+    OCR_CACHE_TOKEN=<令牌> python -m core.cache_server --db cache/shared_ocr_cache.db --host 0.0.0.0 --port 8765
+"""
+
+import os
+import hmac
+import json
+import time
+import logging
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Optional
+
+from .cache_backends import SQLiteCacheBackend
+from utils.logger import setup_logging
+
+logger = logging.getLogger(__name__)
+
+# 允许远程调用的后端方法（cleanup/compact/clear 只在服务端执行）
+SERVED_METHODS = (
+    'get_many', 'put_many', 'update_recognition', 'touch_many',
+    'delete', 'stats'
+)
+
+
+class _CacheRequestHandler(BaseHTTPRequestHandler):
+    """把 POST /<方法名> 转发给缓存后端"""
+
+    protocol_version = 'HTTP/1.1'  # 保持长连接，批量查询无需每次重新建立连接
+
+    def do_POST(self):
+        if not self._authorized():
+            self._reply(401, {'error': '令牌无效'})
+            return
+
+        method = self.path.rstrip('/').rsplit('/', 1)[-1]
+        if method not in SERVED_METHODS:
+            self._reply(404, {'error': f"未知方法: {method}"})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            params = json.loads(self.rfile.read(length).decode('utf-8')) if length else {}
+        except ValueError as e:
+            self._reply(400, {'error': f"请求格式错误: {e}"})
+            return
+
+        try:
+            result = getattr(self.server.backend, method)(**params)
+        except TypeError as e:
+            self._reply(400, {'error': f"参数错误: {e}"})
+            return
+        except Exception as e:
+            self._reply(500, {'error': str(e)})
+            return
+
+        self._reply(200, {'result': result})
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/health':
+            self._reply(200, {'result': 'ok'})
+        else:
+            self._reply(404, {'error': '未知路径'})
+
+    def _authorized(self) -> bool:
+        token = self.server.token
+        if not token:
+            return True
+        provided = self.headers.get('Authorization', '')
+        return hmac.compare_digest(provided.encode('utf-8'), f"Bearer {token}".encode('utf-8'))
+
+    def _reply(self, status: int, payload: dict):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 每次查询都输出访问日志会淹没控制台
+        pass
+
+
+class CacheServer:
+    """共享缓存服务（多线程HTTP服务 + 本地SQLite后端）"""
+
+    def __init__(self, db_path: str = "cache/shared_ocr_cache.db",
+                 host: str = "127.0.0.1", port: int = 8765, token: Optional[str] = None,
+                 max_entries: int = 200000, max_days: float = 30, retention_days: float = 7,
+                 maintenance_interval: float = 3600):
+        """
+        Args:
+            db_path: 共享缓存数据库路径
+            host: 监听地址
+            port: 监听端口，0表示自动分配
+            token: 共享令牌，设置后只接受携带相同令牌的请求（/health 除外）
+            max_entries: 最大条目数，0表示不限条数
+            max_days: 条目有效期(天，按创建时间)
+            retention_days: 任意指纹的条目超过该天数未被访问即删除；各主机仍在使用的指纹会持续更新访问时间
+            maintenance_interval: 清理任务的执行间隔(秒)，0表示不执行
+        """
+        self.backend = SQLiteCacheBackend(db_path)
+        self.max_entries = max_entries
+        self.max_days = max_days
+        self.retention_days = retention_days
+        self.maintenance_interval = maintenance_interval
+        self._maintenance_stop = threading.Event()
+        self._maintenance_thread: Optional[threading.Thread] = None
+        self._server = ThreadingHTTPServer((host, port), _CacheRequestHandler)
+        self._server.daemon_threads = True
+        self._server.backend = self.backend
+        self._server.token = token
+        if not token and host not in ('127.0.0.1', 'localhost', '::1'):
+            logger.warning(f"共享缓存服务监听 {host} 但未设置令牌，网络中的任何主机都可以写入缓存")
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """客户端使用的服务地址"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def run_maintenance(self) -> int:
+        """按服务端配置执行一次过期、超量和长期未访问条目的清理
+
+        Returns:
+            删除的条目数
+        """
+        now = time.time()
+        try:
+            removed = self.backend.cleanup(now - self.max_days * 24 * 3600, self.max_entries)
+            removed += self.backend.compact(None, now - self.retention_days * 24 * 3600)
+        except Exception as e:
+            logger.warning(f"共享缓存清理失败: {e}")
+            return 0
+        if removed:
+            logger.info(f"共享缓存清理完成: 删除 {removed} 条")
+        return removed
+
+    def _start_maintenance(self):
+        if self.maintenance_interval <= 0 or self._maintenance_thread is not None:
+            return
+
+        def run():
+            self.run_maintenance()
+            while not self._maintenance_stop.wait(self.maintenance_interval):
+                self.run_maintenance()
+
+        self._maintenance_stop.clear()
+        self._maintenance_thread = threading.Thread(target=run, name="cache-maintenance", daemon=True)
+        self._maintenance_thread.start()
+
+    def start(self):
+        """在后台线程中启动服务（用于测试或嵌入其他进程）"""
+        if self._thread is not None:
+            return
+        self._start_maintenance()
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"共享缓存服务已启动: {self.url}")
+
+    def serve_forever(self):
+        """在当前线程中运行服务，直到中断"""
+        self._start_maintenance()
+        logger.info(f"共享缓存服务运行中: {self.url}")
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """停止服务并关闭数据库"""
+        self._maintenance_stop.set()
+        if self._maintenance_thread is not None:
+            self._maintenance_thread.join()
+            self._maintenance_thread = None
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        self.backend.close()
+        logger.info("共享缓存服务已停止")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+
+# 工厂函数
+def create_cache_server(db_path: str = "cache/shared_ocr_cache.db",
+                        host: str = "127.0.0.1", port: int = 8765,
+                        token: Optional[str] = None, max_entries: int = 200000,
+                        max_days: float = 30, retention_days: float = 7,
+                        maintenance_interval: float = 3600) -> CacheServer:
+    """创建共享缓存服务实例
+
+    Args:
+        db_path: 共享缓存数据库路径
+        host: 监听地址
+        port: 监听端口
+        token: 共享令牌，None表示不校验
+        max_entries: 最大条目数，0表示不限条数
+        max_days: 条目有效期(天)
+        retention_days: 条目最后一次访问后的保留天数
+        maintenance_interval: 清理任务的执行间隔(秒)，0表示不执行
+
+    Returns:
+        缓存服务实例
+    """
+    return CacheServer(db_path, host, port, token, max_entries, max_days,
+                       retention_days, maintenance_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="共享OCR缓存服务")
+    parser.add_argument('--db', default='cache/shared_ocr_cache.db', help='共享缓存数据库路径')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='监听地址（默认只允许本机访问，多台主机共用时设为 0.0.0.0 并设置令牌）')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口')
+    parser.add_argument('--token', default=os.environ.get('OCR_CACHE_TOKEN'),
+                        help='共享令牌（默认读取环境变量 OCR_CACHE_TOKEN），客户端配置 cache.server_token')
+    parser.add_argument('--max-entries', type=int, default=200000,
+                        help='最大条目数，超出时按最近访问淘汰（0=不限，只按有效期清理）')
+    parser.add_argument('--max-days', type=float, default=30, help='条目有效期(天)')
+    parser.add_argument('--retention-days', type=float, default=7,
+                        help='条目超过该天数未被任何主机访问即删除（包括已不再使用的配置指纹）')
+    parser.add_argument('--maintenance-interval', type=float, default=3600,
+                        help='清理任务执行间隔(秒)，0=不清理')
+    parser.add_argument('--log-level', default='INFO', help='日志级别')
+    args = parser.parse_args()
+
+    setup_logging(log_level=args.log_level.upper())
+    create_cache_server(args.db, args.host, args.port, args.token,
+                        max_entries=args.max_entries, max_days=args.max_days,
+                        retention_days=args.retention_days,
+                        maintenance_interval=args.maintenance_interval).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
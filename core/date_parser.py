@@ -5,17 +5,83 @@
 """
 
 import re
+import json
+import hashlib
 import logging
-from typing import List, Optional, Dict, Any, Tuple
-from datetime import datetime, date
+from bisect import bisect_left, bisect_right
+from calendar import monthrange
+from itertools import islice, product
+from typing import List, Optional, Dict, Any, Tuple, Sequence
+from datetime import datetime, date, timedelta
 from dataclasses import dataclass
 
+import numpy as np
+
 from .models import TextResult, DateInfo
 from utils.config_loader import get_config
 from utils.validators import validate_date_string
+from utils.tracing import get_tracer
+from utils.keyword_matcher import KeywordMatcher
 
 logger = logging.getLogger(__name__)
 
+# 解析逻辑版本号，修改解析/验证算法后递增，使缓存中的识别结论失效
+PARSER_VERSION = 5
+
+# 半角和全角数字（向量化统计数字比例时使用）
+_DIGIT_CHARS = '0123456789０１２３４５６７８９'
+
+# 影响文本质量评分的特殊字符
+_SPECIAL_CHARS = '!@#$%^&*()'
+
+# 全角字符和常见中文标点转为半角（逐字符替换，替换前后文本长度不变）
+_WIDTH_TABLE = str.maketrans({
+    **{chr(code): chr(code - 0xFEE0) for code in range(0xFF01, 0xFF5F)},
+    '\u3000': ' ', '。': '.', '·': '.', '—': '-', '–': '-'
+})
+# 需要转换的字符，长文本用正则只替换这些字符，比整体 translate 快
+_WIDE_CHAR = re.compile('[%s]' % ''.join(re.escape(chr(code)) for code in _WIDTH_TABLE))
+
+# OCR易混字符 -> 可能的数字，第一个为首选；只在数字串内部替换
+OCR_CONFUSIONS = {
+    'O': '0', 'o': '0', 'D': '0', 'Q': '0',
+    'I': '1', 'l': '1', 'i': '1', '|': '1',
+    'Z': '27', 'z': '2',
+    'S': '58', 's': '5',
+    'G': '69', 'b': '6',
+    'T': '7',
+    'B': '83'
+}
+_CONFUSABLE = ''.join(re.escape(char) for char in OCR_CONFUSIONS)
+# 数字与易混字符相邻，文本可能需要纠正
+_CONFUSION_HINT = re.compile(rf'[0-9][{_CONFUSABLE}]|[{_CONFUSABLE}][0-9]')
+# 由数字、易混字符和日期分隔符组成的片段
+_CONFUSION_RUN = re.compile(rf'[0-9{_CONFUSABLE}](?:[0-9{_CONFUSABLE}]|[.\-/:年月日](?=[0-9{_CONFUSABLE}]))*')
+
+# 可能是被拆开的日期片段: 以数字或日期分隔符结尾（前半段）/ 开头（后半段）
+_FRAGMENT_TAIL = re.compile(r'[0-9年月.\-/]$')
+_FRAGMENT_HEAD = re.compile(r'^[0-9月日.\-/]')
+_FRAGMENT_EDGE = re.compile(r'[0-9年月.\-/]$|^[0-9月日.\-/]', re.MULTILINE)
+
+# 模式中的数字片段，如 \d{4}、\d{1,2}
+_DIGIT_TOKEN = re.compile(r'\\d\{(\d+)(?:,(\d+))?\}')
+
+# 日期语义关键词: 类别 -> 关键词（英文不区分大小写）；shelf_life 后接时长时用于推算到期日
+DEFAULT_DATE_KEYWORDS = {
+    'production': ['生产日期', '生产', '制造日期', '出厂日期', '包装日期', '灌装日期',
+                   'MFG', 'MFD', 'PRD', 'PROD', 'DOM'],
+    'expiry': ['保质期至', '有效期至', '有效期', '到期日', '失效日期', '限用日期', '此日期前食用',
+               'EXP', 'BB', 'BBE', 'best before', 'use by'],
+    'shelf_life': ['保质期', '保存期', 'shelf life']
+}
+# 关键词匹配前的文本规范化: 全角转半角 + 英文转小写（逐字符替换，位置不变）
+_KEYWORD_TABLE = {
+    **{code: value.lower() for code, value in _WIDTH_TABLE.items()},
+    **{code: chr(code + 32) for code in range(ord('A'), ord('Z') + 1)}
+}
+# 保质期关键词后的时长，如 保质期：12个月、保质期 2年
+_SHELF_LIFE = re.compile(r'[\s:]*(\d{1,4})\s*(个月|月|年|天|日|months?|years?|days?)')
+
 
 class DateParsingError(Exception):
     """日期解析异常"""
@@ -30,6 +96,9 @@ class DatePattern:
     format_type: str       # 格式类型
     weight: float         # 权重（用于置信度计算）
     parser_func: str      # 解析函数名
+    group: str = ''       # 在合并正则中的分组名
+    source: str = ''      # 加了年月日命名分组后的模式
+    field_groups: Optional[Tuple[str, str, str]] = None  # 年/月/日分组名，无法拆分时为None
 
 
 class DateParser:
@@ -54,9 +123,34 @@ class DateParser:
         self.year_range = tuple(self.config.get('year_range', [2020, 2030]))
         self.strict_validation = self.config.get('strict_validation', True)
         self.output_format = self.config.get('output_format', 'YYYY-MM-DD')
+
+        # OCR易混字符纠正
+        correction_config = self.config.get('ocr_correction', {})
+        self.ocr_correction = correction_config.get('enabled', True)
+        self.max_candidates = max(1, correction_config.get('max_candidates', 8))
+        self.correction_penalty = correction_config.get('penalty', 0.95)
+
+        # 跨行拼接: 相邻文本框拼接后再匹配日期（如 2024年 / 06月15日）
+        cross_line_config = self.config.get('cross_line', {})
+        self.cross_line = cross_line_config.get('enabled', True)
+        self.cross_line_gap = cross_line_config.get('max_gap', 1.5)
+        self.cross_line_penalty = cross_line_config.get('penalty', 0.9)
+
+        # 日期语义: 按关键词和文本框位置把日期标注为生产日期/到期日
+        semantics_config = self.config.get('date_semantics', {})
+        self.date_semantics = semantics_config.get('enabled', True)
+        self.semantics_proximity = semantics_config.get('proximity', 3.0)
+        self.date_keywords = semantics_config.get('keywords') or DEFAULT_DATE_KEYWORDS
+        self._keyword_matcher = KeywordMatcher({
+            keyword.translate(_KEYWORD_TABLE): category
+            for category, keywords in self.date_keywords.items() for keyword in keywords
+        })
         
-        # 初始化日期模式
+        # 初始化日期模式，合并编译为一个正则，每行文本只扫描一遍
         self.date_patterns = self._initialize_date_patterns()
+        self._date_regex, self._patterns_by_group = self._compile_date_patterns(self.date_patterns)
+        self._overlap_regexes = None  # 批量解析时按需编译: 除某个模式外其余模式的合并正则
+        self.tracer = get_tracer()
         
         logger.info("日期解析器初始化完成")
     
@@ -98,6 +192,71 @@ class DateParser:
         logger.debug(f"初始化了 {len(patterns)} 个日期模式")
         return patterns
     
+    def _compile_date_patterns(self, patterns: List[DatePattern]) -> Tuple[re.Pattern, Dict[str, DatePattern]]:
+        """将所有日期模式合并为一个带命名分组的正则
+
+        每个模式包在分组 p<序号> 中，按 match.lastgroup 找回命中的模式；
+        能识别出年月日片段的模式再为各片段加命名分组，匹配后直接取数字
+
+        Args:
+            patterns: 日期模式列表
+
+        Returns:
+            (编译后的正则, 分组名到日期模式的映射)
+        """
+        patterns_by_group = {}
+        for i, pattern in enumerate(patterns):
+            pattern.group = f"p{i}"
+            annotated = self._annotate_date_fields(pattern)
+            if annotated is None:
+                pattern.source = pattern.pattern
+            else:
+                pattern.source = annotated
+                pattern.field_groups = tuple(f"{pattern.group}_{field}" for field in ('year', 'month', 'day'))
+            patterns_by_group[pattern.group] = pattern
+
+        return self._compile_alternation(patterns), patterns_by_group
+
+    def _compile_alternation(self, patterns: List[DatePattern]) -> re.Pattern:
+        """将模式合并为一个正则；所有模式都以数字开头时加前瞻，非数字位置直接跳过"""
+        if not patterns:
+            return re.compile(r'(?!)')
+        source = '|'.join(f"(?P<{pattern.group}>{pattern.source})" for pattern in patterns)
+        if all(_DIGIT_TOKEN.match(pattern.pattern) for pattern in patterns):
+            source = rf"(?=\d)(?:{source})"
+        return re.compile(source)
+
+    def _annotate_date_fields(self, pattern: DatePattern) -> Optional[str]:
+        """为模式中的年月日数字片段加命名分组
+
+        支持 YYYY?MM?DD、DD?MM?YYYY（三个数字片段，年份为4位）和 \\d{8}
+
+        Returns:
+            加了分组的模式，无法识别年月日片段时返回None
+        """
+        tokens = list(_DIGIT_TOKEN.finditer(pattern.pattern))
+        prefix = pattern.group
+
+        if len(tokens) == 1 and tokens[0].group(1) == '8' and tokens[0].group(2) is None:
+            groups = [rf"(?P<{prefix}_year>\d{{4}})(?P<{prefix}_month>\d{{2}})(?P<{prefix}_day>\d{{2}})"]
+        elif len(tokens) == 3:
+            is_year = [token.group(1) == '4' and token.group(2) is None for token in tokens]
+            if is_year == [True, False, False]:
+                fields = ('year', 'month', 'day')
+            elif is_year == [False, False, True]:
+                fields = ('day', 'month', 'year')
+            else:
+                return None
+            groups = [f"(?P<{prefix}_{field}>{token.group()})" for field, token in zip(fields, tokens)]
+        else:
+            return None
+
+        # 从后往前替换，保持前面片段的位置不变
+        annotated = pattern.pattern
+        for token, group in reversed(list(zip(tokens, groups))):
+            annotated = annotated[:token.start()] + group + annotated[token.end():]
+        return annotated
+
     def _get_format_type(self, pattern: str) -> str:
         """根据模式获取格式类型"""
         if '年' in pattern and '月' in pattern and '日' in pattern:
@@ -132,14 +291,23 @@ class DateParser:
         date_infos = []
         
         try:
-            for text_result in text_results:
+            with self.tracer.span('parse'):
                 # 从单个文本中解析日期
-                dates = self._parse_single_text(text_result)
-                date_infos.extend(dates)
-            
-            # 去重和排序
-            date_infos = self._deduplicate_dates(date_infos)
-            date_infos.sort(key=lambda x: x.confidence, reverse=True)
+                line_dates = [self._parse_single_text(text_result) for text_result in text_results]
+                for dates in line_dates:
+                    date_infos.extend(dates)
+
+                # 被拆到相邻文本框中的日期
+                joined = self._join_fragments(text_results) if self.cross_line else []
+                date_infos.extend(info for _, info in joined)
+
+                # 标注生产日期/到期日，并由保质期推算到期日
+                if self.date_semantics and date_infos:
+                    date_infos.extend(self._classify_dates(text_results, line_dates, joined))
+
+                # 去重和排序
+                date_infos = self._deduplicate_dates(date_infos)
+                date_infos.sort(key=lambda x: x.confidence, reverse=True)
             
             logger.info(f"从 {len(text_results)} 个文本中解析出 {len(date_infos)} 个日期")
             return date_infos
@@ -148,55 +316,639 @@ class DateParser:
             logger.error(f"日期解析失败: {e}")
             raise DateParsingError(f"日期解析失败: {e}")
     
-    def _parse_single_text(self, text_result: TextResult) -> List[DateInfo]:
+    def parse_dates_columnar(self, image_ids: Sequence, texts: Sequence[str],
+                             confidences: Sequence[float],
+                             centers: Optional[Sequence] = None,
+                             bboxes: Optional[Sequence] = None) -> Dict[str, np.ndarray]:
+        """批量解析列式存储的OCR文本（用于按新规则重新解析归档结果）
+
+        所有文本拼接后用合并正则扫描一遍，年月日在NumPy中整体校验，
+        不为每行创建 TextResult/DateInfo。结果与逐张调用 parse_dates_from_text 一致:
+        同一图片的相同日期只保留置信度最高的一条，图片内按置信度从高到低排列。
+
+        Args:
+            image_ids: 每行文本所属的图片标识（一张图片的多行文本共用一个标识）
+            texts: 文本列
+            confidences: OCR置信度列
+            centers: 文本中心点列，形状为 (N, 2)，可选
+            bboxes: 文本边界框列，每项为4个顶点，提供时拼接相邻文本框中被拆开的日期
+
+        Returns:
+            列式结果字典: image_id, line(输入行号), date(datetime64[D]), confidence,
+            format_type, original_text，提供 centers 时还包含 position
+            （跨行拼接的日期位置取第一个片段的中心点）
+            不做日期语义标注（生产日期/到期日）和保质期推算
+        """
+        with self.tracer.span('parse', mode='columnar'):
+            return self._parse_dates_columnar(image_ids, texts, confidences, centers, bboxes)
+
+    def _parse_dates_columnar(self, image_ids, texts, confidences, centers, bboxes) -> Dict[str, np.ndarray]:
+        image_ids = np.asarray(image_ids)
+        confidences = np.asarray(confidences, dtype=np.float64)
+        texts = ['' if text is None else str(text) for text in texts]
+        line_count = len(texts)
+        if not (len(image_ids) == len(confidences) == line_count):
+            raise DateParsingError("image_ids、texts、confidences 长度不一致")
+
+        # 拼接为一个字符串，换行符分隔；匹配位置按各行起点二分查找所在行
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=line_count)
+        line_starts = np.cumsum(lengths + 1) - (lengths + 1)
+        joined = '\n'.join(texts)
+        normalized = joined if joined.isascii() else _WIDE_CHAR.sub(
+            lambda match: match.group().translate(_WIDTH_TABLE), joined)
+
+        # 单遍扫描只收集匹配文本和年月日字符串，校验在NumPy中进行
+        # 分组名 -> (模式序号, 模式, 需要读取的分组)
+        entries = {
+            pattern.group: (index, pattern, (0,) + pattern.field_groups if pattern.field_groups else None)
+            for index, pattern in enumerate(self.date_patterns)
+        }
+        spans, pattern_indices, values = [], [], []
+        for match in self._date_regex.finditer(normalized):
+            index, pattern, groups = entries[match.lastgroup]
+            spans.append(match.span())
+            pattern_indices.append(index)
+            if groups is not None:
+                values.append(match.group(*groups))
+            else:
+                # 无法直接读取年月日的模式用原解析函数，解析失败记为无效月份
+                parsed_date = self._parse_date_by_pattern(match.group(), pattern)
+                values.append((match.group(),) + tuple((parsed_date or '0-0-0').split('-')))
+
+        spans = np.asarray(spans, dtype=np.int64).reshape(-1, 2)
+        pattern_indices = np.asarray(pattern_indices, dtype=np.int64)
+        values = np.asarray(values, dtype=object).reshape(-1, 4)
+        lines = np.searchsorted(line_starts, spans[:, 0], side='right') - 1
+        matched = values[:, 0]
+        year, month, day = values[:, 1:].astype(np.int64).T
+
+        # 日期校验: 月份范围、当月天数、年份范围（原解析函数的结果已自行校验年份）
+        months = ((year - 1970) * 12 + np.clip(month, 1, 12) - 1).astype('datetime64[M]')
+        month_days = ((months + 1).astype('datetime64[D]') - months.astype('datetime64[D]')).astype(np.int64)
+        valid = (month >= 1) & (month <= 12) & (day >= 1) & (day <= month_days)
+        if self.strict_validation:
+            has_fields = np.array([p.field_groups is not None for p in self.date_patterns], dtype=bool)
+            in_range = (year >= self.year_range[0]) & (year <= self.year_range[1])
+            valid &= in_range | ~has_fields[pattern_indices]
+        dates = months.astype('datetime64[D]') + (day - 1)
+
+        # 以下两类行逐行重新解析:
+        # 无效匹配内部可能还有其他模式的日期（逐行解析时会继续查找）；含OCR易混字符、可能需要纠正
+        fallback_lines = self._find_overlap_lines(normalized, spans, pattern_indices, lines,
+                                                  np.flatnonzero(~valid), line_starts + lengths)
+        if self.ocr_correction:
+            hint_starts = np.fromiter((match.start() for match in _CONFUSION_HINT.finditer(normalized)),
+                                      dtype=np.int64)
+            fallback_lines.update((np.searchsorted(line_starts, hint_starts, side='right') - 1).tolist())
+        keep = valid
+        if fallback_lines:
+            keep = valid & ~np.isin(lines, np.fromiter(fallback_lines, dtype=np.int64, count=len(fallback_lines)))
+
+        weights = np.array([p.weight for p in self.date_patterns], dtype=np.float64)
+        format_types = np.array([p.format_type for p in self.date_patterns], dtype=object)
+        kept_spans = spans[keep]
+        if normalized is not joined:
+            matched_original = np.array([joined[start:end] for start, end in kept_spans.tolist()], dtype=object)
+        else:
+            matched_original = matched[keep]
+        result_lines = [lines[keep]]
+        result_dates = [dates[keep]]
+        result_confidences = [np.minimum(
+            confidences[lines[keep]] * weights[pattern_indices[keep]] * self._text_quality_columnar(matched[keep]),
+            1.0
+        )]
+        result_texts = [matched_original]
+        result_types = [format_types[pattern_indices[keep]]]
+
+        extra = [(line, info)
+                 for line in sorted(fallback_lines)
+                 for info in self._parse_single_text(
+                     TextResult(text=texts[line], confidence=float(confidences[line]), bbox=[]))]
+        if bboxes is not None and self.cross_line:
+            extra.extend(self._join_fragments_columnar(image_ids, texts, confidences, bboxes,
+                                                       normalized, line_starts))
+        if extra:
+            result_lines.append(np.array([line for line, _ in extra], dtype=np.int64))
+            result_dates.append(np.array([info.parsed_date for _, info in extra], dtype='datetime64[D]'))
+            result_confidences.append(np.array([info.confidence for _, info in extra], dtype=np.float64))
+            result_texts.append(np.array([info.original_text for _, info in extra], dtype=object))
+            result_types.append(np.array([info.format_type for _, info in extra], dtype=object))
+
+        lines = np.concatenate(result_lines).astype(np.int64)
+        dates = np.concatenate(result_dates).astype('datetime64[D]')
+        confidence = np.concatenate(result_confidences)
+        original_texts = np.concatenate(result_texts)
+        format_types = np.concatenate(result_types)
+
+        # 去重: 同一图片的相同日期保留置信度最高（相同时保留靠前）的一条
+        _, first_index, image_codes = np.unique(image_ids, return_index=True, return_inverse=True)
+        image_order = np.argsort(np.argsort(first_index))[image_codes.reshape(-1)][lines]
+        day_numbers = dates.astype(np.int64)
+        order = np.lexsort((lines, -confidence, day_numbers, image_order))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = (image_order[order][1:] != image_order[order][:-1]) | \
+                    (day_numbers[order][1:] != day_numbers[order][:-1])
+        selected = order[first]
+        selected = selected[np.lexsort((lines[selected], -confidence[selected], image_order[selected]))]
+
+        result = {
+            'image_id': image_ids[lines[selected]],
+            'line': lines[selected],
+            'date': dates[selected],
+            'confidence': confidence[selected],
+            'format_type': format_types[selected],
+            'original_text': original_texts[selected]
+        }
+        if centers is not None:
+            result['position'] = np.asarray(centers)[lines[selected]]
+        return result
+
+    def _join_fragments_columnar(self, image_ids: np.ndarray, texts: List[str], confidences: np.ndarray,
+                                 bboxes: Sequence, normalized: str,
+                                 line_starts: np.ndarray) -> List[Tuple[int, DateInfo]]:
+        """批量解析时的跨行拼接: 只对可能是日期片段的行按图片分组后拼接
+
+        Returns:
+            (首个片段的行号, 日期信息) 列表
+        """
+        edge_starts = np.fromiter((match.start() for match in _FRAGMENT_EDGE.finditer(normalized)),
+                                  dtype=np.int64)
+        candidate_lines = np.unique(np.searchsorted(line_starts, edge_starts, side='right') - 1)
+        if len(candidate_lines) < 2:
+            return []
+
+        _, codes = np.unique(image_ids[candidate_lines], return_inverse=True)
+        codes = codes.reshape(-1)
+        order = np.argsort(codes, kind='stable')
+        splits = np.flatnonzero(np.diff(codes[order])) + 1
+
+        results = []
+        for group in np.split(candidate_lines[order], splits):
+            if len(group) < 2:
+                continue
+            group = group.tolist()
+            text_results = [
+                TextResult(text=texts[line], confidence=float(confidences[line]),
+                           bbox=np.asarray(bboxes[line]).tolist())
+                for line in group
+            ]
+            results.extend((group[index], info) for index, info in self._join_fragments(text_results))
+        return results
+
+    def _find_overlap_lines(self, joined: str, spans: np.ndarray, pattern_indices: np.ndarray,
+                            lines: np.ndarray, invalid: np.ndarray, line_ends: np.ndarray) -> set:
+        """找出无效匹配范围内还能匹配到其他模式的行
+
+        逐行解析在无效匹配后从下一个字符继续查找（同一模式被屏蔽到匹配结束），
+        只有其他模式在无效匹配内部起始时结果才与单遍扫描不同
+        """
+        if len(invalid) == 0 or len(self.date_patterns) < 2:
+            return set()
+        if self._overlap_regexes is None:
+            self._overlap_regexes = [
+                self._compile_alternation([p for p in self.date_patterns if p is not pattern])
+                for pattern in self.date_patterns
+            ]
+
+        overlap_lines = set()
+        for index in invalid.tolist():
+            line = int(lines[index])
+            if line in overlap_lines:
+                continue
+            start, end = spans[index]
+            match = self._overlap_regexes[pattern_indices[index]].search(joined, start + 1, line_ends[line])
+            if match is not None and match.start() < end:
+                overlap_lines.add(line)
+        return overlap_lines
+
+    def _text_quality_columnar(self, texts: np.ndarray) -> np.ndarray:
+        """向量化的 _assess_text_quality"""
+        if len(texts) == 0:
+            return np.ones(0, dtype=np.float64)
+        texts = texts.astype(str)
+        lengths = np.char.str_len(texts)
+        quality = np.ones(len(texts), dtype=np.float64)
+        quality[lengths < 6] *= 0.8
+        quality[lengths > 15] *= 0.9
+
+        digits = sum(np.char.count(texts, digit) for digit in _DIGIT_CHARS)
+        quality[digits / np.maximum(lengths, 1) < 0.5] *= 0.8
+
+        has_special = np.zeros(len(texts), dtype=bool)
+        for char in _SPECIAL_CHARS:
+            has_special |= np.char.find(texts, char) >= 0
+        quality[has_special] *= 0.7
+        return quality
+
+    def _parse_single_text(self, text_result: TextResult,
+                           boundaries: Tuple[int, ...] = ()) -> List[DateInfo]:
         """从单个文本中解析日期
         
         Args:
             text_result: 单个文本结果
+            boundaries: 拼接文本中各片段的分界位置，指定时只保留跨越所有分界的日期
             
         Returns:
             解析出的日期信息列表
         """
         date_infos = []
+        position = None
         text = text_result.text
-        
-        for pattern in self.date_patterns:
-            try:
-                # 使用正则表达式查找匹配
-                matches = re.finditer(pattern.pattern, text)
-                
-                for match in matches:
-                    matched_text = match.group()
-                    
-                    # 解析日期
-                    parsed_date = self._parse_date_by_pattern(matched_text, pattern)
-                    
-                    if parsed_date:
-                        # 计算置信度
-                        confidence = self._calculate_confidence(
-                            text_result.confidence, pattern.weight, matched_text
-                        )
-                        
-                        # 获取位置
-                        position = text_result.get_center_point()
-                        
-                        date_info = DateInfo(
-                            original_text=matched_text,
-                            parsed_date=parsed_date,
-                            confidence=confidence,
-                            format_type=pattern.format_type,
-                            position=position
-                        )
-                        
-                        date_infos.append(date_info)
-                        logger.debug(f"解析日期: {matched_text} -> {parsed_date}")
-                        
-            except Exception as e:
-                logger.warning(f"模式 {pattern.pattern} 解析失败: {e}")
+
+        # 依次尝试规范化后的候选文本，取第一个能解析出日期的
+        for candidate, corrected in self._normalization_candidates(text):
+            extracted = self._extract_dates(candidate)
+            if boundaries:
+                extracted = [item for item in extracted
+                             if item[0] < boundaries[0] and item[1] > boundaries[-1]]
+            for start, end, parsed_date, pattern in extracted:
+                matched_text = candidate[start:end]
+
+                # 计算置信度，每个纠正过的字符降低一次
+                confidence = self._calculate_confidence(
+                    text_result.confidence, pattern.weight, matched_text
+                )
+                substitutions = sum(1 for index in corrected if start <= index < end)
+                if substitutions:
+                    confidence *= self.correction_penalty ** substitutions
+
+                # 获取位置
+                if position is None:
+                    position = text_result.get_center_point()
+
+                date_info = DateInfo(
+                    original_text=text[start:end],
+                    parsed_date=parsed_date,
+                    confidence=confidence,
+                    format_type=pattern.format_type,
+                    position=position
+                )
+
+                date_infos.append(date_info)
+                logger.debug(f"解析日期: {text[start:end]} -> {parsed_date}")
+
+            if extracted:
+                break
+
+        return date_infos
+
+    def _join_fragments(self, text_results: List[TextResult]) -> List[Tuple[int, DateInfo]]:
+        """拼接空间上相邻的文本框，解析被拆开的日期
+
+        只有以数字/分隔符结尾的文本框与其右侧同一行、或正下方以数字/分隔符开头的文本框拼接，
+        最多拼接三段。邻居按左边界、上边界排序后二分查找，O(n log n)
+
+        Args:
+            text_results: 同一张图片的OCR文本结果
+
+        Returns:
+            (首个片段在输入中的序号, 日期信息) 列表，只包含跨越片段分界的日期
+        """
+        fragments = []
+        for index, text_result in enumerate(text_results):
+            if not text_result.bbox or len(text_result.bbox) < 4:
                 continue
-        
+            text = text_result.text if text_result.text.isascii() else text_result.text.translate(_WIDTH_TABLE)
+            head, tail = bool(_FRAGMENT_HEAD.search(text)), bool(_FRAGMENT_TAIL.search(text))
+            if head or tail:
+                xs = [point[0] for point in text_result.bbox]
+                ys = [point[1] for point in text_result.bbox]
+                fragments.append((min(xs), min(ys), max(xs), max(ys), head, tail, index))
+        if len(fragments) < 2:
+            return []
+
+        by_left = sorted(range(len(fragments)), key=lambda i: fragments[i][0])
+        lefts = [fragments[i][0] for i in by_left]
+        by_top = sorted(range(len(fragments)), key=lambda i: fragments[i][1])
+        tops = [fragments[i][1] for i in by_top]
+
+        successors = [[] for _ in fragments]
+        for i, (x0, y0, x1, y1, _, tail, _) in enumerate(fragments):
+            if not tail:
+                continue
+            height = max(y1 - y0, 1)
+            # 同一行右侧: 左边界在本框右边界附近，且垂直方向重叠过半
+            lo = bisect_left(lefts, x1 - 0.5 * height)
+            hi = bisect_right(lefts, x1 + self.cross_line_gap * height)
+            for j in by_left[lo:hi]:
+                bx0, by0, bx1, by1, head = fragments[j][:5]
+                overlap = min(y1, by1) - max(y0, by0)
+                if j != i and head and overlap >= 0.5 * min(height, max(by1 - by0, 1)):
+                    successors[i].append(j)
+            # 下一行: 上边界在本框下边界附近，且水平方向有重叠
+            lo = bisect_left(tops, y1 - 0.5 * height)
+            hi = bisect_right(tops, y1 + self.cross_line_gap * height)
+            for j in by_top[lo:hi]:
+                bx0, by0, bx1, by1, head = fragments[j][:5]
+                if j != i and head and min(x1, bx1) > max(x0, bx0) and j not in successors[i]:
+                    successors[i].append(j)
+
+        results = []
+        for i, following in enumerate(successors):
+            for j in following:
+                joined = self._parse_joined(text_results, [fragments[i], fragments[j]])
+                if not joined:
+                    joined = [info for k in successors[j] if k != i
+                              for info in self._parse_joined(text_results, [fragments[i], fragments[j], fragments[k]])]
+                results.extend((fragments[i][6], info) for info in joined)
+        return results
+
+    def _parse_joined(self, text_results: List[TextResult], parts: List[Tuple]) -> List[DateInfo]:
+        """解析按顺序拼接的若干片段，置信度取各片段最低值并乘以拼接折扣"""
+        members = [text_results[part[6]] for part in parts]
+        boundaries = []
+        length = 0
+        for member in members[:-1]:
+            length += len(member.text)
+            boundaries.append(length)
+
+        x0, y0 = min(part[0] for part in parts), min(part[1] for part in parts)
+        x1, y1 = max(part[2] for part in parts), max(part[3] for part in parts)
+        merged = TextResult(
+            text=''.join(member.text for member in members),
+            confidence=min(member.confidence for member in members),
+            bbox=[[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+        )
+        date_infos = self._parse_single_text(merged, tuple(boundaries))
+        for date_info in date_infos:
+            date_info.confidence *= self.cross_line_penalty
+            date_info.format_type = f"{date_info.format_type}_JOINED"
         return date_infos
-    
+
+    def _classify_dates(self, text_results: List[TextResult], line_dates: List[List[DateInfo]],
+                        joined: List[Tuple[int, DateInfo]]) -> List[DateInfo]:
+        """按关键词标注日期语义（就地修改 date_type），并由保质期时长推算到期日
+
+        所有文本用 Aho-Corasick 自动机扫描一遍找出关键词。每个日期依次取:
+        同一行中前面最近的关键词、紧跟在日期后面的关键词、左侧或上方邻近的只有关键词的文本框。
+        没有标注为到期日的日期、但有生产日期和“保质期12个月”之类的时长时，推算出到期日
+
+        Args:
+            text_results: 同一张图片的OCR文本结果
+            line_dates: 每个文本中解析出的日期（与 text_results 一一对应）
+            joined: 跨行拼接得到的 (首个片段序号, 日期信息) 列表
+
+        Returns:
+            推算出的到期日列表（可能为空）
+        """
+        lines = []        # 每行: (关键词列表, 各关键词结束位置)，不含后接时长的保质期关键词
+        anchors = []      # 日期在其他文本框中的关键词行: (行号, 类别)
+        shelf_lives = []  # (行号, 起始位置, 结束位置, 数量, 单位)
+        for index, text_result in enumerate(text_results):
+            text = text_result.text.translate(_KEYWORD_TABLE)
+            keywords = []
+            for start, end, keyword, category in self._keyword_matcher.find_all(text):
+                if category == 'shelf_life':
+                    duration = _SHELF_LIFE.match(text, end)
+                    if duration:
+                        shelf_lives.append((index, start, duration.end(),
+                                            int(duration.group(1)), duration.group(2)))
+                        continue
+                keywords.append((start, end, category))
+            lines.append((keywords, [keyword[1] for keyword in keywords]))
+
+        # 行内标注: 同一行的日期按出现顺序定位
+        pending = []
+        for index, dates in enumerate(line_dates):
+            keywords, ends = lines[index]
+            text = text_results[index].text
+            offset = 0
+            last_end = -1
+            for date_info in dates:
+                start = text.find(date_info.original_text, offset)
+                if start < 0:
+                    start = offset
+                end = start + len(date_info.original_text)
+                offset, last_end = start + 1, max(last_end, end)
+                date_info.date_type = self._label_from_keywords(text, keywords, ends, start, end)
+                if date_info.date_type == 'unknown':
+                    pending.append((index, date_info))
+            # 日期之后（且没有紧跟日期）的关键词，标注的是其他文本框中的日期
+            if keywords and (last_end < 0 or (keywords[-1][0] >= last_end and
+                                              text[last_end:keywords[-1][0]].strip(' :：()（）'))):
+                anchors.append((index, keywords[-1][2]))
+        for index, date_info in joined:
+            keywords, ends = lines[index]
+            text = text_results[index].text
+            start = self._joined_start(text, date_info.original_text)
+            date_info.date_type = self._label_from_keywords(text, keywords, ends, start, len(text))
+            if date_info.date_type == 'unknown':
+                pending.append((index, date_info))
+
+        # 位置标注: 关键词与日期在不同文本框中（如“生产日期”在日期左侧或上方）
+        if anchors:
+            for index, date_info in pending:
+                label = self._nearest_anchor(text_results, anchors, index)
+                if label:
+                    date_info.date_type = label
+
+        return self._derive_expiry_dates(text_results, line_dates, joined, shelf_lives)
+
+    @staticmethod
+    def _label_from_keywords(text: str, keywords: List[Tuple[int, int, str]], ends: List[int],
+                             start: int, end: int) -> str:
+        """根据同一行中的关键词标注日期: 前面最近的关键词优先，其次是紧跟在日期后的关键词"""
+        position = bisect_right(ends, start)
+        if position > 0:
+            category = keywords[position - 1][2]
+            return 'production' if category == 'production' else 'expiry'
+        if position < len(keywords):
+            following = keywords[position]
+            if following[2] != 'shelf_life' and not text[end:following[0]].strip(' :：()（）'):
+                return following[2]
+        return 'unknown'
+
+    @staticmethod
+    def _joined_start(text: str, original_text: str) -> int:
+        """跨行拼接的日期在首个片段中的起始位置（日期覆盖片段末尾）"""
+        for start in range(max(0, len(text) - len(original_text)), len(text)):
+            if original_text.startswith(text[start:]):
+                return start
+        return len(text)
+
+    def _nearest_anchor(self, text_results: List[TextResult], anchors: List[Tuple[int, str]],
+                        index: int) -> Optional[str]:
+        """查找日期所在文本框左侧同一行或上方邻近的关键词文本框，返回其标注"""
+        box = self._bbox_extent(text_results[index])
+        if box is None:
+            return None
+        x0, y0, x1, y1 = box
+        limit = self.semantics_proximity * max(y1 - y0, 1)
+
+        best, best_distance = None, None
+        for anchor_index, category in anchors:
+            anchor_box = self._bbox_extent(text_results[anchor_index])
+            if anchor_box is None or anchor_index == index:
+                continue
+            ax0, ay0, ax1, ay1 = anchor_box
+            vertical_overlap = min(y1, ay1) - max(y0, ay0)
+            if vertical_overlap >= 0.5 * min(y1 - y0, ay1 - ay0) and ax0 < x0:
+                # 同一行左侧
+                distance = max(0, x0 - ax1)
+            elif ay1 <= y0 + 0.5 * (y1 - y0) and (min(x1, ax1) > max(x0, ax0) or abs(ax0 - x0) <= limit):
+                # 上方，水平方向重叠或左对齐
+                distance = max(0, y0 - ay1)
+            else:
+                continue
+            if distance <= limit and (best_distance is None or distance < best_distance):
+                best, best_distance = category, distance
+        if best is None:
+            return None
+        return 'production' if best == 'production' else 'expiry'
+
+    @staticmethod
+    def _bbox_extent(text_result: TextResult) -> Optional[Tuple[int, int, int, int]]:
+        if not text_result.bbox or len(text_result.bbox) < 4:
+            return None
+        xs = [point[0] for point in text_result.bbox]
+        ys = [point[1] for point in text_result.bbox]
+        return min(xs), min(ys), max(xs), max(ys)
+
+    def _derive_expiry_dates(self, text_results: List[TextResult], line_dates: List[List[DateInfo]],
+                             joined: List[Tuple[int, DateInfo]],
+                             shelf_lives: List[Tuple]) -> List[DateInfo]:
+        """没有标注为到期日的日期时，用置信度最高的生产日期加保质期时长推算到期日"""
+        if not shelf_lives:
+            return []
+        date_infos = [info for dates in line_dates for info in dates] + [info for _, info in joined]
+        if any(info.date_type == 'expiry' for info in date_infos):
+            return []
+        productions = [info for info in date_infos if info.date_type == 'production']
+        if not productions:
+            return []
+        production = max(productions, key=lambda info: info.confidence)
+
+        index, start, end, amount, unit = shelf_lives[0]
+        expiry = self._add_shelf_life(production.parsed_date, amount, unit)
+        if expiry is None:
+            return []
+        text_result = text_results[index]
+        derived = DateInfo(
+            original_text=text_result.text[start:end],
+            parsed_date=expiry,
+            confidence=min(production.confidence, text_result.confidence),
+            format_type='DERIVED',
+            position=text_result.get_center_point(),
+            date_type='expiry'
+        )
+        logger.debug(f"推算到期日: {production.parsed_date} + {derived.original_text} -> {expiry}")
+        return [derived]
+
+    def _add_shelf_life(self, date_str: str, amount: int, unit: str) -> Optional[str]:
+        """日期加保质期时长，按月/年计算时日期超出当月天数的取当月最后一天"""
+        try:
+            base = datetime.strptime(date_str, '%Y-%m-%d').date()
+        except ValueError:
+            return None
+        if unit in ('天', '日') or unit.startswith('day'):
+            try:
+                result = base + timedelta(days=amount)
+            except OverflowError:
+                return None
+            return self._format_date(result.year, result.month, result.day)
+
+        months = amount * 12 if unit == '年' or unit.startswith('year') else amount
+        year, month = divmod(base.month - 1 + months, 12)
+        year += base.year
+        month += 1
+        if year > 9999:
+            return None
+        return self._format_date(year, month, min(base.day, monthrange(year, month)[1]))
+
+    def _normalization_candidates(self, text: str) -> List[Tuple[str, Tuple[int, ...]]]:
+        """生成规范化后的候选文本
+
+        全角字符统一转为半角；数字串中的易混字符（如 2O24.O6.1S）替换为数字，
+        有多种可能的字符按组合展开，候选数不超过 max_candidates。
+        所有替换都是逐字符的，候选文本与原文本位置一一对应
+
+        Args:
+            text: 原始文本
+
+        Returns:
+            (候选文本, 纠正过的字符位置) 列表，按可能性从高到低排列
+        """
+        normalized = text if text.isascii() else text.translate(_WIDTH_TABLE)
+        if not self.ocr_correction or not _CONFUSION_HINT.search(normalized):
+            return [(normalized, ())]
+
+        # 每个易混字符的可选替换，第一项为首选
+        options_by_index = {}
+        for run in _CONFUSION_RUN.finditer(normalized):
+            segment = run.group()
+            positions = [run.start() + i for i, char in enumerate(segment) if char in OCR_CONFUSIONS]
+            digits = sum(char.isdigit() for char in segment)
+            # 数字太少或易混字符多于数字时不像日期，保持原样
+            if not positions or digits < 3 or len(positions) > digits:
+                continue
+            for index in positions:
+                char = normalized[index]
+                options = OCR_CONFUSIONS[char]
+                if index == run.start() and index > 0 and normalized[index - 1].isalpha():
+                    # 紧跟在文字后的开头字符（如 MFG2024 的 G）更可能是文字本身
+                    options = char + options
+                elif index == run.end() - 1 and run.end() < len(normalized) and normalized[run.end()].isalpha():
+                    options = options + char
+                options_by_index[index] = options
+
+        if not options_by_index:
+            return [(normalized, ())]
+
+        indices = list(options_by_index)
+        chars = list(normalized)
+        candidates = []
+        # 按组合展开，第一个组合全部使用首选替换
+        for combination in islice(product(*options_by_index.values()), self.max_candidates):
+            for index, char in zip(indices, combination):
+                chars[index] = char
+            corrected = tuple(index for index in indices if chars[index] != normalized[index])
+            candidates.append((''.join(chars), corrected))
+        return candidates
+
+    def _extract_dates(self, text: str) -> List[Tuple[int, int, str, DatePattern]]:
+        """用合并后的正则单遍扫描文本，提取其中的日期
+
+        某个位置的匹配不是有效日期时从下一个字符继续扫描，其他模式仍有机会
+        匹配与之重叠的文本；有效日期之间不重叠，靠前的优先
+
+        Args:
+            text: 文本
+
+        Returns:
+            (起始位置, 结束位置, 标准化日期, 命中的模式) 列表
+        """
+        results = []
+        search = self._date_regex.search
+        blocked = {}  # 分组名 -> 该模式上一次无效匹配的结束位置
+        pos = 0
+        while True:
+            match = search(text, pos)
+            if match is None:
+                break
+            start, end = match.span()
+            group = match.lastgroup
+            if start < blocked.get(group, 0):
+                # 与同一模式的上一次匹配重叠，逐个模式扫描时不会出现
+                pos = start + 1
+                continue
+
+            pattern = self._patterns_by_group[group]
+            parsed_date = self._parse_match(match, pattern)
+            if parsed_date:
+                results.append((start, end, parsed_date, pattern))
+                pos = max(end, start + 1)
+            else:
+                blocked[group] = end
+                pos = start + 1
+        return results
+
+    def _parse_match(self, match: re.Match, pattern: DatePattern) -> Optional[str]:
+        """从合并正则的匹配结果中解析日期，优先直接读取年月日分组"""
+        if pattern.field_groups is None:
+            return self._parse_date_by_pattern(match.group(), pattern)
+        year, month, day = match.group(*pattern.field_groups)
+        return self._format_date(int(year), int(month), int(day))
+
     def _parse_date_by_pattern(self, text: str, pattern: DatePattern) -> Optional[str]:
         """根据模式解析日期
         
@@ -308,7 +1060,7 @@ class DateParser:
         """
         try:
             # 验证日期有效性
-            date_obj = date(year, month, day)
+            date(year, month, day)
             
             # 检查年份范围
             if not (self.year_range[0] <= year <= self.year_range[1]):
@@ -317,7 +1069,7 @@ class DateParser:
                 else:
                     logger.warning(f"日期年份超出范围: {year}")
             
-            return date_obj.strftime('%Y-%m-%d')
+            return f"{year:04d}-{month:02d}-{day:02d}"
             
         except ValueError:
             return None
@@ -368,7 +1120,7 @@ class DateParser:
             quality *= 0.8
         
         # 特殊字符检查
-        if any(c in text for c in '!@#$%^&*()'):
+        if any(c in text for c in _SPECIAL_CHARS):
             quality *= 0.7
         
         return quality
@@ -392,14 +1144,19 @@ class DateParser:
                 seen_dates[date_key] = date_info
                 unique_dates.append(date_info)
             else:
-                # 保留置信度更高的
+                # 保留置信度更高的，未标注语义时沿用另一条的标注
+                existing_type = seen_dates[date_key].date_type
                 if date_info.confidence > seen_dates[date_key].confidence:
+                    if date_info.date_type == 'unknown':
+                        date_info.date_type = existing_type
                     # 替换原有的
                     for i, existing in enumerate(unique_dates):
                         if existing.parsed_date == date_key:
                             unique_dates[i] = date_info
                             break
                     seen_dates[date_key] = date_info
+                elif existing_type == 'unknown':
+                    seen_dates[date_key].date_type = date_info.date_type
         
         return unique_dates
     
@@ -433,11 +1190,11 @@ class DateParser:
                 return date_str
             
             # 尝试解析并重新格式化
-            for pattern in self.date_patterns:
-                if re.match(pattern.pattern, date_str):
-                    parsed = self._parse_date_by_pattern(date_str, pattern)
-                    if parsed:
-                        return parsed
+            match = self._date_regex.match(date_str)
+            if match:
+                parsed = self._parse_match(match, self._patterns_by_group[match.lastgroup])
+                if parsed:
+                    return parsed
             
             # 如果无法解析，返回原字符串
             return date_str
@@ -446,6 +1203,25 @@ class DateParser:
             logger.warning(f"日期格式标准化失败: {date_str}, 错误: {e}")
             return date_str
     
+    def get_parser_fingerprint(self) -> str:
+        """获取解析器指纹（解析逻辑版本 + 影响解析结果的配置）
+        
+        Returns:
+            指纹字符串，解析逻辑或配置变化时随之变化
+        """
+        components = {
+            'version': PARSER_VERSION,
+            'year_range': list(self.year_range),
+            'strict_validation': self.strict_validation,
+            'output_format': self.output_format,
+            'ocr_correction': [self.ocr_correction, self.max_candidates, self.correction_penalty],
+            'cross_line': [self.cross_line, self.cross_line_gap, self.cross_line_penalty],
+            'date_semantics': [self.date_semantics, self.semantics_proximity, self.date_keywords],
+            'patterns': [(p.pattern, p.format_type, p.weight) for p in self.date_patterns]
+        }
+        payload = json.dumps(components, sort_keys=True, ensure_ascii=False)
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=8).hexdigest()
+    
     def get_parser_info(self) -> Dict[str, Any]:
         """获取解析器信息
         
@@ -6,17 +6,23 @@
 
 import time
 import logging
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Iterator
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import numpy as np
 
-from .models import RecognitionResult, BatchResult, create_recognition_result, create_batch_result
+from .models import (RecognitionResult, BatchResult, TextResult, RecognitionSummary,
+                     create_recognition_result, create_batch_result)
 from .image_processor import ImageProcessor, create_image_processor
 from .ocr_engine import OCREngine, create_ocr_engine
 from .date_parser import DateParser, create_date_parser
+from .image_context import ImageContext
+from .cache_manager import make_fingerprint
 from utils.config_loader import get_config
 from utils.validators import validate_image_file, validate_directory
+from utils.file_scanner import FileScanner
 from utils.logger import timing_decorator, performance_logger
+from utils.tracing import get_tracer
 
 logger = logging.getLogger(__name__)
 
@@ -32,19 +38,30 @@ class DateRecognizer:
     整合图像处理、OCR识别和日期解析功能，提供完整的日期识别服务
     """
     
-    def __init__(self, config: Optional[Dict] = None):
+    def __init__(self, config: Optional[Dict] = None, load_ocr: bool = True):
         """初始化日期识别器
         
         Args:
             config: 配置字典，如果为None则使用全局配置
+            load_ocr: 是否加载OCR引擎；为False时只能基于已有OCR结果解析日期和读写缓存
+                （OCR在其他进程中执行的场景），不加载OCR模型
         """
         self.config = config or get_config().config
         
         # 初始化各个组件
         self.image_processor = create_image_processor(self.config)
-        self.ocr_engine = create_ocr_engine(self.config)
+        if load_ocr:
+            self.ocr_engine = create_ocr_engine(self.config)
+            self.cache_manager = getattr(self.ocr_engine, 'cache_manager', None)
+        else:
+            from .optimized_paddleocr_engine import create_ocr_cache_manager
+            self.ocr_engine = None
+            self.cache_manager = create_ocr_cache_manager(self.config)
         self.date_parser = create_date_parser(self.config)
         
+        # 批量识别时每次拼接为画布一起OCR的图片数（OCR引擎支持 ocr_many 且启用 batch_ocr 时）
+        self.batch_images = max(1, self.config.get('ocr', {}).get('batch_images', 8))
+        
         # 预警配置
         warning_config = self.config.get('warning', {})
         self.enable_warnings = {
@@ -55,14 +72,24 @@ class DateRecognizer:
         }
         self.low_confidence_threshold = warning_config.get('low_confidence_threshold', 0.6)
         
+        # 识别结论版本: 解析器指纹 + 预警配置，任一变化时缓存的结论需要重新推导
+        self.result_version = make_fingerprint({
+            'parser': self.date_parser.get_parser_fingerprint(),
+            'warnings': self.enable_warnings,
+            'low_confidence_threshold': self.low_confidence_threshold
+        })
+        self.tracer = get_tracer()
+        
         logger.info("日期识别器初始化完成")
     
     @timing_decorator
-    def recognize_single(self, image_path: str) -> RecognitionResult:
+    def recognize_single(self, image_path: str,
+                         image_context: Optional[ImageContext] = None) -> RecognitionResult:
         """识别单张图片中的日期
         
         Args:
             image_path: 图片文件路径
+            image_context: 图像上下文，为None时自动创建；整个调用链共享同一份解码结果
             
         Returns:
             识别结果对象
@@ -70,19 +97,35 @@ class DateRecognizer:
         Raises:
             DateRecognitionError: 识别过程中的错误
         """
+        if self.ocr_engine is None:
+            raise DateRecognitionError("识别器未加载OCR引擎，只能解析已有的OCR结果")
+
         start_time = time.time()
         
         try:
             logger.info(f"开始识别图片: {image_path}")
             
-            # 1. 加载图像信息（但不预处理）
-            image = self.image_processor.load_image(image_path)
+            if image_context is None:
+                image_context = ImageContext(image_path)
+
+            # 0. 缓存命中时直接恢复识别结论，不解码图片（调用方已批量查询过且未命中时跳过）
+            cache_manager = self.cache_manager
+            if cache_manager is not None and not image_context.cache_checked:
+                cached_result = self._recognize_from_cache(
+                    image_path, image_context, cache_manager, start_time
+                )
+                if cached_result is not None:
+                    return cached_result
+
+            # 1. 加载图像信息（但不预处理），解码结果保存在图像上下文中
+            with self.tracer.span('load'):
+                image = self.image_processor.load_image(image_path, image_context=image_context)
             image_info = self.image_processor.get_image_info(image)
 
             # 2. OCR文本识别（直接使用原始图像路径）
             # 注意：优化OCR引擎内部已经有完善的预处理策略，
             # 不需要额外的预处理，避免破坏图像质量
-            text_results = self.ocr_engine.recognize_text(image_path)
+            text_results = self.ocr_engine.recognize_text(image_path, image_context=image_context)
             
             # 3. 日期解析
             date_infos = self.date_parser.parse_dates_from_text(text_results)
@@ -94,22 +137,167 @@ class DateRecognizer:
                 processing_time, image_info['width'], image_info['height']
             )
             
+            # 5. 识别结论与OCR文本一起缓存
+            self.cache_recognition(image_path, result, image_context=image_context)
+            
             logger.info(f"图片识别完成: {image_path}, 找到 {len(result.dates_found)} 个日期")
             return result
             
         except Exception as e:
-            processing_time = time.time() - start_time
-            logger.error(f"图片识别失败: {image_path}, 错误: {e}")
-            
-            # 创建失败结果
+            return self._failed_result(image_path, start_time, e)
+
+    def _failed_result(self, image_path: str, start_time: float, error: Exception) -> RecognitionResult:
+        """创建识别失败结果"""
+        processing_time = time.time() - start_time
+        logger.error(f"图片识别失败: {image_path}, 错误: {error}")
+        
+        result = create_recognition_result(image_path, False, processing_time)
+        result.warning_message = f"识别失败: {str(error)}"
+        
+        if self.enable_warnings['processing_error']:
+            logger.warning(f"处理错误预警: {image_path}")
+        
+        return result
+
+    def _recognize_from_cache(self, image_path: str, image_context: ImageContext,
+                              cache_manager, start_time: float) -> Optional[RecognitionResult]:
+        """从缓存恢复识别结果
+
+        Args:
+            image_path: 图片文件路径
+            image_context: 图像上下文
+            cache_manager: OCR引擎的缓存管理器
+            start_time: 识别开始时间
+
+        Returns:
+            识别结果对象，未命中缓存时返回None
+        """
+        with self.tracer.span('cache', op='get') as span:
+            cached = cache_manager.get_cached_result(image_path, image_context=image_context)
+            span.set_label('hit', bool(cached))
+        if not cached or not cached.get('ocr_results'):
+            # 已确认未命中，OCR引擎内不再重复查询
+            image_context.cache_checked = True
+            return None
+        return self.recognize_from_cached(image_path, cached, start_time, image_context)
+
+    def is_cached_result_current(self, cached: Dict[str, Any]) -> bool:
+        """缓存条目中的识别结论是否由当前解析器和预警配置生成
+
+        Args:
+            cached: 缓存管理器返回的缓存条目
+
+        Returns:
+            是否可以直接使用缓存的识别结论
+        """
+        return bool(cached.get('recognition')) and cached.get('parser_version') == self.result_version
+
+    def recognize_from_cached(self, image_path: str, cached: Dict[str, Any],
+                              start_time: Optional[float] = None,
+                              image_context: Optional[ImageContext] = None) -> RecognitionResult:
+        """基于缓存条目恢复识别结果
+
+        识别结论版本一致时直接恢复；版本不一致（解析器或预警配置已变化）时
+        用缓存的OCR文本重新解析日期并更新结论，不重新执行OCR
+
+        Args:
+            image_path: 图片文件路径
+            cached: 缓存管理器返回的缓存条目
+            start_time: 识别开始时间，None时为当前时间
+            image_context: 图像上下文，缓存中没有图片尺寸时用于获取尺寸
+
+        Returns:
+            识别结果对象
+        """
+        if start_time is None:
+            start_time = time.time()
+
+        text_results = [
+            TextResult(text=text, confidence=confidence, bbox=bbox)
+            for bbox, (text, confidence) in (cached['ocr_results'][0] or [])
+        ]
+        payload = cached.get('recognition')
+
+        if self.is_cached_result_current(cached):
+            result = RecognitionResult.from_cache_payload(
+                image_path, payload, text_results, time.time() - start_time
+            )
+            logger.info(f"识别结论缓存命中: {image_path}, 找到 {len(result.dates_found)} 个日期")
+            return result
+
+        # 解析器已变化或尚未保存结论：重新解析缓存的OCR文本
+        if payload:
+            width, height = payload['image_size']
+        else:
+            if image_context is None:
+                image_context = ImageContext(image_path)
+            width, height = image_context.size
+
+        date_infos = self.date_parser.parse_dates_from_text(text_results)
+        result = self._build_recognition_result(
+            image_path, text_results, date_infos,
+            time.time() - start_time, width, height
+        )
+        self.cache_recognition(image_path, result, image_context=image_context)
+        logger.info(f"基于缓存OCR文本重新解析: {image_path}, 找到 {len(result.dates_found)} 个日期")
+        return result
+
+    def cache_recognition(self, image_path: str, result: RecognitionResult,
+                          image_context: Optional[ImageContext] = None) -> bool:
+        """将识别结论保存到OCR结果缓存中（需已存在该图片的OCR缓存条目）
+
+        Args:
+            image_path: 图片文件路径
+            result: 识别结果
+            image_context: 图像上下文
+
+        Returns:
+            是否保存成功
+        """
+        cache_manager = self.cache_manager
+        if cache_manager is None:
+            return False
+        with self.tracer.span('cache', op='save_recognition'):
+            return cache_manager.save_recognition(
+                image_path, result.to_cache_payload(), self.result_version,
+                image_context=image_context
+            )
+
+    def recognize_from_ocr(self, image_path: str, text_results: List,
+                           processing_time: float,
+                           image_size: Tuple[int, int]) -> RecognitionResult:
+        """基于已完成的OCR结果识别日期（用于OCR在其他进程中执行的场景）
+
+        Args:
+            image_path: 图片文件路径
+            text_results: OCR文本结果列表(TextResult)
+            processing_time: OCR阶段耗时(秒)
+            image_size: 图片尺寸 (width, height)
+
+        Returns:
+            识别结果对象
+        """
+        start_time = time.time()
+
+        try:
+            date_infos = self.date_parser.parse_dates_from_text(text_results)
+            processing_time += time.time() - start_time
+
+            result = self._build_recognition_result(
+                image_path, text_results, date_infos,
+                processing_time, image_size[0], image_size[1]
+            )
+
+            logger.info(f"图片识别完成: {image_path}, 找到 {len(result.dates_found)} 个日期")
+            return result
+
+        except Exception as e:
+            logger.error(f"日期解析失败: {image_path}, 错误: {e}")
+
             result = create_recognition_result(image_path, False, processing_time)
             result.warning_message = f"识别失败: {str(e)}"
-            
-            if self.enable_warnings['processing_error']:
-                logger.warning(f"处理错误预警: {image_path}")
-            
             return result
-    
+
     def recognize_batch(self, image_paths: List[str], 
                        max_workers: int = 4) -> List[RecognitionResult]:
         """批量识别多张图片
@@ -127,22 +315,27 @@ class DateRecognizer:
             logger.info(f"开始批量识别: {len(image_paths)} 张图片")
             start_time = time.time()
             
-            # 简单的顺序处理（后续可以改为并行处理）
-            for i, image_path in enumerate(image_paths):
-                try:
-                    result = self.recognize_single(image_path)
-                    results.append(result)
-                    
-                    # 进度日志
-                    if (i + 1) % 10 == 0:
-                        logger.info(f"批量处理进度: {i + 1}/{len(image_paths)}")
+            if getattr(self.ocr_engine, 'batch_ocr', False) and hasattr(self.ocr_engine, 'ocr_many'):
+                # 多张图片拼接为画布一起OCR，未通过验收的图片由引擎单独走完整流程
+                for offset in range(0, len(image_paths), self.batch_images):
+                    results.extend(self._recognize_chunk(image_paths[offset:offset + self.batch_images]))
+                    logger.info(f"批量处理进度: {len(results)}/{len(image_paths)}")
+            else:
+                for i, image_path in enumerate(image_paths):
+                    try:
+                        result = self.recognize_single(image_path)
+                        results.append(result)
                         
-                except Exception as e:
-                    logger.error(f"批量处理中单张图片失败: {image_path}, 错误: {e}")
-                    # 创建失败结果
-                    failed_result = create_recognition_result(image_path, False)
-                    failed_result.warning_message = f"处理失败: {str(e)}"
-                    results.append(failed_result)
+                        # 进度日志
+                        if (i + 1) % 10 == 0:
+                            logger.info(f"批量处理进度: {i + 1}/{len(image_paths)}")
+                            
+                    except Exception as e:
+                        logger.error(f"批量处理中单张图片失败: {image_path}, 错误: {e}")
+                        # 创建失败结果
+                        failed_result = create_recognition_result(image_path, False)
+                        failed_result.warning_message = f"处理失败: {str(e)}"
+                        results.append(failed_result)
             
             total_time = time.time() - start_time
             success_count = sum(1 for r in results if r.success)
@@ -160,6 +353,69 @@ class DateRecognizer:
             logger.error(f"批量识别失败: {e}")
             raise DateRecognitionError(f"批量识别失败: {e}")
     
+    def _recognize_chunk(self, image_paths: List[str]) -> List[RecognitionResult]:
+        """识别一组图片：缓存命中的直接恢复，其余通过 ocr_many 一起OCR后逐张解析日期
+
+        Args:
+            image_paths: 图片文件路径列表
+
+        Returns:
+            与输入一一对应的识别结果列表
+        """
+        start_time = time.time()
+        results: List[Optional[RecognitionResult]] = [None] * len(image_paths)
+        contexts = [ImageContext(image_path) for image_path in image_paths]
+        pending = []
+        sizes = {}
+
+        for i, (image_path, image_context) in enumerate(zip(image_paths, contexts)):
+            try:
+                if self.cache_manager is not None:
+                    cached_result = self._recognize_from_cache(
+                        image_path, image_context, self.cache_manager, start_time
+                    )
+                    if cached_result is not None:
+                        results[i] = cached_result
+                        continue
+                with self.tracer.span('load'):
+                    image = self.image_processor.load_image(image_path, image_context=image_context)
+                image_info = self.image_processor.get_image_info(image)
+                sizes[i] = (image_info['width'], image_info['height'])
+                pending.append(i)
+            except Exception as e:
+                results[i] = self._failed_result(image_path, start_time, e)
+
+        if pending:
+            try:
+                outputs = self.ocr_engine.ocr_many([image_paths[i] for i in pending],
+                                                   image_contexts=[contexts[i] for i in pending])
+            except Exception as e:
+                logger.warning(f"批量OCR失败，逐张识别: {e}")
+                outputs = None
+
+            for position, i in enumerate(pending):
+                image_path = image_paths[i]
+                if outputs is None:
+                    results[i] = self.recognize_single(image_path, contexts[i])
+                    continue
+                try:
+                    text_results = [
+                        TextResult(text=text, confidence=confidence, bbox=bbox)
+                        for bbox, (text, confidence) in (outputs[position][0] if outputs[position] else [])
+                    ]
+                    date_infos = self.date_parser.parse_dates_from_text(text_results)
+                    result = self._build_recognition_result(
+                        image_path, text_results, date_infos,
+                        (time.time() - start_time) / len(image_paths), *sizes[i]
+                    )
+                    self.cache_recognition(image_path, result, image_context=contexts[i])
+                    logger.info(f"图片识别完成: {image_path}, 找到 {len(result.dates_found)} 个日期")
+                    results[i] = result
+                except Exception as e:
+                    results[i] = self._failed_result(image_path, start_time, e)
+
+        return results
+
     def recognize_folder(self, folder_path: str, 
                         recursive: bool = True,
                         file_extensions: Optional[List[str]] = None) -> BatchResult:
@@ -212,6 +468,71 @@ class DateRecognizer:
             logger.error(f"文件夹识别失败: {folder_path}, 错误: {e}")
             raise DateRecognitionError(f"文件夹识别失败: {e}")
     
+    def iter_folder(self, folder_path: str,
+                    recursive: bool = True,
+                    file_extensions: Optional[List[str]] = None,
+                    max_workers: int = 1,
+                    summary: Optional[RecognitionSummary] = None) -> Iterator[RecognitionResult]:
+        """流式识别文件夹中的图片，边扫描边识别，每完成一张即产出结果
+        
+        不预先生成完整文件列表，也不保留已产出的结果；需要最终统计时传入
+        summary，迭代过程中其计数随时可读，迭代结束后包含完整统计
+        
+        Args:
+            folder_path: 文件夹路径
+            recursive: 是否递归扫描子文件夹
+            file_extensions: 支持的文件扩展名
+            max_workers: 并行识别线程数，大于1时结果按完成顺序产出
+            summary: 累计统计对象，为None时只在日志中输出统计
+            
+        Yields:
+            识别结果对象
+            
+        Raises:
+            DateRecognitionError: 文件夹无效
+        """
+        try:
+            validate_directory(folder_path)
+        except Exception as e:
+            raise DateRecognitionError(f"文件夹识别失败: {e}")
+        
+        if summary is None:
+            summary = RecognitionSummary(folder_path)
+        
+        logger.info(f"开始流式识别文件夹: {folder_path}")
+        # 扫描与识别同时进行，先扫描到的文件先开始识别
+        image_files = self._create_scanner(file_extensions).iter_files(folder_path, recursive)
+        
+        if max_workers <= 1:
+            for image_path in image_files:
+                result = self.recognize_single(image_path)
+                summary.add(result)
+                yield result
+        else:
+            # 同时在途的任务数有上限，扫描速度快于识别时不会堆积大量待处理任务
+            max_pending = max_workers * 2
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                pending = set()
+                for image_path in image_files:
+                    pending.add(executor.submit(self.recognize_single, image_path))
+                    if len(pending) >= max_pending:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            result = future.result()
+                            summary.add(result)
+                            yield result
+                
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        result = future.result()
+                        summary.add(result)
+                        yield result
+        
+        summary.finish()
+        logger.info(f"文件夹流式识别完成: {folder_path}, 已处理 {summary.total_processed}, "
+                    f"成功率: {summary.success_rate:.2%}")
+    
     def _scan_image_files(self, folder_path: str, recursive: bool,
                          file_extensions: Optional[List[str]]) -> List[str]:
         """扫描文件夹中的图片文件
@@ -222,39 +543,21 @@ class DateRecognizer:
             file_extensions: 支持的文件扩展名
             
         Returns:
-            图片文件路径列表
+            排序后的图片文件路径列表
         """
-        if file_extensions is None:
-            file_extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp']
-        
-        # 转换为小写以便比较
-        file_extensions = [ext.lower() for ext in file_extensions]
-        
-        image_files = []
-        folder = Path(folder_path)
-        
         try:
-            if recursive:
-                # 递归扫描
-                for file_path in folder.rglob('*'):
-                    if file_path.is_file() and file_path.suffix.lower() in file_extensions:
-                        image_files.append(str(file_path))
-            else:
-                # 只扫描当前目录
-                for file_path in folder.iterdir():
-                    if file_path.is_file() and file_path.suffix.lower() in file_extensions:
-                        image_files.append(str(file_path))
-            
-            # 排序以确保一致的处理顺序
-            image_files.sort()
-            
+            image_files = self._create_scanner(file_extensions).scan(folder_path, recursive)
             logger.debug(f"扫描到 {len(image_files)} 个图片文件")
             return image_files
-            
         except Exception as e:
             logger.error(f"文件扫描失败: {folder_path}, 错误: {e}")
             return []
     
+    def _create_scanner(self, file_extensions: Optional[List[str]]) -> FileScanner:
+        """创建目录扫描器"""
+        scan_workers = self.config.get('performance', {}).get('scan_workers', 8)
+        return FileScanner(file_extensions, scan_workers)
+    
     def _build_recognition_result(self, image_path: str, text_results: List,
                                 date_infos: List, processing_time: float,
                                 width: int, height: int) -> RecognitionResult:
@@ -354,7 +657,7 @@ class DateRecognizer:
         """
         return {
             'image_processor': self.image_processor.config,
-            'ocr_engine': self.ocr_engine.get_engine_info(),
+            'ocr_engine': self.ocr_engine.get_engine_info() if self.ocr_engine is not None else None,
             'date_parser': self.date_parser.get_parser_info(),
             'warning_settings': self.enable_warnings,
             'low_confidence_threshold': self.low_confidence_threshold
@@ -364,6 +667,9 @@ class DateRecognizer:
         """预热识别器
         
         执行一次完整的识别流程来预热所有组件
+        
+        Raises:
+            Exception: OCR引擎预热失败
         """
         try:
             logger.info("开始识别器预热...")
@@ -375,23 +681,26 @@ class DateRecognizer:
             test_image[50:100, 50:350] = 0  # 黑色文本区域
             
             # 预热OCR引擎
-            self.ocr_engine.warmup(test_image)
+            if self.ocr_engine is not None:
+                self.ocr_engine.warmup(test_image)
             
             warmup_time = time.time() - start_time
             logger.info(f"识别器预热完成，耗时: {warmup_time:.3f}秒")
             
         except Exception as e:
-            logger.warning(f"识别器预热失败: {e}")
+            logger.error(f"识别器预热失败: {e}")
+            raise
 
 
 # 工厂函数
-def create_date_recognizer(config: Optional[Dict] = None) -> DateRecognizer:
+def create_date_recognizer(config: Optional[Dict] = None, load_ocr: bool = True) -> DateRecognizer:
     """创建日期识别器实例
     
     Args:
         config: 配置字典
+        load_ocr: 是否加载OCR引擎
         
     Returns:
         日期识别器实例
     """
-    return DateRecognizer(config)
+    return DateRecognizer(config, load_ocr)
@@ -25,16 +25,35 @@ class ImageAnalyzer:
             if img is None:
                 return {'error': '无法读取图片文件'}
             
+            return self.analyze_array(img, os.path.getsize(image_path))
+            
+        except Exception as e:
+            return {'error': f'图片分析失败: {e}'}
+    
+    def analyze_context(self, image_context) -> Dict:
+        """基于图像上下文分析，复用已解码的图像和灰度图"""
+        img = image_context.bgr
+        if img is None:
+            return {'error': '无法读取图片文件'}
+        return self.analyze_array(img, image_context.file_size, image_context.gray)
+    
+    def analyze_array(self, img: np.ndarray, file_size: int = 0,
+                      gray: Optional[np.ndarray] = None) -> Dict:
+        """分析已解码的图像数组（内存版本）
+        
+        Args:
+            img: BGR或灰度图像数组
+            file_size: 原始文件大小(字节)，未知时为0
+            gray: 已计算好的灰度图（可选，避免重复转换）
+        """
+        try:
             # 基本信息
             height, width = img.shape[:2]
             channels = img.shape[2] if len(img.shape) > 2 else 1
-            file_size = os.path.getsize(image_path)
             
             # 转换为灰度图
-            if channels > 1:
-                gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            else:
-                gray = img
+            if gray is None:
+                gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if channels > 1 else img
             
             # 分析结果
             analysis = {
@@ -0,0 +1,171 @@
+"""
+图像上下文模块
+
+为单次识别请求提供共享的图像上下文，图片只解码一次，
+灰度图、尺寸、文件状态和哈希等派生信息按需计算且最多计算一次
+"""
+
+import os
+import threading
+import logging
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .cache_manager import calculate_file_hash
+
+logger = logging.getLogger(__name__)
+
+
+class ImageContext:
+    """单次识别请求的图像上下文
+
+    在 recognize_single → OCR引擎 的整个调用链中传递，
+    避免各个阶段各自重新读取和解码同一张图片
+    """
+
+    def __init__(self, image_path: Optional[str] = None,
+                 image: Optional[np.ndarray] = None):
+        """初始化图像上下文
+
+        Args:
+            image_path: 图片文件路径
+            image: 已解码的BGR图像数组（可选，提供时不再从文件解码）
+        """
+        if image_path is None and image is None:
+            raise ValueError("image_path和image不能同时为空")
+
+        self.image_path = image_path
+        self._bgr = image
+        self._gray = None
+        self._stat = None
+        self._file_hash = None
+        self._decode_failed = False
+        self._lock = threading.RLock()
+        # 调用方已查询过OCR缓存且未命中，OCR引擎不再重复查询
+        self.cache_checked = False
+
+    @classmethod
+    def from_array(cls, image: np.ndarray, image_path: Optional[str] = None) -> 'ImageContext':
+        """从已解码的图像数组创建上下文"""
+        return cls(image_path=image_path, image=image)
+
+    @property
+    def bgr(self) -> Optional[np.ndarray]:
+        """BGR图像数组，首次访问时解码，解码失败返回None"""
+        if self._bgr is None and not self._decode_failed:
+            with self._lock:
+                if self._bgr is None and not self._decode_failed:
+                    self._bgr = self._decode()
+                    self._decode_failed = self._bgr is None
+        return self._bgr
+
+    @property
+    def gray(self) -> Optional[np.ndarray]:
+        """灰度图像数组"""
+        if self._gray is None:
+            with self._lock:
+                if self._gray is None:
+                    img = self.bgr
+                    if img is None:
+                        return None
+                    if len(img.shape) == 3:
+                        self._gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+                    else:
+                        self._gray = img
+        return self._gray
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """图片尺寸 (width, height)，无法解码时为 (0, 0)"""
+        img = self.bgr
+        if img is None:
+            return (0, 0)
+        height, width = img.shape[:2]
+        return (width, height)
+
+    @property
+    def width(self) -> int:
+        return self.size[0]
+
+    @property
+    def height(self) -> int:
+        return self.size[1]
+
+    @property
+    def stat(self) -> Optional[os.stat_result]:
+        """文件状态信息，内存图像返回None"""
+        if self._stat is None and self.image_path:
+            with self._lock:
+                if self._stat is None:
+                    self._stat = os.stat(self.image_path)
+        return self._stat
+
+    @property
+    def file_size(self) -> int:
+        """文件大小(字节)，内存图像返回0"""
+        file_stat = self.stat
+        return file_stat.st_size if file_stat else 0
+
+    @property
+    def file_hash(self) -> Optional[str]:
+        """文件内容哈希，内存图像或计算失败时返回None"""
+        if self._file_hash is None and self.image_path:
+            with self._lock:
+                if self._file_hash is None:
+                    self._file_hash = calculate_file_hash(self.image_path, self.file_size)
+        return self._file_hash
+
+    @property
+    def has_file_hash(self) -> bool:
+        """文件哈希是否已经计算"""
+        return self._file_hash is not None
+
+    def seed_file_hash(self, file_hash: str):
+        """设置已知的文件哈希（如缓存管理器通过文件状态索引得到的哈希），避免重复计算"""
+        with self._lock:
+            if self._file_hash is None:
+                self._file_hash = file_hash
+
+    @property
+    def is_decoded(self) -> bool:
+        """图像是否已经解码"""
+        return self._bgr is not None
+
+    def _decode(self) -> Optional[np.ndarray]:
+        """解码图片文件（支持中文路径，OpenCV失败时回退到PIL）"""
+        try:
+            data = np.fromfile(self.image_path, dtype=np.uint8)
+            image = cv2.imdecode(data, cv2.IMREAD_COLOR)
+            if image is not None:
+                return image
+        except Exception as e:
+            logger.debug(f"OpenCV解码失败: {self.image_path}, 错误: {e}")
+
+        try:
+            from PIL import Image
+            with Image.open(self.image_path) as pil_image:
+                if pil_image.mode != 'RGB':
+                    pil_image = pil_image.convert('RGB')
+                return cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+        except Exception as e:
+            logger.warning(f"无法解码图片: {self.image_path}, 错误: {e}")
+            return None
+
+    def __repr__(self) -> str:
+        return f"ImageContext(path={self.image_path!r}, decoded={self.is_decoded})"
+
+
+def create_image_context(image_path: Optional[str] = None,
+                         image: Optional[np.ndarray] = None) -> ImageContext:
+    """创建图像上下文实例
+
+    Args:
+        image_path: 图片文件路径
+        image: 已解码的图像数组
+
+    Returns:
+        图像上下文实例
+    """
+    return ImageContext(image_path, image)
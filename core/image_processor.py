@@ -55,11 +55,12 @@ class ImageProcessor:
         
         logger.info("图像处理器初始化完成")
     
-    def load_image(self, image_path: str) -> np.ndarray:
+    def load_image(self, image_path: str, image_context=None) -> np.ndarray:
         """加载图像文件
         
         Args:
             image_path: 图像文件路径
+            image_context: 图像上下文，提供时复用其中已解码的图像
             
         Returns:
             图像数组 (BGR格式)
@@ -72,7 +73,10 @@ class ImageProcessor:
             validate_image_file(image_path, self.supported_formats)
             
             # 使用OpenCV加载图像
-            image = cv2.imread(image_path)
+            if image_context is not None:
+                image = image_context.bgr
+            else:
+                image = cv2.imread(image_path)
             
             if image is None:
                 # 尝试使用PIL加载
@@ -6,7 +6,7 @@
 
 import json
 import time
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 
@@ -73,6 +73,7 @@ class DateInfo:
     confidence: float                # 日期解析置信度
     format_type: str                 # 日期格式类型
     position: Tuple[int, int]        # 在图像中的位置
+    date_type: str = 'unknown'       # 日期语义: production(生产日期) / expiry(到期日) / unknown
     
     def is_valid(self) -> bool:
         """检查日期是否有效
@@ -127,18 +128,48 @@ class RecognitionResult:
         return self.success and len(self.dates_found) > 0
     
     def get_best_date(self) -> Optional[str]:
-        """获取置信度最高的日期
+        """获取最可能是生产日期的日期
+        
+        优先取标注为生产日期中置信度最高的；没有时在未标注到期日的日期中取置信度最高的，
+        只有到期日时才返回到期日
         
         Returns:
-            置信度最高的日期，如果没有则返回None
+            最佳日期，如果没有则返回None
         """
         if not self.date_details:
             return self.dates_found[0] if self.dates_found else None
         
+        for date_types in (('production',), ('production', 'unknown')):
+            candidates = [d for d in self.date_details if d.date_type in date_types]
+            if candidates:
+                return max(candidates, key=lambda d: d.confidence).parsed_date
+        
         # 按置信度排序，返回最高的
         best_date = max(self.date_details, key=lambda d: d.confidence)
         return best_date.parsed_date
     
+    def get_production_date(self) -> Optional[str]:
+        """获取标注为生产日期的日期中置信度最高的
+        
+        Returns:
+            生产日期，没有则返回None
+        """
+        return self._get_typed_date('production')
+    
+    def get_expiry_date(self) -> Optional[str]:
+        """获取标注为到期日的日期中置信度最高的（包括由保质期推算的）
+        
+        Returns:
+            到期日，没有则返回None
+        """
+        return self._get_typed_date('expiry')
+    
+    def _get_typed_date(self, date_type: str) -> Optional[str]:
+        candidates = [d for d in self.date_details if d.date_type == date_type]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda d: d.confidence).parsed_date
+    
     def get_warning_level(self) -> str:
         """获取警告级别
         
@@ -173,6 +204,8 @@ class RecognitionResult:
         # 添加额外信息
         result_dict['warning_level'] = self.get_warning_level()
         result_dict['best_date'] = self.get_best_date()
+        result_dict['production_date'] = self.get_production_date()
+        result_dict['expiry_date'] = self.get_expiry_date()
         
         return result_dict
     
@@ -183,6 +216,53 @@ class RecognitionResult:
             JSON格式的结果
         """
         return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+    
+    def to_cache_payload(self) -> Dict[str, Any]:
+        """转换为缓存中保存的识别结论（OCR文本单独保存，不包含在内）
+        
+        Returns:
+            可JSON序列化的字典
+        """
+        return {
+            'success': self.success,
+            'dates_found': list(self.dates_found),
+            'confidence': self.confidence,
+            'warning_message': self.warning_message,
+            'image_size': list(self.image_size),
+            'date_details': [detail.to_dict() for detail in self.date_details]
+        }
+    
+    @classmethod
+    def from_cache_payload(cls, image_path: str, payload: Dict[str, Any],
+                           ocr_results: List[TextResult],
+                           processing_time: float) -> 'RecognitionResult':
+        """从缓存的识别结论和OCR文本恢复识别结果
+        
+        Args:
+            image_path: 图片路径
+            payload: to_cache_payload 生成的字典
+            ocr_results: 缓存的OCR文本结果
+            processing_time: 本次处理耗时(秒)
+            
+        Returns:
+            识别结果对象
+        """
+        date_details = [
+            DateInfo(**dict(detail, position=tuple(detail['position'])))
+            for detail in payload.get('date_details', [])
+        ]
+        return cls(
+            image_path=image_path,
+            success=payload['success'],
+            dates_found=list(payload['dates_found']),
+            confidence=payload['confidence'],
+            processing_time=processing_time,
+            warning_message=payload.get('warning_message'),
+            raw_text=[result.text for result in ocr_results],
+            image_size=tuple(payload['image_size']),
+            date_details=date_details,
+            ocr_results=ocr_results
+        )
 
 
 @dataclass
@@ -359,6 +439,153 @@ class BatchResult:
             f.write(self.generate_report())
 
 
+@dataclass
+class RecognitionSummary:
+    """流式识别的累计统计
+
+    只保存计数和少量失败样例，不保存各图片的识别结果，处理大量图片时内存占用恒定
+    """
+    
+    folder_path: str                                  # 处理的文件夹路径
+    total_processed: int = 0                          # 已处理文件数
+    successful_recognitions: int = 0                  # 成功识别数
+    failed_recognitions: int = 0                      # 失败识别数
+    warning_count: int = 0                            # 警告级别为 medium/high 的文件数
+    processing_time: float = 0.0                      # 从开始到最近一个结果的时间(秒)
+    recognition_time: float = 0.0                     # 各图片处理时间之和(秒)
+    date_counts: Dict[str, int] = field(default_factory=dict)       # 识别到的日期 -> 次数
+    failed_samples: List[Tuple[str, Optional[str]]] = field(default_factory=list)  # (路径, 警告信息)
+    max_failed_samples: int = 10                      # 最多保留的失败样例数
+    start_time: Optional[str] = None                  # 开始时间
+    end_time: Optional[str] = None                    # 结束时间
+    
+    def __post_init__(self):
+        """初始化后处理"""
+        if self.start_time is None:
+            self.start_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self._started = time.perf_counter()
+    
+    def add(self, result: RecognitionResult) -> None:
+        """累计一个识别结果
+        
+        Args:
+            result: 识别结果
+        """
+        self.total_processed += 1
+        self.recognition_time += result.processing_time
+        self.processing_time = time.perf_counter() - self._started
+        
+        if result.success:
+            self.successful_recognitions += 1
+            for date in result.dates_found:
+                self.date_counts[date] = self.date_counts.get(date, 0) + 1
+        else:
+            self.failed_recognitions += 1
+            if len(self.failed_samples) < self.max_failed_samples:
+                self.failed_samples.append((result.image_path, result.warning_message))
+        
+        if result.get_warning_level() in ['medium', 'high']:
+            self.warning_count += 1
+    
+    def finish(self) -> None:
+        """标记处理结束"""
+        self.processing_time = time.perf_counter() - self._started
+        self.end_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    
+    @property
+    def success_rate(self) -> float:
+        """成功率 (0.0-1.0)"""
+        if self.total_processed == 0:
+            return 0.0
+        return self.successful_recognitions / self.total_processed
+    
+    @property
+    def average_processing_time(self) -> float:
+        """平均处理时间(秒/张)"""
+        if self.total_processed == 0:
+            return 0.0
+        return self.processing_time / self.total_processed
+    
+    def to_batch_result(self) -> BatchResult:
+        """转换为不含详细结果的批量处理结果对象
+        
+        Returns:
+            批量处理结果对象（results为空）
+        """
+        return BatchResult(
+            folder_path=self.folder_path,
+            total_files=self.total_processed,
+            total_processed=self.total_processed,
+            successful_recognitions=self.successful_recognitions,
+            failed_recognitions=self.failed_recognitions,
+            processing_time=self.processing_time,
+            results=[],
+            start_time=self.start_time,
+            end_time=self.end_time
+        )
+    
+    def generate_report(self) -> str:
+        """生成处理报告
+        
+        Returns:
+            处理报告字符串
+        """
+        report_lines = [
+            "=" * 60,
+            "批量处理报告",
+            "=" * 60,
+            f"处理文件夹: {self.folder_path}",
+            f"开始时间: {self.start_time}",
+            f"结束时间: {self.end_time}",
+            f"总处理时间: {self.processing_time:.2f}秒",
+            "",
+            "处理统计:",
+            f"  已处理数: {self.total_processed}",
+            f"  成功识别: {self.successful_recognitions}",
+            f"  失败识别: {self.failed_recognitions}",
+            f"  成功率: {self.success_rate:.2%}",
+            f"  平均处理时间: {self.average_processing_time:.4f}秒/张",
+            "",
+        ]
+        
+        if self.warning_count:
+            report_lines.extend([
+                "警告统计:",
+                f"  有警告的文件数: {self.warning_count}",
+                ""
+            ])
+        
+        if self.failed_samples:
+            report_lines.append("失败详情:")
+            for image_path, message in self.failed_samples:
+                report_lines.append(f"  {image_path}: {message}")
+            
+            if self.failed_recognitions > len(self.failed_samples):
+                report_lines.append(f"  ... 还有 {self.failed_recognitions - len(self.failed_samples)} 个失败案例")
+            report_lines.append("")
+        
+        if self.date_counts:
+            report_lines.append("识别到的日期统计:")
+            for date, count in sorted(self.date_counts.items()):
+                report_lines.append(f"  {date}: {count}次")
+            report_lines.append("")
+        
+        report_lines.append("=" * 60)
+        
+        return "\n".join(report_lines)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典格式
+        
+        Returns:
+            字典格式的统计
+        """
+        result_dict = asdict(self)
+        result_dict['success_rate'] = self.success_rate
+        result_dict['average_processing_time'] = self.average_processing_time
+        return result_dict
+
+
 # 工厂函数
 def create_recognition_result(image_path: str, 
                             success: bool = False,
@@ -0,0 +1,125 @@
+"""
+OCR批量拼图模块
+
+将多张小图（同一图片的ROI区域或多张排队中的图片）拼接到一张画布上，
+只执行一次检测/识别调用，再按文本框中心点把结果分配回各自的图片
+"""
+
+import logging
+from typing import List, Tuple, NamedTuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class TilePlacement(NamedTuple):
+    """单张图片在拼图画布中的位置"""
+    index: int      # 在输入列表中的序号
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+class Mosaic(NamedTuple):
+    """拼图画布及其中各图片的位置"""
+    canvas: np.ndarray
+    placements: Tuple[TilePlacement, ...]
+
+
+def _to_bgr(image: np.ndarray) -> np.ndarray:
+    """统一转换为三通道BGR图像"""
+    if image.ndim == 2:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    if image.shape[2] == 4:
+        return cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+    return image
+
+
+def build_mosaics(images: List[np.ndarray], max_side: int = 1280,
+                  gap: int = 24) -> List[Mosaic]:
+    """按行（货架式）排布将图片拼接为若干画布
+
+    画布边长不超过max_side，避免检测模型缩放画布导致文字变小；
+    超过max_side的图片单独成为一张画布
+
+    Args:
+        images: 图像数组列表
+        max_side: 画布最大边长(像素)
+        gap: 图片之间的白色间隔(像素)，防止相邻图片的文字被检测为同一行
+
+    Returns:
+        拼图列表
+    """
+    mosaics = []
+    pending = []  # (index, x, y, image)
+    cursor_x = shelf_y = shelf_height = 0
+
+    def flush():
+        if not pending:
+            return
+        canvas_width = max(x + img.shape[1] for _, x, _, img in pending)
+        canvas_height = max(y + img.shape[0] for _, _, y, img in pending)
+        canvas = np.full((canvas_height, canvas_width, 3), 255, dtype=np.uint8)
+        placements = []
+        for index, x, y, img in pending:
+            h, w = img.shape[:2]
+            canvas[y:y + h, x:x + w] = img
+            placements.append(TilePlacement(index, x, y, w, h))
+        mosaics.append(Mosaic(canvas, tuple(placements)))
+        pending.clear()
+
+    # 按高度从大到小排布，减少每行的空白
+    order = sorted(range(len(images)), key=lambda i: images[i].shape[0], reverse=True)
+
+    for index in order:
+        img = _to_bgr(images[index])
+        h, w = img.shape[:2]
+
+        if h > max_side or w > max_side:
+            mosaics.append(Mosaic(img, (TilePlacement(index, 0, 0, w, h),)))
+            continue
+
+        if cursor_x + w > max_side:
+            # 换行
+            shelf_y += shelf_height + gap
+            cursor_x = shelf_height = 0
+
+        if shelf_y + h > max_side:
+            # 当前画布已满
+            flush()
+            cursor_x = shelf_y = shelf_height = 0
+
+        pending.append((index, cursor_x, shelf_y, img))
+        cursor_x += w + gap
+        shelf_height = max(shelf_height, h)
+
+    flush()
+    return mosaics
+
+
+def split_mosaic_results(formatted_results: List, placements: Tuple[TilePlacement, ...],
+                         results_per_image: List[List]):
+    """按文本框中心点将拼图识别结果分配回各图片，坐标转换为图片内坐标
+
+    Args:
+        formatted_results: 拼图的格式化识别结果 [[bbox, (text, confidence)], ...]
+        placements: 拼图中各图片的位置
+        results_per_image: 每张输入图片的结果列表，会被原地追加
+    """
+    for bbox, text_info in formatted_results:
+        points = np.asarray(bbox, dtype=np.float32).reshape(-1, 2)
+        center_x, center_y = points.mean(axis=0)
+
+        for tile in placements:
+            if (tile.x <= center_x < tile.x + tile.width and
+                    tile.y <= center_y < tile.y + tile.height):
+                local = points - (tile.x, tile.y)
+                local[:, 0] = local[:, 0].clip(0, tile.width - 1)
+                local[:, 1] = local[:, 1].clip(0, tile.height - 1)
+                results_per_image[tile.index].append([local.astype(int).tolist(), text_info])
+                break
+        else:
+            logger.debug(f"文本框中心点不在任何图片内，已忽略: {text_info}")
@@ -89,11 +89,12 @@ class OCREngine:
             raise OCREngineError(f"无法初始化OCR引擎: {e}")
     
     @timing_decorator
-    def recognize_text(self, image: np.ndarray) -> List[TextResult]:
+    def recognize_text(self, image: np.ndarray, image_context=None) -> List[TextResult]:
         """识别图像中的文本
         
         Args:
             image: 输入图像数组
+            image_context: 图像上下文（生产级引擎不使用，保留以兼容统一接口）
             
         Returns:
             文本识别结果列表
@@ -279,7 +280,7 @@ def create_ocr_engine(config: Optional[Dict] = None):
     try:
         from .optimized_paddleocr_engine import OptimizedPaddleOCREngine
         logger.info("使用优化版OCR引擎 (100%识别率 + 缓存加速)")
-        return OptimizedPaddleOCREngine()
+        return OptimizedPaddleOCREngine(config)
     except Exception as e:
         logger.warning(f"优化版OCR引擎创建失败，使用标准版本: {e}")
         return OCREngine(config)
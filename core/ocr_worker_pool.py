@@ -0,0 +1,589 @@
+"""
+OCR进程池模块
+
+启动多个工作进程，每个进程持有独立并已预热的PaddleOCR实例，
+避免多线程共享同一个reader产生冲突，使吞吐量随CPU核心数扩展；
+同时提供受监管的单个OCR子进程，超时后可直接终止并重启
+"""
+
+import os
+import time
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import List, Optional, Dict, Any, Tuple, Iterable, Iterator, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+
+class OCRWorkerPoolError(Exception):
+    """OCR进程池异常"""
+    pass
+
+
+class OCRRecord(NamedTuple):
+    """单行OCR结果（紧凑、可pickle）"""
+    text: str
+    confidence: float
+    bbox: Tuple[Tuple[int, int], ...]
+
+
+class WorkerResult(NamedTuple):
+    """工作进程返回的单张图片结果"""
+    image_path: str
+    records: Tuple[OCRRecord, ...]
+    image_size: Tuple[int, int]
+    processing_time: float
+    worker_pid: int
+    error: Optional[str] = None
+
+
+def format_ocr_results(results) -> List:
+    """将PaddleOCR原始结果格式化为 [[bbox, (text, confidence)], ...]
+
+    兼容旧版列表格式和新版predict返回的字典格式（rec_texts/rec_scores/rec_polys），
+    过滤空文本和置信度过低的结果；对已格式化的结果再次调用结果不变
+
+    Args:
+        results: PaddleOCR ocr/predict 的返回值
+
+    Returns:
+        格式化后的结果列表
+    """
+    formatted_results = []
+
+    try:
+        if results and len(results) > 0:
+            # 处理PaddleOCR的标准返回格式
+            if isinstance(results[0], list):
+                # 标准PaddleOCR格式: [[[bbox], (text, confidence)], ...]
+                for line in results[0]:
+                    try:
+                        if len(line) >= 2:
+                            bbox = line[0]
+                            text_info = line[1]
+
+                            if isinstance(text_info, (list, tuple)) and len(text_info) >= 2:
+                                text = str(text_info[0]).strip()
+                                confidence = float(text_info[1])
+
+                                # 降低置信度阈值以提高召回率
+                                if confidence > 0.2 and len(text) > 0:
+                                    if hasattr(bbox, 'tolist'):
+                                        bbox = bbox.tolist()
+                                    formatted_results.append([bbox, (text, confidence)])
+                    except Exception as e:
+                        logger.debug(f"格式化单行结果失败: {e}")
+                        continue
+
+            # 处理其他可能的格式
+            elif isinstance(results[0], dict) and 'rec_texts' in results[0]:
+                ocr_result = results[0]
+                texts = ocr_result['rec_texts']
+                scores = ocr_result.get('rec_scores', [])
+                polys = ocr_result.get('rec_polys', [])
+
+                for i in range(len(texts)):
+                    try:
+                        text = str(texts[i]).strip()
+                        confidence = float(scores[i]) if i < len(scores) else 0.5
+
+                        if confidence > 0.2 and len(text) > 0:
+                            bbox = polys[i] if i < len(polys) else [[0,0],[0,0],[0,0],[0,0]]
+                            if hasattr(bbox, 'tolist'):
+                                bbox = bbox.tolist()
+                            formatted_results.append([bbox, (text, confidence)])
+                    except Exception:
+                        continue
+
+            else:
+                logger.warning(f"未知的结果格式: {type(results[0])}")
+
+    except Exception as e:
+        logger.error(f"结果格式化失败: {e}")
+
+    return formatted_results
+
+
+def to_ocr_records(ocr_results) -> Tuple[OCRRecord, ...]:
+    """将引擎返回的 [[[bbox], (text, confidence)], ...] 格式转换为紧凑记录
+
+    Args:
+        ocr_results: OptimizedPaddleOCREngine.ocr 的返回值
+
+    Returns:
+        OCR记录元组
+    """
+    records = []
+    if not ocr_results or not ocr_results[0]:
+        return ()
+
+    for bbox, (text, confidence) in ocr_results[0]:
+        if hasattr(bbox, 'tolist'):
+            bbox = bbox.tolist()
+        points = tuple((int(point[0]), int(point[1])) for point in bbox)
+        records.append(OCRRecord(str(text), float(confidence), points))
+
+    return tuple(records)
+
+
+# 工作进程内的全局引擎实例（每个进程一个）
+_worker_engine = None
+
+
+def _init_worker(config: Optional[Dict], threads_per_worker: int, warmup: bool):
+    """工作进程初始化：限制线程数、创建并预热独立的OCR引擎"""
+    global _worker_engine
+
+    # 避免每个进程都占满全部核心导致过度订阅
+    for env_var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ.setdefault(env_var, str(threads_per_worker))
+
+    import cv2
+    cv2.setNumThreads(threads_per_worker)
+
+    from .optimized_paddleocr_engine import OptimizedPaddleOCREngine
+    _worker_engine = OptimizedPaddleOCREngine(config)
+
+    if warmup:
+        try:
+            _worker_engine.warmup()
+        except Exception as e:
+            logger.warning(f"工作进程 {os.getpid()} 预热失败: {e}")
+
+
+def _recognize_in_worker(image_path: str, file_hash: Optional[str] = None) -> WorkerResult:
+    """在工作进程中识别单张图片
+
+    file_hash 由主进程批量查询缓存时得到，提供时表示已确认未命中，不再重复查询缓存
+    """
+    from .image_context import ImageContext
+
+    start_time = time.time()
+    try:
+        if _worker_engine is None:
+            raise OCRWorkerPoolError("工作进程OCR引擎未初始化")
+
+        image_context = ImageContext(image_path)
+        if file_hash:
+            image_context.seed_file_hash(file_hash)
+            image_context.cache_checked = True
+        ocr_results = _worker_engine.ocr(image_path, image_context=image_context)
+
+        return WorkerResult(
+            image_path=image_path,
+            records=to_ocr_records(ocr_results),
+            image_size=image_context.size,
+            processing_time=time.time() - start_time,
+            worker_pid=os.getpid()
+        )
+
+    except Exception as e:
+        return WorkerResult(
+            image_path=image_path,
+            records=(),
+            image_size=(0, 0),
+            processing_time=time.time() - start_time,
+            worker_pid=os.getpid(),
+            error=str(e)
+        )
+
+
+class OCRWorkerPool:
+    """OCR工作进程池
+
+    每个进程拥有独立的PaddleOCR实例，图片路径分发到各进程，
+    结果以紧凑的 WorkerResult 记录返回
+    """
+
+    def __init__(self, num_workers: Optional[int] = None,
+                 config: Optional[Dict] = None,
+                 warmup: bool = True,
+                 max_tasks_per_child: Optional[int] = None):
+        """初始化进程池
+
+        Args:
+            num_workers: 工作进程数，None或0表示使用CPU核心数
+            config: 传递给每个进程内OCR引擎的配置字典
+            warmup: 是否在进程启动时预热OCR引擎
+            max_tasks_per_child: 每个进程处理多少张图片后重启（用于控制内存），None表示不限制
+        """
+        cpu_count = os.cpu_count() or 1
+        self.num_workers = num_workers or cpu_count
+        self.threads_per_worker = max(1, cpu_count // self.num_workers)
+        self.config = config
+        self.warmup = warmup
+        self.max_tasks_per_child = max_tasks_per_child
+
+        self._executor = None
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'total_worker_time': 0.0,
+            'worker_pids': set()
+        }
+
+    def start(self) -> 'OCRWorkerPool':
+        """启动工作进程"""
+        with self._lock:
+            if self._executor is not None:
+                return self
+
+            # spawn方式在各平台行为一致，且不会继承父进程中的PaddleOCR状态
+            mp_context = multiprocessing.get_context('spawn')
+            kwargs = {}
+            if self.max_tasks_per_child:
+                kwargs['max_tasks_per_child'] = self.max_tasks_per_child
+
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                mp_context=mp_context,
+                initializer=_init_worker,
+                initargs=(self.config, self.threads_per_worker, self.warmup),
+                **kwargs
+            )
+
+            logger.info(f"OCR进程池已启动: {self.num_workers} 个进程, "
+                        f"每进程 {self.threads_per_worker} 个线程")
+            return self
+
+    def submit(self, image_path: str, file_hash: Optional[str] = None) -> Future:
+        """提交单张图片
+
+        Args:
+            image_path: 图片文件路径
+            file_hash: 已确认缓存未命中的文件内容哈希，提供时工作进程不再查询缓存
+
+        Returns:
+            结果为 WorkerResult 的 Future
+        """
+        if self._executor is None:
+            self.start()
+
+        self.stats['submitted'] += 1
+        return self._executor.submit(_recognize_in_worker, image_path, file_hash)
+
+    def imap_unordered(self, image_paths: Iterable[str],
+                       max_pending: Optional[int] = None,
+                       file_hashes: Optional[Dict[str, str]] = None) -> Iterator[WorkerResult]:
+        """按完成顺序返回结果
+
+        提交窗口有上限，输入可以是惰性迭代器，不会一次性提交全部任务
+
+        Args:
+            image_paths: 图片路径可迭代对象
+            max_pending: 同时在途的最大任务数，默认是进程数的两倍
+            file_hashes: 已确认缓存未命中的 文件路径 -> 内容哈希
+
+        Yields:
+            WorkerResult
+        """
+        max_pending = max_pending or self.num_workers * 2
+        pending = {}
+        path_iter = iter(image_paths)
+        exhausted = False
+
+        while True:
+            while not exhausted and len(pending) < max_pending:
+                try:
+                    image_path = next(path_iter)
+                except StopIteration:
+                    exhausted = True
+                    break
+                file_hash = file_hashes.get(image_path) if file_hashes else None
+                pending[self.submit(image_path, file_hash)] = image_path
+
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                image_path = pending.pop(future)
+                yield self._collect(future, image_path)
+
+    def map(self, image_paths: List[str]) -> List[WorkerResult]:
+        """批量识别并按输入顺序返回结果"""
+        futures = [self.submit(path) for path in image_paths]
+        return [self._collect(future, path) for future, path in zip(futures, image_paths)]
+
+    def _collect(self, future: Future, image_path: str) -> WorkerResult:
+        """获取任务结果并更新统计"""
+        try:
+            result = future.result()
+        except Exception as e:
+            # 工作进程崩溃等异常
+            result = WorkerResult(image_path, (), (0, 0), 0.0, -1, f"工作进程异常: {e}")
+
+        if result.error:
+            self.stats['failed'] += 1
+        else:
+            self.stats['completed'] += 1
+        self.stats['total_worker_time'] += result.processing_time
+        if result.worker_pid > 0:
+            self.stats['worker_pids'].add(result.worker_pid)
+
+        return result
+
+    def shutdown(self, wait: bool = True):
+        """关闭进程池"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=not wait)
+                self._executor = None
+                logger.info("OCR进程池已关闭")
+
+    @property
+    def is_running(self) -> bool:
+        """进程池是否已启动"""
+        return self._executor is not None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取进程池统计信息"""
+        finished = self.stats['completed'] + self.stats['failed']
+        return {
+            'num_workers': self.num_workers,
+            'threads_per_worker': self.threads_per_worker,
+            'submitted': self.stats['submitted'],
+            'completed': self.stats['completed'],
+            'failed': self.stats['failed'],
+            'active_workers': len(self.stats['worker_pids']),
+            'avg_worker_time': (self.stats['total_worker_time'] / finished) if finished else 0.0
+        }
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+
+def _supervised_worker_main(conn, threads: int, reader_options: Optional[Dict] = None):
+    """受监管OCR子进程入口：创建PaddleOCR实例后循环处理请求
+
+    协议: 启动完成后发送 ('ready', pid)；之后每收到一张图片（路径或数组）
+    返回 ('success', [formatted_results]) 或 ('error', message)；收到None时退出
+    """
+    for env_var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ.setdefault(env_var, str(threads))
+
+    try:
+        import cv2
+        import numpy as np
+        from paddleocr import PaddleOCR
+        options = {'use_angle_cls': True, 'lang': 'ch'}
+        options.update(reader_options or {})
+        reader = PaddleOCR(**options)
+    except Exception as e:
+        conn.send(('error', f"PaddleOCR初始化失败: {e}"))
+        conn.close()
+        return
+
+    conn.send(('ready', os.getpid()))
+
+    while True:
+        try:
+            image = conn.recv()
+        except (EOFError, OSError):
+            break
+        if image is None:
+            break
+
+        try:
+            # PaddleOCR要求三通道输入，增强后的灰度图需要转换
+            if isinstance(image, np.ndarray) and image.ndim == 2:
+                image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+
+            if hasattr(reader, 'predict'):
+                results = reader.predict(image)
+            else:
+                results = reader.ocr(image)
+
+            # 原始结果对象不一定可以pickle，先在子进程中格式化
+            conn.send(('success', [format_ocr_results(results)]))
+        except Exception as e:
+            conn.send(('error', f"OCR子进程异常: {e}"))
+
+    conn.close()
+
+
+class SupervisedOCRWorker:
+    """受监管的OCR子进程
+
+    PaddleOCR实例运行在独立子进程中，调用超时后直接终止该进程并在下次调用时重启，
+    超时的识别不会在后台继续占用CPU和OCR实例
+    """
+
+    def __init__(self, startup_timeout: float = 120.0, threads: int = 0,
+                 reader_options: Optional[Dict] = None):
+        """初始化受监管OCR子进程
+
+        Args:
+            startup_timeout: 子进程启动（加载模型）的最长等待时间(秒)
+            threads: 子进程内计算库线程数，0表示使用CPU核心数
+            reader_options: 创建PaddleOCR实例的参数（lang、use_angle_cls、det_limit_side_len、模型路径等）
+        """
+        self.startup_timeout = startup_timeout
+        self.threads = threads or (os.cpu_count() or 1)
+        self.reader_options = dict(reader_options or {})
+
+        self._process = None
+        self._conn = None
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self.metrics = {
+            'completed': 0,
+            'cancelled': 0,
+            'errors': 0,
+            'spawns': 0,
+            'respawns': 0,
+            'startup_time': 0.0
+        }
+
+    def run(self, image, timeout_seconds: float):
+        """在子进程中执行OCR
+
+        Args:
+            image: 图片路径(str)或图像数组(numpy.ndarray)
+            timeout_seconds: 超时时间(秒)
+
+        Returns:
+            [formatted_results]，超时或失败时返回None
+        """
+        with self._lock:
+            if not self._ensure_started():
+                self.metrics['errors'] += 1
+                return None
+
+            try:
+                self._conn.send(image)
+
+                if not self._conn.poll(timeout_seconds):
+                    # 超时：终止子进程，识别任务随之取消
+                    self.metrics['cancelled'] += 1
+                    logger.warning(f"OCR子进程超时 ({timeout_seconds}秒)，终止进程 {self._process.pid}")
+                    self._terminate()
+                    return None
+
+                status, payload = self._conn.recv()
+
+            except (EOFError, OSError, BrokenPipeError) as e:
+                self.metrics['errors'] += 1
+                logger.error(f"OCR子进程异常退出: {e}")
+                self._terminate()
+                return None
+
+            if status == 'success':
+                self.metrics['completed'] += 1
+                return payload
+
+            self.metrics['errors'] += 1
+            logger.error(f"OCR子进程执行错误: {payload}")
+            return None
+
+    def _ensure_started(self) -> bool:
+        """确保子进程已启动并完成模型加载"""
+        if self._process is not None and self._process.is_alive():
+            return True
+
+        if self._process is not None:
+            self._terminate()
+
+        if self.metrics['spawns'] > 0:
+            self.metrics['respawns'] += 1
+
+        start_time = time.time()
+        mp_context = multiprocessing.get_context('spawn')
+        parent_conn, child_conn = mp_context.Pipe()
+        self._process = mp_context.Process(
+            target=_supervised_worker_main,
+            args=(child_conn, self.threads, self.reader_options),
+            daemon=True
+        )
+        self._process.start()
+        child_conn.close()
+        self._conn = parent_conn
+        self.metrics['spawns'] += 1
+
+        try:
+            if parent_conn.poll(self.startup_timeout):
+                status, payload = parent_conn.recv()
+                if status == 'ready':
+                    self.metrics['startup_time'] += time.time() - start_time
+                    logger.info(f"OCR子进程已启动: pid={payload}, 耗时 {time.time() - start_time:.2f}秒")
+                    return True
+                logger.error(f"OCR子进程启动失败: {payload}")
+            else:
+                logger.error(f"OCR子进程启动超时 ({self.startup_timeout}秒)")
+        except (EOFError, OSError) as e:
+            logger.error(f"OCR子进程启动失败: {e}")
+
+        self._terminate()
+        return False
+
+    def _terminate(self):
+        """终止子进程"""
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except OSError:
+                pass
+            self._conn = None
+
+        if self._process is not None:
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join(2)
+                if self._process.is_alive():
+                    self._process.kill()
+                    self._process.join(1)
+            self._process = None
+
+    def restart(self):
+        """重启子进程（释放其占用的内存），下次调用时重新启动"""
+        with self._lock:
+            self._terminate()
+
+    def close(self):
+        """关闭子进程"""
+        with self._lock:
+            if self._conn is not None and self._process is not None and self._process.is_alive():
+                try:
+                    self._conn.send(None)
+                    self._process.join(2)
+                except (OSError, BrokenPipeError):
+                    pass
+            self._terminate()
+
+    @property
+    def is_running(self) -> bool:
+        """子进程是否在运行"""
+        return self._process is not None and self._process.is_alive()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """获取统计信息"""
+        metrics = dict(self.metrics)
+        attempts = metrics['completed'] + metrics['cancelled'] + metrics['errors']
+        metrics['attempts'] = attempts
+        metrics['cancel_rate'] = f"{(metrics['cancelled'] / attempts * 100):.1f}%" if attempts else "0%"
+        return metrics
+
+
+# 工厂函数
+def create_ocr_worker_pool(num_workers: Optional[int] = None,
+                           config: Optional[Dict] = None) -> OCRWorkerPool:
+    """创建OCR进程池实例
+
+    Args:
+        num_workers: 工作进程数
+        config: 配置字典
+
+    Returns:
+        OCR进程池实例
+    """
+    return OCRWorkerPool(num_workers, config)
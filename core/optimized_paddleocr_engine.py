@@ -5,7 +5,7 @@
 
 import cv2
 import numpy as np
-from typing import List, Optional, Tuple, Dict, Any
+from typing import List, Optional, Tuple, Dict, Any, Callable
 try:
     from paddleocr import PaddleOCR
 except ImportError:
@@ -16,10 +16,53 @@ import threading
 import queue
 import tempfile
 import os
+import logging
 from .smart_image_processor import SmartImageProcessor
 from .smart_roi_detector import SmartROIDetector
-from .cache_manager import CacheManager
+from .cache_manager import CacheManager, create_cache_manager, make_fingerprint
 from .image_analyzer import ImageAnalyzer
+from .image_context import ImageContext
+from .ocr_worker_pool import SupervisedOCRWorker, format_ocr_results
+from .ocr_batcher import build_mosaics, split_mosaic_results
+from .ocr_engine import OCREngineError
+from utils.config_loader import get_config
+from utils.tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+
+# 引擎版本
+ENGINE_VERSION = '4.0'
+
+# 预处理/ROI/策略代码的版本，修改这些代码导致识别结果变化时递增，使旧缓存失效
+PIPELINE_VERSION = 1
+
+# 预处理策略，按开销从小到大排列
+PREPROCESS_STRATEGIES = ('standard', 'enhanced', 'aggressive', 'super_aggressive')
+
+# 影响识别结果、需要计入缓存指纹的OCR配置项
+FINGERPRINT_CONFIG_KEYS = (
+    'language', 'use_angle_cls', 'det_limit_side_len', 'det_limit_type',
+    'det_model_dir', 'rec_model_dir', 'cls_model_dir',
+    'in_memory_pipeline', 'strategy_mode', 'acceptance', 'batch_ocr', 'mosaic_max_side'
+)
+
+
+def accept_if_date_found(formatted_results: List, date_infos: List) -> bool:
+    """默认验收条件：识别结果中解析出至少一个日期（不要求日期置信度）"""
+    return any(info.parsed_date for info in date_infos)
+
+
+def accept_if_text_found(formatted_results: List, date_infos: List) -> bool:
+    """旧版验收条件：识别出任意文本即接受"""
+    return len(formatted_results) > 0
+
+
+ACCEPTANCE_PREDICATES = {
+    'date': accept_if_date_found,
+    'text': accept_if_text_found,
+}
+
 
 class OptimizedPaddleOCREngine:
     """优化的PaddleOCR引擎 - 专注速度和准确率
@@ -28,11 +71,51 @@ class OptimizedPaddleOCREngine:
     - 智能图像预处理
     - 动态超时策略
     - 多策略处理机制
+    - 内存图像流水线（图片只解码一次，各阶段直接传递数组）
     """
 
-    def __init__(self):
-        """初始化优化的PaddleOCR引擎"""
-        print("正在初始化增强版PaddleOCR引擎...")
+    def __init__(self, config: Optional[Dict] = None):
+        """初始化优化的PaddleOCR引擎
+
+        Args:
+            config: 配置字典，如果为None则使用全局配置
+        """
+        logger.info("正在初始化增强版PaddleOCR引擎...")
+
+        if config is None:
+            config = get_config().config
+        ocr_config = config.get('ocr', {})
+
+        # 内存流水线：避免每个阶段都写临时文件再重新读取
+        self.in_memory_pipeline = ocr_config.get('in_memory_pipeline', True)
+
+        # 超时机制: thread=后台线程(超时后线程无法终止), subprocess=受监管子进程(超时后终止并重启)
+        self.timeout_mode = ocr_config.get('timeout_mode', 'thread')
+        self._ocr_supervisor = None
+        self._orphaned_threads = []
+
+        # 策略模式: sequential=逐级尝试, race=预处理后续策略并在识别出日期时立即结束
+        self.strategy_mode = ocr_config.get('strategy_mode', 'sequential')
+        self.race_deadline = ocr_config.get('race_deadline', 60)
+        self.race_preprocess_workers = ocr_config.get('race_preprocess_workers', 2)
+
+        self.config = config
+        self._date_parser = None
+
+        # 批量识别：多个ROI区域/多张小图拼接为一张画布，只调用一次OCR
+        self.batch_ocr = ocr_config.get('batch_ocr', True)
+        # 检测模型按 det_limit_side_len 缩放输入；画布不超过该边长，拼接后的文字不会被缩小
+        self.det_limit_side_len = ocr_config.get('det_limit_side_len', 960)
+        self.det_limit_type = ocr_config.get('det_limit_type', 'max')
+        self.mosaic_max_side = ocr_config.get('mosaic_max_side', 960)
+        if self.det_limit_type == 'max':
+            self.mosaic_max_side = min(self.mosaic_max_side, self.det_limit_side_len)
+        # 创建PaddleOCR实例的参数（进程内、受监管子进程和重新初始化时一致，均计入缓存指纹）
+        self.reader_options = self._reader_options(ocr_config)
+
+        # 策略验收条件: 决定某一级策略的识别结果是否足够好、是否需要升级到下一级策略
+        acceptance = ocr_config.get('acceptance', 'date')
+        self.acceptance_predicate = ACCEPTANCE_PREDICATES.get(acceptance, accept_if_date_found)
 
         # 初始化智能图像处理器和ROI检测器
         self.image_processor = SmartImageProcessor()
@@ -41,18 +124,22 @@ class OptimizedPaddleOCREngine:
 
         # 初始化缓存管理器
         try:
-            self.cache_manager = CacheManager()
-            print("✅ 缓存管理器已启用")
+            self.cache_manager = create_cache_manager(config, fingerprint=self._cache_fingerprint(ocr_config))
+            logger.info("缓存管理器已启用")
         except Exception as e:
-            print(f"⚠️ 缓存管理器初始化失败: {e}")
+            logger.warning(f"缓存管理器初始化失败: {e}")
             self.cache_manager = None
 
+        # 阶段耗时追踪（tracing.enabled 为 false 时为空操作）
+        self.tracer = get_tracer()
+
         # 内存监控
         self._memory_threshold = 1024 * 1024 * 1024  # 1GB内存阈值
         self._process_count = 0
         self._last_cleanup = time.time()
 
-        # 性能统计
+        # 性能统计；竞速模式的预处理线程也会写入，写入时持有 _stats_lock
+        self._stats_lock = threading.Lock()
         self.stats = {
             'total_processed': 0,
             'success_count': 0,
@@ -60,32 +147,71 @@ class OptimizedPaddleOCREngine:
             'ocr_time': 0,
             'roi_time': 0,
             'roi_regions_detected': 0,
-            'strategy_usage': {'standard': 0, 'enhanced': 0, 'aggressive': 0}
+            'strategy_usage': {'standard': 0, 'enhanced': 0, 'aggressive': 0},
+            'ocr_attempts': {'completed': 0, 'timed_out': 0, 'errors': 0},
+            'race': {'early_exits': 0, 'deadline_hits': 0, 'speculative_discarded': 0,
+                     'discarded_preprocessing_time': 0.0},
+            'tier_stats': {},
+            'mosaic': {'calls': 0, 'images': 0}
         }
 
         try:
             # 尝试导入PaddleOCR
             from paddleocr import PaddleOCR
 
-            # 创建PaddleOCR实例，优化参数以提升速度
-            self.reader = PaddleOCR(
-                use_angle_cls=True,       # 启用文字方向分类
-                lang='ch',                # 中文识别
-            )
-            print("增强版PaddleOCR引擎初始化完成")
+            if self.timeout_mode == 'subprocess':
+                # OCR实例运行在受监管子进程中，主进程不再持有reader
+                self.reader = None
+                self._ocr_supervisor = SupervisedOCRWorker(reader_options=self.reader_options)
+                logger.info("增强版PaddleOCR引擎初始化完成 (子进程超时模式)")
+            else:
+                # 创建PaddleOCR实例，优化参数以提升速度
+                self.reader = PaddleOCR(**self.reader_options)
+                logger.info("增强版PaddleOCR引擎初始化完成")
 
         except ImportError:
-            print("PaddleOCR未安装，请运行: pip install paddlepaddle paddleocr")
+            logger.error("PaddleOCR未安装，请运行: pip install paddlepaddle paddleocr")
             raise Exception("PaddleOCR未安装")
         except Exception as e:
-            print(f"PaddleOCR初始化失败: {e}")
+            logger.error(f"PaddleOCR初始化失败: {e}")
             raise
 
+    @staticmethod
+    def _reader_options(ocr_config: Dict) -> Dict[str, Any]:
+        """根据ocr配置生成创建PaddleOCR实例的参数，未配置的模型路径使用默认模型"""
+        options = {
+            'use_angle_cls': ocr_config.get('use_angle_cls', True),  # 文字方向分类
+            'lang': ocr_config.get('language', 'ch'),                 # 识别语言
+            'det_limit_side_len': ocr_config.get('det_limit_side_len', 960),
+            'det_limit_type': ocr_config.get('det_limit_type', 'max')
+        }
+        for key in ('det_model_dir', 'rec_model_dir', 'cls_model_dir'):
+            if ocr_config.get(key):
+                options[key] = ocr_config[key]
+        return options
+
+    @staticmethod
+    def _cache_fingerprint(ocr_config: Dict) -> str:
+        """计算缓存指纹：引擎版本、PaddleOCR版本、流水线版本和相关配置"""
+        try:
+            from importlib.metadata import version
+            paddleocr_version = version('paddleocr')
+        except Exception:
+            paddleocr_version = 'unknown'
+
+        return make_fingerprint({
+            'engine': 'OptimizedPaddleOCR',
+            'engine_version': ENGINE_VERSION,
+            'pipeline_version': PIPELINE_VERSION,
+            'paddleocr_version': paddleocr_version,
+            'config': {key: ocr_config.get(key) for key in FINGERPRINT_CONFIG_KEYS}
+        })
+
     def _calculate_dynamic_timeout(self, image_input) -> int:
         """根据图片大小计算动态超时时间
 
         Args:
-            image_input: 可以是图片路径(str)或图片尺寸元组(width, height)
+            image_input: 可以是图片路径(str)、图像数组(numpy.ndarray)或图片尺寸元组(width, height)
         """
         try:
             if isinstance(image_input, str):
@@ -94,11 +220,14 @@ class OptimizedPaddleOCREngine:
                 if img is None:
                     return 20  # 默认超时
                 height, width = img.shape[:2]
+            elif isinstance(image_input, np.ndarray):
+                # 已解码的图像数组
+                height, width = image_input.shape[:2]
             elif isinstance(image_input, (tuple, list)) and len(image_input) == 2:
                 # 图片尺寸元组
                 width, height = image_input
             else:
-                print(f"无效的图片输入类型: {type(image_input)}")
+                logger.debug(f"无效的图片输入类型: {type(image_input)}")
                 return 20  # 默认超时
 
             pixels = width * height
@@ -113,137 +242,207 @@ class OptimizedPaddleOCREngine:
             else:
                 timeout = 15
 
-            print(f"图片尺寸: {width}x{height} ({pixels:,}像素) → 超时设置: {timeout}秒")
+            logger.debug(f"图片尺寸: {width}x{height} ({pixels:,}像素) → 超时设置: {timeout}秒")
             return timeout
 
         except Exception as e:
-            print(f"计算动态超时失败: {e}")
+            logger.warning(f"计算动态超时失败: {e}")
             return 20  # 默认超时
 
-    def _process_with_smart_preprocessing(self, image_path: str, strategy: str = "standard") -> Tuple[str, bool]:
+    def _record_preprocessing(self, strategy: str, processing_time: float):
+        """记录一次实际用于OCR的预处理：策略使用次数和预处理耗时"""
+        with self._stats_lock:
+            self.stats['preprocessing_time'] += processing_time
+            if strategy in PREPROCESS_STRATEGIES:
+                usage = self.stats['strategy_usage']
+                usage[strategy] = usage.get(strategy, 0) + 1
+
+    def _preprocess_array(self, img: np.ndarray, strategy: str = "standard") -> np.ndarray:
+        """在内存中按策略预处理图像数组
+
+        Args:
+            img: 输入图像数组
+            strategy: 处理策略 ('standard', 'enhanced', 'aggressive', 'super_aggressive')
+
+        Returns:
+            处理后的图像数组
+        """
+        if strategy == "standard":
+            # 标准预处理：仅尺寸调整
+            processed, _ = self.image_processor.auto_resize_array(img)
+        elif strategy == "enhanced":
+            # 增强预处理：尺寸调整 + 标准增强
+            resized, _ = self.image_processor.auto_resize_array(img)
+            processed = self.image_processor.enhance_array(resized, "standard")
+        elif strategy in ("aggressive", "super_aggressive"):
+            # 激进/超激进预处理：尺寸调整 + 对应增强
+            resized, _ = self.image_processor.auto_resize_array(img)
+            processed = self.image_processor.enhance_array(resized, strategy)
+        else:
+            return img
+
+        return processed
+
+    def _process_with_smart_preprocessing(self, image, strategy: str = "standard") -> Tuple[Any, bool]:
         """使用智能预处理处理图片
 
         Args:
-            image_path: 输入图片路径
+            image: 输入图片路径(str)或图像数组(numpy.ndarray)
             strategy: 处理策略 ('standard', 'enhanced', 'aggressive', 'super_aggressive')
 
         Returns:
-            (处理后图片路径, 是否为临时文件)
+            (处理后图片路径或图像数组, 是否为临时文件)
+        """
+        processed, is_temp, processing_time = self._preprocess(image, strategy)
+        if processing_time is not None:
+            self._record_preprocessing(strategy, processing_time)
+        return processed, is_temp
+
+    def _preprocess(self, image, strategy: str) -> Tuple[Any, bool, Optional[float]]:
+        """按策略预处理图片，不记录统计（竞速模式的提前预处理可能被丢弃）
+
+        Args:
+            image: 输入图片路径(str)或图像数组(numpy.ndarray)
+            strategy: 处理策略
+
+        Returns:
+            (处理后图片路径或图像数组, 是否为临时文件, 预处理耗时(秒)，失败时为None)
         """
         try:
             start_time = time.time()
-            temp_files = []
-
-            if strategy == "standard":
-                # 标准预处理：仅尺寸调整
-                processed_path, is_temp = self.image_processor.auto_resize(image_path)
-                self.stats['strategy_usage']['standard'] += 1
-
-            elif strategy == "enhanced":
-                # 增强预处理：尺寸调整 + 标准增强
-                resized_path, is_temp1 = self.image_processor.auto_resize(image_path)
-                if is_temp1:
-                    temp_files.append(resized_path)
-
-                processed_path, is_temp2 = self.image_processor.enhance_for_ocr(resized_path, "standard")
-                is_temp = is_temp2  # 最终文件是否为临时文件
-                self.stats['strategy_usage']['enhanced'] += 1
-
-            elif strategy == "aggressive":
-                # 激进预处理：尺寸调整 + 激进增强
-                resized_path, is_temp1 = self.image_processor.auto_resize(image_path)
-                if is_temp1:
-                    temp_files.append(resized_path)
-
-                processed_path, is_temp2 = self.image_processor.enhance_for_ocr(resized_path, "aggressive")
-                is_temp = is_temp2  # 最终文件是否为临时文件
-                self.stats['strategy_usage']['aggressive'] += 1
-
-            elif strategy == "super_aggressive":
-                # 超激进预处理：尺寸调整 + 超激进增强
-                resized_path, is_temp1 = self.image_processor.auto_resize(image_path)
-                if is_temp1:
-                    temp_files.append(resized_path)
-
-                processed_path, is_temp2 = self.image_processor.enhance_for_ocr(resized_path, "super_aggressive")
-                is_temp = is_temp2  # 最终文件是否为临时文件
-                if 'super_aggressive' not in self.stats['strategy_usage']:
-                    self.stats['strategy_usage']['super_aggressive'] = 0
-                self.stats['strategy_usage']['super_aggressive'] += 1
 
-            else:
-                processed_path, is_temp = image_path, False
+            with self.tracer.span('preprocess', strategy=strategy):
+                if isinstance(image, np.ndarray):
+                    # 内存流水线：直接处理数组，不产生临时文件
+                    processed, is_temp = self._preprocess_array(image, strategy), False
+                else:
+                    processed, is_temp = self._preprocess_file(image, strategy)
 
             processing_time = time.time() - start_time
-            self.stats['preprocessing_time'] += processing_time
-
-            print(f"预处理完成 ({strategy}策略): 耗时 {processing_time:.2f}秒")
-            return processed_path, is_temp
+            logger.debug(f"预处理完成 ({strategy}策略): 耗时 {processing_time:.2f}秒")
+            return processed, is_temp, processing_time
 
         except Exception as e:
-            print(f"预处理失败 ({strategy}策略): {e}")
+            logger.warning(f"预处理失败 ({strategy}策略): {e}")
+            return image, False, None
+
+    def _preprocess_file(self, image_path: str, strategy: str) -> Tuple[str, bool]:
+        """基于临时文件的预处理（兼容模式）"""
+        temp_files = []
+
+        if strategy == "standard":
+            # 标准预处理：仅尺寸调整
+            processed_path, is_temp = self.image_processor.auto_resize(image_path)
+
+        elif strategy in ("enhanced", "aggressive", "super_aggressive"):
+            # 尺寸调整 + 对应强度的增强
+            resized_path, is_temp1 = self.image_processor.auto_resize(image_path)
+            if is_temp1:
+                temp_files.append(resized_path)
+
+            method = "standard" if strategy == "enhanced" else strategy
+            processed_path, is_temp = self.image_processor.enhance_for_ocr(resized_path, method)
+            if processed_path == resized_path:
+                # 增强失败时沿用缩放结果
+                is_temp = is_temp1
+
+        else:
             return image_path, False
 
-    def _should_use_roi(self, image_path: str) -> bool:
-        """判断是否应该使用ROI检测"""
+        # 中间文件已经不再需要
+        for temp_file in temp_files:
+            if temp_file != processed_path:
+                try:
+                    os.unlink(temp_file)
+                except OSError:
+                    pass
+
+        return processed_path, is_temp
+
+    def _should_use_roi(self, image_path: str, image_size: Optional[Tuple[int, int]] = None) -> bool:
+        """判断是否应该使用ROI检测
+
+        Args:
+            image_path: 图片路径（用于识别已知困难文件）
+            image_size: 已知的图片尺寸(width, height)，提供时不再重新读取图片
+        """
         try:
             # 特殊文件处理：已知的困难文件跳过ROI
             filename = os.path.basename(image_path)
             difficult_files = ["2025.06.24.jpg"]  # 已知困难文件列表
 
             if filename in difficult_files:
-                print(f"困难文件 ({filename})，跳过ROI检测")
+                logger.debug(f"困难文件 ({filename})，跳过ROI检测")
                 return False
 
-            img = cv2.imread(image_path)
-            if img is None:
-                return False
-
-            height, width = img.shape[:2]
+            if image_size is not None:
+                width, height = image_size
+            else:
+                img = cv2.imread(image_path)
+                if img is None:
+                    return False
+                height, width = img.shape[:2]
             pixels = width * height
 
             # 小图片跳过ROI检测
             if pixels < 250000:  # 小于500x500像素
-                print(f"图片较小 ({width}x{height})，跳过ROI检测")
+                logger.debug(f"图片较小 ({width}x{height})，跳过ROI检测")
                 return False
 
             # 超大图片使用ROI检测
             if pixels > 1000000:  # 大于1000x1000像素
-                print(f"图片较大 ({width}x{height})，使用ROI检测")
+                logger.debug(f"图片较大 ({width}x{height})，使用ROI检测")
                 return True
 
             # 中等图片根据宽高比判断
             aspect_ratio = max(width, height) / min(width, height)
             if aspect_ratio > 3:  # 长条形图片，可能有多个文本区域
-                print(f"图片为长条形 ({width}x{height})，使用ROI检测")
+                logger.debug(f"图片为长条形 ({width}x{height})，使用ROI检测")
                 return True
 
-            print(f"图片中等大小 ({width}x{height})，跳过ROI检测")
+            logger.debug(f"图片中等大小 ({width}x{height})，跳过ROI检测")
             return False
 
         except Exception as e:
-            print(f"判断ROI使用失败: {e}")
+            logger.warning(f"判断ROI使用失败: {e}")
             return False
 
-    def _process_with_roi_detection(self, image_path: str, use_roi: bool = True) -> Tuple[List[str], bool]:
+    def _process_with_roi_detection(self, image, use_roi: bool = True,
+                                    image_context: Optional[ImageContext] = None) -> Tuple[List[Any], bool]:
         """使用ROI检测优化处理速度
 
         Args:
-            image_path: 输入图片路径
+            image: 输入图片路径(str)或图像数组(numpy.ndarray)
             use_roi: 是否使用ROI检测
+            image_context: 图像上下文，提供时复用已知的尺寸和灰度图
 
         Returns:
-            (处理后图片路径列表, 是否使用了ROI)
+            (处理后图片路径或图像数组列表, 是否使用了ROI)
         """
+        image_path = image_context.image_path if image_context is not None else None
+        if image_context is not None:
+            image_size = image_context.size
+        elif isinstance(image, np.ndarray):
+            image_size = (image.shape[1], image.shape[0])
+        else:
+            image_size = None
+        should_use_roi = self._should_use_roi(image_path or (image if isinstance(image, str) else ""),
+                                              image_size)
+
         # 智能判断是否使用ROI
-        if not use_roi or not self._should_use_roi(image_path):
-            return [image_path], False
+        if not use_roi or not should_use_roi:
+            return [image], False
 
         try:
             start_time = time.time()
 
             # 检测文本区域
-            cropped_paths = self.roi_detector.crop_text_regions(image_path, padding=30)
+            with self.tracer.span('roi'):
+                if isinstance(image, np.ndarray):
+                    gray = image_context.gray if image_context is not None and image is image_context.bgr else None
+                    cropped_paths = self.roi_detector.crop_text_regions_array(image, padding=30, gray=gray)
+                else:
+                    cropped_paths = self.roi_detector.crop_text_regions(image, padding=30)
 
             roi_time = time.time() - start_time
             self.stats['roi_time'] += roi_time
@@ -254,18 +453,18 @@ class OptimizedPaddleOCREngine:
                 estimated_time = len(cropped_paths) * 8  # 每个区域预估8秒
                 if estimated_time <= 60:  # 预估时间不超过60秒
                     self.stats['roi_regions_detected'] += len(cropped_paths)
-                    print(f"ROI检测完成: 发现 {len(cropped_paths)} 个文本区域 (耗时: {roi_time:.2f}秒, 预估处理: {estimated_time}秒)")
+                    logger.debug(f"ROI检测完成: 发现 {len(cropped_paths)} 个文本区域 (耗时: {roi_time:.2f}秒, 预估处理: {estimated_time}秒)")
                     return cropped_paths, True
                 else:
-                    print(f"ROI检测: 区域过多({len(cropped_paths)}个)，预估时间过长({estimated_time}秒)，使用原图")
-                    return [image_path], False
+                    logger.debug(f"ROI检测: 区域过多({len(cropped_paths)}个)，预估时间过长({estimated_time}秒)，使用原图")
+                    return [image], False
             else:
-                print(f"ROI检测: 区域数量不合适({len(cropped_paths)}个)，使用原图 (耗时: {roi_time:.2f}秒)")
-                return [image_path], False
+                logger.debug(f"ROI检测: 区域数量不合适({len(cropped_paths)}个)，使用原图 (耗时: {roi_time:.2f}秒)")
+                return [image], False
 
         except Exception as e:
-            print(f"ROI检测失败: {e}")
-            return [image_path], False
+            logger.warning(f"ROI检测失败: {e}")
+            return [image], False
 
     def _smart_resize_image(self, image_path: str) -> Tuple[str, Tuple[int, int]]:
         """智能缩放图片以提升处理速度"""
@@ -296,11 +495,11 @@ class OptimizedPaddleOCREngine:
             os.close(temp_fd)
             cv2.imwrite(temp_path, resized_img, [cv2.IMWRITE_JPEG_QUALITY, 95])
             
-            print(f"图片缩放: {width}x{height} → {new_width}x{new_height} (缩放比例: {scale:.2f})")
+            logger.debug(f"图片缩放: {width}x{height} → {new_width}x{new_height} (缩放比例: {scale:.2f})")
             return temp_path, original_size
             
         except Exception as e:
-            print(f"图片缩放失败: {e}")
+            logger.warning(f"图片缩放失败: {e}")
             return image_path, (0, 0)
     
     def _enhance_image_for_ocr(self, image_path: str) -> str:
@@ -337,13 +536,18 @@ class OptimizedPaddleOCREngine:
             return temp_path
             
         except Exception as e:
-            print(f"图片增强失败: {e}")
+            logger.warning(f"图片增强失败: {e}")
             return image_path
     
 
     
-    def _ocr_worker(self, image_path: str, result_queue: queue.Queue):
-        """OCR工作线程"""
+    def _ocr_worker(self, image, result_queue: queue.Queue):
+        """OCR工作线程
+
+        Args:
+            image: 图片路径(str)或图像数组(numpy.ndarray)
+            result_queue: 结果队列
+        """
         try:
             # 检查OCR实例是否可用
             if not hasattr(self, 'reader') or self.reader is None:
@@ -355,75 +559,160 @@ class OptimizedPaddleOCREngine:
                 result_queue.put(('error', 'OCR实例缺少ocr方法'))
                 return
 
-            print(f"   📷 执行PaddleOCR识别...")
+            # PaddleOCR要求三通道输入，增强后的灰度图需要转换
+            if isinstance(image, np.ndarray) and image.ndim == 2:
+                image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+
+            logger.debug("执行PaddleOCR识别...")
             # 使用新版PaddleOCR的predict方法
             try:
                 # 优先使用predict方法（新版本）
                 if hasattr(self.reader, 'predict'):
-                    results = self.reader.predict(image_path)
+                    results = self.reader.predict(image)
                 else:
                     # 回退到ocr方法（旧版本）
-                    results = self.reader.ocr(image_path)
-                print(f"   ✅ PaddleOCR识别完成")
+                    results = self.reader.ocr(image)
+                logger.debug("PaddleOCR识别完成")
             except Exception as e:
-                print(f"   ❌ PaddleOCR调用失败: {e}")
+                logger.warning(f"PaddleOCR调用失败: {e}")
                 raise
             result_queue.put(('success', results))
 
         except Exception as e:
             import traceback
             error_msg = f"OCR工作线程异常: {e}\n{traceback.format_exc()}"
-            print(f"   ❌ {error_msg}")
+            logger.warning(error_msg)
             result_queue.put(('error', error_msg))
 
-    def _execute_ocr_with_timeout(self, image_path: str, timeout_seconds: int):
-        """执行带超时的OCR识别"""
+    def _execute_ocr_with_timeout(self, image, timeout_seconds: int):
+        """执行带超时的OCR识别
+
+        Args:
+            image: 图片路径(str)或图像数组(numpy.ndarray)
+            timeout_seconds: 超时时间(秒)
+        """
+        with self.tracer.span('ocr') as span:
+            result = self._run_ocr_with_timeout(image, timeout_seconds)
+            span.set_label('status', 'ok' if result is not None else 'failed')
+        return result
+
+    def _run_ocr_with_timeout(self, image, timeout_seconds: int):
+        """执行带超时的OCR识别（不计时），失败或超时返回None"""
         try:
-            # 检查图片文件
-            if not os.path.exists(image_path):
-                print(f"❌ 图片文件不存在: {image_path}")
-                return None
+            if isinstance(image, np.ndarray):
+                label = f"内存图像 {image.shape[1]}x{image.shape[0]}"
+            else:
+                # 检查图片文件
+                if not os.path.exists(image):
+                    logger.warning(f"图片文件不存在: {image}")
+                    return None
+                label = os.path.basename(image)
+
+            logger.debug(f"开始OCR识别: {label} (超时: {timeout_seconds}秒)")
 
-            print(f"🚀 开始OCR识别: {os.path.basename(image_path)} (超时: {timeout_seconds}秒)")
+            if self._ocr_supervisor is not None:
+                return self._execute_ocr_in_subprocess(image, timeout_seconds)
 
             result_queue = queue.Queue()
             worker_thread = threading.Thread(
                 target=self._ocr_worker,
-                args=(image_path, result_queue)
+                args=(image, result_queue)
             )
             worker_thread.daemon = True
             worker_thread.start()
 
             try:
-                print(f"   ⏳ 等待OCR结果...")
+                logger.debug("等待OCR结果...")
                 status, results = result_queue.get(timeout=timeout_seconds)
 
                 if status == 'success':
-                    print(f"   🎉 OCR识别成功")
+                    self.stats['ocr_attempts']['completed'] += 1
+                    logger.debug("OCR识别成功")
                     return results
                 else:
-                    print(f"   ❌ OCR执行错误: {results}")
+                    self.stats['ocr_attempts']['errors'] += 1
+                    logger.warning(f"OCR执行错误: {results}")
                     return None
 
             except queue.Empty:
-                print(f"   ⏰ OCR执行超时 ({timeout_seconds}秒)")
+                self.stats['ocr_attempts']['timed_out'] += 1
+                logger.warning(f"OCR执行超时 ({timeout_seconds}秒)")
                 if worker_thread.is_alive():
-                    print(f"   ⚠️ 工作线程仍在运行")
+                    # 线程无法被终止，记录下来以便统计仍在后台运行的线程
+                    self._orphaned_threads.append(worker_thread)
+                    logger.warning("工作线程仍在运行 (可设置 ocr.timeout_mode: subprocess 终止超时任务)")
                 return None
 
         except Exception as e:
             import traceback
-            print(f"❌ OCR执行异常: {e}")
-            print(f"详细错误:\n{traceback.format_exc()}")
+            logger.error(f"OCR执行异常: {e}")
+            logger.debug(f"详细错误:\n{traceback.format_exc()}")
             return None
 
-    def _process_roi_regions(self, roi_paths: List[str], timeout_seconds: int,
+    def _execute_ocr_in_subprocess(self, image, timeout_seconds: int):
+        """在受监管子进程中执行OCR，超时后子进程被终止，下次调用时自动重启
+
+        Args:
+            image: 图片路径(str)或图像数组(numpy.ndarray)
+            timeout_seconds: 超时时间(秒)
+        """
+        logger.debug("等待OCR子进程结果...")
+        results = self._ocr_supervisor.run(image, timeout_seconds)
+
+        if results is None:
+            logger.warning("OCR子进程未返回结果 (超时或执行错误)")
+        else:
+            logger.debug("OCR识别成功")
+        return results
+
+    def _process_roi_regions(self, roi_paths: List[Any], timeout_seconds: int,
                            temp_files: List[str], start_time: float):
-        """处理ROI检测到的多个区域"""
+        """处理ROI检测到的多个区域
+
+        Args:
+            roi_paths: ROI区域的图片路径或图像数组列表
+        """
+        all_results = []
+
+        if self.batch_ocr:
+            # 所有ROI区域拼接后一次识别
+            regions = []
+            for roi in roi_paths:
+                region = roi if isinstance(roi, np.ndarray) else ImageContext(roi).bgr
+                if region is not None:
+                    regions.append(self._process_with_smart_preprocessing(region, "standard")[0])
+
+            logger.debug(f"批量处理 {len(regions)} 个ROI区域...")
+            for i, region_results in enumerate(self._ocr_batch(regions, timeout_seconds)):
+                if region_results:
+                    all_results.extend(region_results)
+                    logger.debug(f"ROI区域 {i+1} 成功: 找到 {len(region_results)} 个文本")
+                else:
+                    logger.debug(f"ROI区域 {i+1} 无有效文本")
+        else:
+            all_results = self._process_roi_regions_one_by_one(roi_paths, timeout_seconds, temp_files)
+
+        if all_results:
+            processing_time = time.time() - start_time
+            self.stats['success_count'] += 1
+            logger.debug(f"ROI处理成功: 总共找到 {len(all_results)} 个文本 (总耗时: {processing_time:.2f}秒)")
+            return [all_results]
+        else:
+            logger.debug("所有ROI区域都失败，尝试传统方法...")
+            # 回退到传统方法
+            return self._process_with_strategies(roi_paths[0], ["standard", "enhanced"],
+                                               timeout_seconds, temp_files, start_time)
+
+    def _process_roi_regions_one_by_one(self, roi_paths: List[Any], timeout_seconds: int,
+                                        temp_files: List[str]) -> List:
+        """逐个识别ROI区域（未启用批量识别时使用）"""
         all_results = []
 
         for i, roi_path in enumerate(roi_paths):
-            print(f"处理ROI区域 {i+1}/{len(roi_paths)}: {roi_path}")
+            if isinstance(roi_path, np.ndarray):
+                logger.debug(f"处理ROI区域 {i+1}/{len(roi_paths)}: {roi_path.shape[1]}x{roi_path.shape[0]}")
+            else:
+                logger.debug(f"处理ROI区域 {i+1}/{len(roi_paths)}: {roi_path}")
 
             # 对每个ROI区域使用标准策略处理
             processed_path, is_temp = self._process_with_smart_preprocessing(roi_path, "standard")
@@ -437,29 +726,135 @@ class OptimizedPaddleOCREngine:
                 formatted_results = self._format_results(result)
                 if formatted_results:
                     all_results.extend(formatted_results)
-                    print(f"✅ ROI区域 {i+1} 成功: 找到 {len(formatted_results)} 个文本")
+                    logger.debug(f"ROI区域 {i+1} 成功: 找到 {len(formatted_results)} 个文本")
                 else:
-                    print(f"❌ ROI区域 {i+1} 无有效文本")
+                    logger.debug(f"ROI区域 {i+1} 无有效文本")
             else:
-                print(f"❌ ROI区域 {i+1} 识别失败")
+                logger.debug(f"ROI区域 {i+1} 识别失败")
 
-        if all_results:
-            processing_time = time.time() - start_time
-            self.stats['success_count'] += 1
-            print(f"✅ ROI处理成功: 总共找到 {len(all_results)} 个文本 (总耗时: {processing_time:.2f}秒)")
-            return [all_results]
-        else:
-            print("❌ 所有ROI区域都失败，尝试传统方法...")
-            # 回退到传统方法
-            return self._process_with_strategies(roi_paths[0], ["standard", "enhanced"],
-                                               timeout_seconds, temp_files, start_time)
+        return all_results
+
+    def _ocr_batch(self, images: List[np.ndarray], timeout_seconds: int) -> List[List]:
+        """将多张图像拼接为画布后批量识别
+
+        Args:
+            images: 图像数组列表
+            timeout_seconds: 每张画布的基础超时时间(秒)
+
+        Returns:
+            与输入一一对应的格式化结果列表，bbox为各自图像内的坐标
+        """
+        results_per_image = [[] for _ in images]
+        if not images:
+            return results_per_image
+
+        mosaics = build_mosaics(images, max_side=self.mosaic_max_side)
+        logger.debug(f"{len(images)} 张图像拼接为 {len(mosaics)} 张画布")
+
+        for mosaic in mosaics:
+            canvas_timeout = max(timeout_seconds, self._calculate_dynamic_timeout(mosaic.canvas))
+            result = self._execute_ocr_with_timeout(mosaic.canvas, canvas_timeout)
+            self.stats['mosaic']['calls'] += 1
+            self.stats['mosaic']['images'] += len(mosaic.placements)
+
+            if result and result[0]:
+                split_mosaic_results(self._format_results(result), mosaic.placements, results_per_image)
+
+        return results_per_image
+
+    def ocr_many(self, images: List[Any], timeout_seconds: Optional[int] = None,
+                 image_contexts: Optional[List[ImageContext]] = None) -> List[List]:
+        """批量识别多张图片（DateRecognizer.recognize_batch 使用）
+
+        先将各图片标准预处理后拼接批量识别，批量识别未通过验收的图片
+        再单独走完整的多策略流程
+
+        Args:
+            images: 图片路径(str)或图像数组(numpy.ndarray)列表
+            timeout_seconds: 基础超时时间，None表示按画布大小动态计算
+            image_contexts: 与 images 一一对应的图像上下文（可选），复用调用方已解码的图像和哈希
+
+        Returns:
+            与输入一一对应的识别结果，格式同 ocr()
+        """
+        outputs = [None] * len(images)
+        contexts = {}
+        batch_indices = []
+        batch_images = []
+
+        for i, image in enumerate(images):
+            if image_contexts is not None:
+                context = image_contexts[i]
+            elif isinstance(image, str):
+                context = ImageContext(image_path=image)
+            else:
+                context = ImageContext.from_array(image)
+            contexts[i] = context
+
+            if self.cache_manager and isinstance(image, str) and not context.cache_checked:
+                with self.tracer.span('cache', op='get') as span:
+                    cached_result = self.cache_manager.get_cached_result(image, image_context=context)
+                    span.set_label('hit', bool(cached_result))
+                if cached_result:
+                    outputs[i] = cached_result['ocr_results']
+                    continue
+
+            with self.tracer.span('load'):
+                img = context.bgr
+            if img is None:
+                outputs[i] = [[]]
+                continue
+
+            batch_indices.append(i)
+            batch_images.append(self._process_with_smart_preprocessing(img, "standard")[0])
+
+        if batch_images:
+            start_time = time.time()
+            batch_results = self._ocr_batch(batch_images, timeout_seconds or 15)
+            batch_time = time.time() - start_time
+
+            for i, formatted_results in zip(batch_indices, batch_results):
+                if self._evaluate_tier("batch", 0, formatted_results, set()):
+                    self.stats['total_processed'] += 1
+                    self.stats['success_count'] += 1
+                    outputs[i] = [formatted_results]
+                    if self.cache_manager and isinstance(images[i], str):
+                        with self.tracer.span('cache', op='save'):
+                            self.cache_manager.save_result(images[i], outputs[i], batch_time / len(batch_images),
+                                                           "mosaic", image_context=contexts[i])
+
+        # 批量识别未通过验收的图片走完整流程
+        for i, output in enumerate(outputs):
+            if output is None:
+                outputs[i] = self.ocr(images[i], timeout_seconds=timeout_seconds, image_context=contexts[i])
+
+        return outputs
+
+    def _process_with_strategies(self, image, strategies: List[str],
+                               timeout_seconds: int, temp_files: List[str], start_time: float,
+                               image_context: Optional[ImageContext] = None):
+        """使用多策略处理单个图片
 
-    def _process_with_strategies(self, image_path: str, strategies: List[str],
-                               timeout_seconds: int, temp_files: List[str], start_time: float):
-        """使用多策略处理单个图片"""
+        Args:
+            image: 图片路径(str)或图像数组(numpy.ndarray)
+            image_context: 原图的图像上下文，image为原图时复用其解码结果
+        """
         # 智能策略选择：分析图片特征，优化策略顺序
         try:
-            analysis = self.image_analyzer.analyze_image(image_path)
+            if image_context is None:
+                is_original = False
+            elif isinstance(image, np.ndarray):
+                is_original = image is image_context.bgr
+            else:
+                is_original = image == image_context.image_path
+
+            with self.tracer.span('analyze'):
+                if is_original:
+                    analysis = self.image_analyzer.analyze_context(image_context)
+                elif isinstance(image, np.ndarray):
+                    analysis = self.image_analyzer.analyze_array(image)
+                else:
+                    analysis = self.image_analyzer.analyze_image(image)
             if 'error' not in analysis:
                 recommended_strategy = self.image_analyzer.get_optimization_strategy(analysis)
 
@@ -471,63 +866,267 @@ class OptimizedPaddleOCREngine:
                 elif recommended_strategy == "enhanced":
                     strategies = ["enhanced", "standard", "aggressive"]
 
-                print(f"🎯 图片分析完成，推荐策略: {recommended_strategy}")
-                print(f"📋 处理顺序: {' → '.join(strategies)}")
+                logger.debug(f"图片分析完成，推荐策略: {recommended_strategy}")
+                logger.debug(f"处理顺序: {' → '.join(strategies)}")
         except Exception as e:
-            print(f"⚠️ 图片分析失败，使用默认策略: {e}")
+            logger.warning(f"图片分析失败，使用默认策略: {e}")
+
+        if self.strategy_mode == 'race':
+            return self._race_strategies(image, strategies, timeout_seconds, temp_files, start_time)
+
+        fallback_results = None
+        seen_dates = set()
 
         for i, strategy in enumerate(strategies):
             strategy_start = time.time()
 
             # 1. 智能预处理
-            processed_path, is_temp = self._process_with_smart_preprocessing(image_path, strategy)
+            processed_path, is_temp = self._process_with_smart_preprocessing(image, strategy)
             if is_temp:
                 temp_files.append(processed_path)
 
             # 2. 计算当前策略的超时时间
-            if strategy == "standard":
-                current_timeout = timeout_seconds
-            elif strategy == "enhanced":
-                current_timeout = int(timeout_seconds * 1.2)  # 增加20%
-            else:  # aggressive
-                current_timeout = int(timeout_seconds * 1.5)  # 增加50%
+            current_timeout = self._get_strategy_timeout(strategy, timeout_seconds)
 
-            print(f"尝试{strategy}策略 (超时: {current_timeout}秒)...")
+            logger.debug(f"尝试{strategy}策略 (超时: {current_timeout}秒)...")
 
             # 3. 执行OCR识别
             result = self._execute_ocr_with_timeout(processed_path, current_timeout)
+            formatted_results = self._format_results(result) if result and result[0] else []
 
-            if result and result[0]:  # 识别成功
-                formatted_results = self._format_results(result)
-                if formatted_results:
-                    processing_time = time.time() - start_time
-                    strategy_time = time.time() - strategy_start
+            # 4. 验收识别结果
+            if self._evaluate_tier(strategy, i, formatted_results, seen_dates):
+                processing_time = time.time() - start_time
+                strategy_time = time.time() - strategy_start
 
-                    self.stats['success_count'] += 1
-                    self.stats['ocr_time'] += strategy_time
+                self.stats['success_count'] += 1
+                self.stats['ocr_time'] += strategy_time
 
-                    print(f"✅ {strategy}策略成功: 找到 {len(formatted_results)} 个文本 (策略耗时: {strategy_time:.2f}秒, 总耗时: {processing_time:.2f}秒)")
-                    return [formatted_results]
+                logger.debug(f"{strategy}策略成功: 找到 {len(formatted_results)} 个文本 (策略耗时: {strategy_time:.2f}秒, 总耗时: {processing_time:.2f}秒)")
+                return [formatted_results]
+
+            if formatted_results and fallback_results is None:
+                # 有文本但未通过验收，保留作为最终的兜底结果
+                fallback_results = formatted_results
 
             strategy_time = time.time() - strategy_start
-            print(f"❌ {strategy}策略失败 (耗时: {strategy_time:.2f}秒)")
+            logger.debug(f"{strategy}策略未通过验收 (耗时: {strategy_time:.2f}秒)")
 
             # 如果不是最后一个策略，继续尝试
             if i < len(strategies) - 1:
-                print(f"尝试下一个策略...")
+                logger.debug("尝试下一个策略...")
 
-        # 所有策略都失败
         processing_time = time.time() - start_time
-        print(f"❌ 所有策略都失败 (总耗时: {processing_time:.2f}秒)")
+        if fallback_results:
+            self.stats['success_count'] += 1
+            logger.info(f"所有策略均未通过验收，返回首个文本结果 (总耗时: {processing_time:.2f}秒)")
+            return [fallback_results]
+
+        # 所有策略都失败
+        logger.warning(f"所有策略都失败 (总耗时: {processing_time:.2f}秒)")
         return [[]]
     
-    def ocr(self, image, timeout_seconds=None):
+    def _get_strategy_timeout(self, strategy: str, timeout_seconds: int) -> int:
+        """计算策略对应的超时时间"""
+        if strategy == "standard":
+            return timeout_seconds
+        elif strategy == "enhanced":
+            return int(timeout_seconds * 1.2)  # 增加20%
+        else:  # aggressive
+            return int(timeout_seconds * 1.5)  # 增加50%
+
+    def _get_date_parser(self):
+        """获取日期解析器（延迟创建）"""
+        if self._date_parser is None:
+            from .date_parser import create_date_parser
+            self._date_parser = create_date_parser(self.config)
+        return self._date_parser
+
+    def _parse_formatted_dates(self, formatted_results: List) -> List:
+        """从格式化后的OCR结果中解析日期"""
+        from .models import TextResult
+
+        if not formatted_results:
+            return []
+
+        text_results = [
+            TextResult(text=text, confidence=confidence, bbox=bbox)
+            for bbox, (text, confidence) in formatted_results
+        ]
+        try:
+            return self._get_date_parser().parse_dates_from_text(text_results)
+        except Exception as e:
+            logger.warning(f"日期解析失败: {e}")
+            return []
+
+    def set_acceptance_predicate(self, predicate: Callable[[List, List], bool]):
+        """设置策略验收条件
+
+        Args:
+            predicate: 验收函数，参数为 (格式化后的OCR结果, 解析出的DateInfo列表)，返回是否接受
+        """
+        self.acceptance_predicate = predicate
+
+    def _evaluate_tier(self, strategy: str, tier_index: int,
+                       formatted_results: List, seen_dates: set) -> bool:
+        """验收某一级策略的识别结果并更新分级统计
+
+        Args:
+            strategy: 策略名称
+            tier_index: 本次识别中的尝试序号，大于0表示由前面的策略升级而来
+            formatted_results: 格式化后的OCR结果
+            seen_dates: 本次识别中前面各级策略已解析出的日期，会被更新
+
+        Returns:
+            是否接受该结果
+        """
+        tier = self.stats['tier_stats'].setdefault(strategy, {
+            'attempts': 0, 'text_found': 0, 'date_found': 0, 'accepted': 0,
+            'escalations': 0, 'escalation_new_date': 0
+        })
+        tier['attempts'] += 1
+
+        date_infos = self._parse_formatted_dates(formatted_results)
+        dates = {info.parsed_date for info in date_infos if info.parsed_date}
+
+        if formatted_results:
+            tier['text_found'] += 1
+        if dates:
+            tier['date_found'] += 1
+        if tier_index > 0:
+            # 升级尝试：只有读出了前面策略没有读到的日期才算有效
+            tier['escalations'] += 1
+            if dates - seen_dates:
+                tier['escalation_new_date'] += 1
+        seen_dates.update(dates)
+
+        try:
+            accepted = bool(self.acceptance_predicate(formatted_results, date_infos))
+        except Exception as e:
+            logger.warning(f"验收条件执行失败: {e}")
+            accepted = bool(formatted_results)
+
+        if accepted:
+            tier['accepted'] += 1
+        return accepted
+
+    def _race_strategies(self, image, strategies: List[str], timeout_seconds: int,
+                         temp_files: List[str], start_time: float):
+        """竞速模式处理单个图片
+
+        按开销从小到大依次OCR（共享同一个reader，仍为串行），后续策略的预处理在空闲线程中提前进行；
+        任一策略通过验收（默认为识别出日期）即返回，所有策略共享一个总时限
+
+        Args:
+            image: 图片路径(str)或图像数组(numpy.ndarray)
+            strategies: 按优先级排序的策略列表
+            timeout_seconds: 基础超时时间(秒)
+            temp_files: 临时文件列表，预处理产生的临时文件会加入其中
+            start_time: 本次识别的开始时间
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        # 从开销最小的策略开始，较重的策略只在前面的策略没有识别出日期时才需要
+        cost_order = PREPROCESS_STRATEGIES
+        strategies = sorted(strategies, key=lambda s: cost_order.index(s) if s in cost_order else len(cost_order))
+        logger.debug(f"竞速顺序: {' → '.join(strategies)}")
+
+        deadline = start_time + self.race_deadline
+        fallback_results = None
+        seen_dates = set()
+        executor = ThreadPoolExecutor(max_workers=max(1, self.race_preprocess_workers),
+                                      thread_name_prefix="ocr-race")
+        preprocess_futures = [executor.submit(self._preprocess, image, strategy) for strategy in strategies]
+        consumed = set()
+
+        try:
+            for i, strategy in enumerate(strategies):
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    with self._stats_lock:
+                        self.stats['race']['deadline_hits'] += 1
+                    logger.debug(f"已达到总时限 ({self.race_deadline}秒)，停止尝试后续策略")
+                    break
+
+                strategy_start = time.time()
+                try:
+                    processed, is_temp, preprocess_time = preprocess_futures[i].result(timeout=remaining)
+                except Exception as e:
+                    logger.warning(f"{strategy}策略预处理失败: {e}")
+                    continue
+
+                # 只有实际用于OCR的预处理计入策略使用次数和预处理耗时
+                consumed.add(i)
+                if is_temp:
+                    temp_files.append(processed)
+                if preprocess_time is not None:
+                    self._record_preprocessing(strategy, preprocess_time)
+
+                current_timeout = min(self._get_strategy_timeout(strategy, timeout_seconds),
+                                      max(1, int(deadline - time.time())))
+                logger.debug(f"[竞速] 尝试{strategy}策略 (超时: {current_timeout}秒)...")
+
+                result = self._execute_ocr_with_timeout(processed, current_timeout)
+                formatted_results = self._format_results(result) if result and result[0] else []
+                strategy_time = time.time() - strategy_start
+
+                if self._evaluate_tier(strategy, i, formatted_results, seen_dates):
+                    self.stats['success_count'] += 1
+                    self.stats['ocr_time'] += strategy_time
+                    with self._stats_lock:
+                        self.stats['race']['early_exits'] += 1
+                    logger.debug(f"{strategy}策略通过验收: 找到 {len(formatted_results)} 个文本 "
+                          f"(策略耗时: {strategy_time:.2f}秒, 总耗时: {time.time() - start_time:.2f}秒)")
+                    return [formatted_results]
+
+                if formatted_results and fallback_results is None:
+                    # 有文本但没有日期，保留作为最终的兜底结果
+                    fallback_results = formatted_results
+                logger.debug(f"{strategy}策略未通过验收 (耗时: {strategy_time:.2f}秒)")
+
+        finally:
+            # 取消尚未开始的预处理；进行中的预处理不等待，完成后由回调回收临时文件并计入丢弃统计
+            executor.shutdown(wait=False, cancel_futures=True)
+            for i, future in enumerate(preprocess_futures):
+                if i not in consumed:
+                    future.add_done_callback(self._discard_speculative)
+
+        processing_time = time.time() - start_time
+        if fallback_results:
+            self.stats['success_count'] += 1
+            logger.info(f"所有策略均未通过验收，返回首个文本结果 (总耗时: {processing_time:.2f}秒)")
+            return [fallback_results]
+
+        logger.warning(f"所有策略都失败 (总耗时: {processing_time:.2f}秒)")
+        return [[]]
+
+    def _discard_speculative(self, future):
+        """回收未用于OCR的提前预处理结果：删除临时文件，耗时计入竞速统计"""
+        if future.cancelled() or future.exception() is not None:
+            return
+        processed, is_temp, processing_time = future.result()
+        if is_temp:
+            try:
+                os.unlink(processed)
+            except OSError:
+                pass
+        if processing_time is not None:
+            with self._stats_lock:
+                self.stats['race']['speculative_discarded'] += 1
+                self.stats['race']['discarded_preprocessing_time'] += processing_time
+
+    def ocr(self, image, timeout_seconds=None, image_context: Optional[ImageContext] = None):
         """增强版多策略OCR识别
 
         实施三级处理策略:
         1. 标准处理: 快速预处理 + 标准超时
         2. 增强处理: 图像增强 + 中等超时
         3. 激进处理: 激进增强 + 长超时
+
+        Args:
+            image: 图片路径(str)或图像数组(numpy.ndarray)
+            timeout_seconds: 基础超时时间，None表示按图片大小动态计算
+            image_context: 图像上下文，由调用方传入时复用其中已解码的图像、文件状态和哈希
         """
         start_time = time.time()
         self.stats['total_processed'] += 1
@@ -542,53 +1141,81 @@ class OptimizedPaddleOCREngine:
 
         # 如果处理文件过多，强制清理
         if self._process_count > 100:
-            print("🔧 处理文件过多，执行强制清理...")
+            logger.info("处理文件过多，执行强制清理...")
             self._force_cleanup()
             self._process_count = 0
 
-        # 处理输入
-        if isinstance(image, str):
-            image_path = image
-        else:
-            # 图像数组，保存为临时文件
-            temp_fd, image_path = tempfile.mkstemp(suffix='.jpg')
-            os.close(temp_fd)
-            cv2.imwrite(image_path, image)
+        image_path = image if isinstance(image, str) else None
+
+        # 构建本次请求的图像上下文，各阶段共享同一份解码结果
+        if image_context is None:
+            if image_path:
+                image_context = ImageContext(image_path=image_path)
+            else:
+                image_context = ImageContext.from_array(image)
 
-        # 检查缓存
-        if self.cache_manager and isinstance(image, str):  # 只对文件路径启用缓存
-            cached_result = self.cache_manager.get_cached_result(image_path)
+        # 检查缓存（调用方已查询过且未命中时跳过）
+        if self.cache_manager and image_path and not image_context.cache_checked:  # 只对文件路径启用缓存
+            with self.tracer.span('cache', op='get') as span:
+                cached_result = self.cache_manager.get_cached_result(image_path, image_context=image_context)
+                span.set_label('hit', bool(cached_result))
             if cached_result:
                 processing_time = time.time() - start_time
-                print(f"⚡ 缓存命中，跳过OCR处理 (缓存查询耗时: {processing_time:.3f}秒)")
+                logger.debug(f"缓存命中，跳过OCR处理 (缓存查询耗时: {processing_time:.3f}秒)")
                 return cached_result['ocr_results']
 
+        # 处理输入
+        temp_files = []
+        if self.in_memory_pipeline:
+            # 内存流水线：图片只解码一次，后续各阶段直接传递数组
+            if image_path:
+                with self.tracer.span('load'):
+                    pipeline_input = image_context.bgr
+                if pipeline_input is None:
+                    logger.warning(f"无法解码图片: {image_path}")
+                    return [[]]
+            else:
+                pipeline_input = image
+        elif image_path:
+            pipeline_input = image_path
+        else:
+            # 图像数组，保存为临时文件
+            temp_fd, pipeline_input = tempfile.mkstemp(suffix='.jpg')
+            os.close(temp_fd)
+            cv2.imwrite(pipeline_input, image)
+            temp_files.append(pipeline_input)
+
         # 动态计算基础超时时间
-        base_timeout = self._calculate_dynamic_timeout(image_path)
+        base_timeout = self._calculate_dynamic_timeout(image_context.size)
         if timeout_seconds is None:
             timeout_seconds = base_timeout
 
-        temp_files = []
         strategies = ["standard", "enhanced", "aggressive"]
 
-        print(f"开始多策略OCR识别 (基础超时: {timeout_seconds}秒)...")
+        logger.debug(f"开始多策略OCR识别 (基础超时: {timeout_seconds}秒)...")
 
         try:
             # 首先尝试ROI检测优化
-            roi_paths, used_roi = self._process_with_roi_detection(image_path, use_roi=True)
+            roi_paths, used_roi = self._process_with_roi_detection(pipeline_input, use_roi=True,
+                                                                   image_context=image_context)
+            if used_roi and not self.in_memory_pipeline:
+                temp_files.extend(roi_paths)
 
             if used_roi and len(roi_paths) > 1:
                 # 使用ROI检测结果进行并行处理
                 result = self._process_roi_regions(roi_paths, timeout_seconds, temp_files, start_time)
             else:
                 # 使用传统的多策略处理
-                result = self._process_with_strategies(image_path, strategies, timeout_seconds, temp_files, start_time)
+                result = self._process_with_strategies(pipeline_input, strategies, timeout_seconds, temp_files,
+                                                       start_time, image_context=image_context)
 
             # 保存成功结果到缓存
-            if result and result[0] and self.cache_manager and isinstance(image, str):
+            if result and result[0] and self.cache_manager and image_path:
                 processing_time = time.time() - start_time
                 strategy_used = "roi" if used_roi else "traditional"
-                self.cache_manager.save_result(image_path, result, processing_time, strategy_used)
+                with self.tracer.span('cache', op='save'):
+                    self.cache_manager.save_result(image_path, result, processing_time, strategy_used,
+                                                   image_context=image_context)
 
             return result
             
@@ -599,71 +1226,11 @@ class OptimizedPaddleOCREngine:
                     os.unlink(temp_file)
                 except:
                     pass
-            
-            # 如果原始输入不是文件路径，清理临时文件
-            if not isinstance(image, str):
-                try:
-                    os.unlink(image_path)
-                except:
-                    pass
     
     def _format_results(self, results):
         """格式化OCR结果"""
-        formatted_results = []
-
-        try:
-            if results and len(results) > 0:
-                # 处理PaddleOCR的标准返回格式
-                if isinstance(results[0], list):
-                    # 标准PaddleOCR格式: [[[bbox], (text, confidence)], ...]
-                    for line in results[0]:
-                        try:
-                            if len(line) >= 2:
-                                bbox = line[0]
-                                text_info = line[1]
-
-                                if isinstance(text_info, (list, tuple)) and len(text_info) >= 2:
-                                    text = str(text_info[0]).strip()
-                                    confidence = float(text_info[1])
-
-                                    # 降低置信度阈值以提高召回率
-                                    if confidence > 0.2 and len(text) > 0:
-                                        if hasattr(bbox, 'tolist'):
-                                            bbox = bbox.tolist()
-                                        formatted_results.append([bbox, (text, confidence)])
-                        except Exception as e:
-                            print(f"   ⚠️ 格式化单行结果失败: {e}")
-                            continue
-
-                # 处理其他可能的格式
-                elif isinstance(results[0], dict) and 'rec_texts' in results[0]:
-                    ocr_result = results[0]
-                    texts = ocr_result['rec_texts']
-                    scores = ocr_result.get('rec_scores', [])
-                    polys = ocr_result.get('rec_polys', [])
-
-                    for i in range(len(texts)):
-                        try:
-                            text = str(texts[i]).strip()
-                            confidence = float(scores[i]) if i < len(scores) else 0.5
-
-                            if confidence > 0.2 and len(text) > 0:
-                                bbox = polys[i] if i < len(polys) else [[0,0],[0,0],[0,0],[0,0]]
-                                if hasattr(bbox, 'tolist'):
-                                    bbox = bbox.tolist()
-                                formatted_results.append([bbox, (text, confidence)])
-                        except Exception as e:
-                            continue
-
-                else:
-                    print(f"   ⚠️ 未知的结果格式: {type(results[0])}")
-
-        except Exception as e:
-            print(f"   ❌ 结果格式化失败: {e}")
-            import traceback
-            traceback.print_exc()
-
-        return formatted_results
+        with self.tracer.span('format'):
+            return format_ocr_results(results)
 
     def get_stats(self):
         """获取性能统计信息"""
@@ -679,9 +1246,23 @@ class OptimizedPaddleOCREngine:
             'avg_roi_time': f"{(self.stats['roi_time']/total):.2f}s" if total > 0 else "0s",
             'roi_regions_detected': self.stats['roi_regions_detected'],
             'avg_roi_regions': f"{(self.stats['roi_regions_detected']/total):.1f}" if total > 0 else "0",
-            'strategy_usage': self.stats['strategy_usage'].copy()
+            'strategy_usage': self.stats['strategy_usage'].copy(),
+            'strategy_mode': self.strategy_mode,
+            'race': self.stats['race'].copy(),
+            'tier_stats': self._get_tier_stats(),
+            'mosaic': self.stats['mosaic'].copy()
         }
 
+        # OCR调用统计：超时后取消的次数与完成的次数
+        if self._ocr_supervisor is not None:
+            stats['timeout_mode'] = 'subprocess'
+            stats['ocr_attempts'] = self._ocr_supervisor.get_metrics()
+        else:
+            self._orphaned_threads = [t for t in self._orphaned_threads if t.is_alive()]
+            stats['timeout_mode'] = 'thread'
+            stats['ocr_attempts'] = dict(self.stats['ocr_attempts'],
+                                         orphaned_threads_alive=len(self._orphaned_threads))
+
         # 添加缓存统计
         if self.cache_manager:
             cache_stats = self.cache_manager.get_cache_stats()
@@ -691,19 +1272,35 @@ class OptimizedPaddleOCREngine:
                 'cache_total_requests': cache_stats['total_requests'],
                 'cache_hits': cache_stats['cache_hits'],
                 'cache_count': cache_stats['cache_count'],
-                'cache_size': cache_stats['cache_size_mb']
+                'cache_size': cache_stats['cache_size_mb'],
+                'cache_fingerprint': cache_stats['fingerprint']
             })
         else:
             stats['cache_enabled'] = False
 
+        # 各阶段耗时直方图
+        if self.tracer.enabled:
+            stats['tracing'] = self.tracer.to_dict()
+
         return stats
 
+    def _get_tier_stats(self) -> Dict[str, Dict]:
+        """获取分级策略统计，escalation_help_rate 表示升级到该策略后读出新日期的比例"""
+        tier_stats = {}
+        for strategy, tier in self.stats['tier_stats'].items():
+            tier_stats[strategy] = dict(tier)
+            tier_stats[strategy]['escalation_help_rate'] = (
+                f"{(tier['escalation_new_date'] / tier['escalations'] * 100):.1f}%"
+                if tier['escalations'] > 0 else "0%"
+            )
+        return tier_stats
+
     def get_engine_info(self) -> Dict:
         """获取引擎信息 - 兼容原有接口"""
         stats = self.get_stats()
         return {
             'engine_type': 'OptimizedPaddleOCR',
-            'version': '4.0',
+            'version': ENGINE_VERSION,
             'features': [
                 '100%识别率',
                 '智能缓存机制',
@@ -715,38 +1312,36 @@ class OptimizedPaddleOCREngine:
             'available_engines': ['optimized_paddleocr', 'paddleocr']
         }
 
-    def recognize_text(self, image_input, **kwargs) -> List:
-        """识别文本 - 兼容原有接口
+    def warmup(self, test_image: Optional[np.ndarray] = None):
+        """预热OCR引擎：对一张小图直接执行一次OCR推理，加载检测/识别模型
+
+        不经过缓存和多策略流程，推理出错或超时时抛出异常而不是返回空结果
 
         Args:
-            image_input: 可以是图像路径(str)或图像数据(numpy.ndarray)
-        """
-        try:
-            # 处理不同类型的输入
-            if isinstance(image_input, str):
-                # 字符串路径，直接调用OCR方法
-                ocr_results = self.ocr(image_input, **kwargs)
-            else:
-                # 图像数据，需要保存为临时文件
-                import tempfile
-                import cv2
+            test_image: 测试图像，为None时使用带黑色文本区域的白底图
 
-                with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as temp_file:
-                    temp_path = temp_file.name
+        Raises:
+            OCREngineError: 预热推理失败或超时
+        """
+        if test_image is None:
+            test_image = np.full((64, 256, 3), 255, dtype=np.uint8)
+            test_image[20:44, 40:216] = 0
 
-                try:
-                    # 保存图像数据到临时文件
-                    cv2.imwrite(temp_path, image_input)
+        start_time = time.time()
+        if self._execute_ocr_with_timeout(test_image, self._calculate_dynamic_timeout(test_image)) is None:
+            raise OCREngineError("OCR引擎预热失败: 推理出错或超时")
+        logger.info(f"OCR引擎预热完成，耗时: {time.time() - start_time:.3f}秒")
 
-                    # 调用OCR方法
-                    ocr_results = self.ocr(temp_path, **kwargs)
+    def recognize_text(self, image_input, image_context: Optional[ImageContext] = None, **kwargs) -> List:
+        """识别文本 - 兼容原有接口
 
-                finally:
-                    # 清理临时文件
-                    try:
-                        os.unlink(temp_path)
-                    except:
-                        pass
+        Args:
+            image_input: 可以是图像路径(str)或图像数据(numpy.ndarray)
+            image_context: 调用方已创建的图像上下文（可选）
+        """
+        try:
+            # ocr方法同时支持路径和图像数组，数组输入在内存流水线下不再落盘
+            ocr_results = self.ocr(image_input, image_context=image_context, **kwargs)
 
             # 转换为兼容格式
             if ocr_results and len(ocr_results) > 0 and ocr_results[0]:
@@ -767,9 +1362,7 @@ class OptimizedPaddleOCREngine:
                 return []
 
         except Exception as e:
-            print(f"识别文本时出错: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.warning(f"识别文本时出错: {e}", exc_info=True)
             return []
 
     def cleanup(self):
@@ -780,12 +1373,15 @@ class OptimizedPaddleOCREngine:
                 self._ocr_instance = None
 
             if hasattr(self, 'cache_manager') and self.cache_manager is not None:
-                # 缓存管理器有自己的清理机制
-                pass
+                # 写回未保存的访问记录并关闭数据库连接
+                self.cache_manager.close()
 
-            print("✅ 优化OCR引擎资源已清理")
+            if getattr(self, '_ocr_supervisor', None) is not None:
+                self._ocr_supervisor.close()
+
+            logger.info("优化OCR引擎资源已清理")
         except Exception as e:
-            print(f"⚠️ 清理资源时出错: {e}")
+            logger.warning(f"清理资源时出错: {e}")
 
     def _check_memory_usage(self):
         """检查内存使用情况"""
@@ -796,11 +1392,11 @@ class OptimizedPaddleOCREngine:
             memory_mb = memory_info.rss / 1024 / 1024
 
             if memory_mb > 800:  # 提高警告阈值到800MB
-                print(f"⚠️ 内存使用较高: {memory_mb:.1f}MB")
+                logger.warning(f"内存使用较高: {memory_mb:.1f}MB")
 
                 # 如果超过1200MB，强制清理
                 if memory_mb > 1200:
-                    print("🔧 内存使用过高，执行清理...")
+                    logger.warning("内存使用过高，执行清理...")
                     self._force_cleanup()
 
                 # 只在内存真的很高时才执行轻量级清理
@@ -812,14 +1408,22 @@ class OptimizedPaddleOCREngine:
             # psutil未安装，跳过内存监控
             pass
         except Exception as e:
-            print(f"内存监控失败: {e}")
+            logger.warning(f"内存监控失败: {e}")
 
     def _force_cleanup(self):
         """强制清理内存"""
         try:
+            # 子进程模式：重启OCR子进程即可释放其内存
+            if self._ocr_supervisor is not None:
+                self._ocr_supervisor.restart()
+                import gc
+                gc.collect()
+                logger.info("OCR子进程已回收，将在下次识别时重启")
+                return
+
             # 清理OCR实例
             if hasattr(self, 'reader') and self.reader is not None:
-                print("🔧 清理PaddleOCR实例...")
+                logger.debug("清理PaddleOCR实例...")
                 del self.reader
                 self.reader = None
 
@@ -827,24 +1431,23 @@ class OptimizedPaddleOCREngine:
             import gc
             collected = gc.collect()
 
-            print(f"✅ 强制内存清理完成 (回收 {collected} 个对象)")
+            logger.info(f"强制内存清理完成 (回收 {collected} 个对象)")
 
             # 重新初始化OCR实例
             try:
                 from paddleocr import PaddleOCR
                 self.reader = PaddleOCR(
-                    use_angle_cls=True,
-                    lang='ch',
-                    show_log=False  # 减少日志输出
+                    show_log=False,  # 减少日志输出
+                    **self.reader_options
                 )
-                print("✅ PaddleOCR实例重新初始化完成")
+                logger.info("PaddleOCR实例重新初始化完成")
             except Exception as e:
-                print(f"⚠️ PaddleOCR重新初始化失败: {e}")
+                logger.warning(f"PaddleOCR重新初始化失败: {e}")
                 # 如果重新初始化失败，设置为None避免后续调用错误
                 self.reader = None
 
         except Exception as e:
-            print(f"强制清理失败: {e}")
+            logger.warning(f"强制清理失败: {e}")
 
     def __del__(self):
         """析构函数"""
@@ -855,12 +1458,40 @@ class OptimizedPaddleOCREngine:
 
     def reset_stats(self):
         """重置统计信息"""
-        self.stats = {
-            'total_processed': 0,
-            'success_count': 0,
-            'preprocessing_time': 0,
-            'ocr_time': 0,
-            'roi_time': 0,
-            'roi_regions_detected': 0,
-            'strategy_usage': {'standard': 0, 'enhanced': 0, 'aggressive': 0}
-        }
+        with self._stats_lock:
+            self.stats = {
+                'total_processed': 0,
+                'success_count': 0,
+                'preprocessing_time': 0,
+                'ocr_time': 0,
+                'roi_time': 0,
+                'roi_regions_detected': 0,
+                'strategy_usage': {'standard': 0, 'enhanced': 0, 'aggressive': 0},
+                'ocr_attempts': {'completed': 0, 'timed_out': 0, 'errors': 0},
+                'race': {'early_exits': 0, 'deadline_hits': 0, 'speculative_discarded': 0,
+                         'discarded_preprocessing_time': 0.0},
+                'tier_stats': {},
+                'mosaic': {'calls': 0, 'images': 0}
+            }
+
+
+def create_ocr_cache_manager(config: Optional[Dict] = None) -> Optional[CacheManager]:
+    """创建与 OptimizedPaddleOCREngine 使用相同指纹的缓存管理器，不加载OCR模型
+
+    用于只解析日期、OCR在其他进程中执行的场景（如进程池模式下的主进程）
+
+    Args:
+        config: 配置字典，如果为None则使用全局配置
+
+    Returns:
+        缓存管理器，初始化失败时返回None
+    """
+    if config is None:
+        config = get_config().config
+    try:
+        return create_cache_manager(
+            config, fingerprint=OptimizedPaddleOCREngine._cache_fingerprint(config.get('ocr', {}))
+        )
+    except Exception as e:
+        logger.warning(f"缓存管理器初始化失败: {e}")
+        return None
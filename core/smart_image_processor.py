@@ -6,8 +6,12 @@ import cv2
 import numpy as np
 import tempfile
 import os
+import logging
 from typing import Tuple, List, Optional
 
+logger = logging.getLogger(__name__)
+
+
 class SmartImageProcessor:
     """智能图片预处理器"""
     
@@ -16,6 +20,65 @@ class SmartImageProcessor:
         self.max_size = 1280  # 最大图片尺寸
         self.min_size = 300   # 最小图片尺寸
     
+    def auto_resize_array(self, img: np.ndarray) -> Tuple[np.ndarray, bool]:
+        """自动调整图片尺寸（内存版本）
+
+        Returns:
+            (调整后的图像数组, 是否发生了缩放)
+        """
+        height, width = img.shape[:2]
+
+        # 如果图片尺寸合适，直接返回
+        if width <= self.max_size and height <= self.max_size and width >= self.min_size and height >= self.min_size:
+            return img, False
+
+        # 计算缩放比例
+        if width > self.max_size or height > self.max_size:
+            # 缩小大图片
+            scale = min(self.max_size / width, self.max_size / height)
+        else:
+            # 放大小图片
+            scale = max(self.min_size / width, self.min_size / height)
+
+        if scale == 1.0:
+            return img, False
+
+        new_width = int(width * scale)
+        new_height = int(height * scale)
+
+        # 缩放图片
+        resized_img = cv2.resize(img, (new_width, new_height),
+                                 interpolation=cv2.INTER_CUBIC if scale > 1 else cv2.INTER_AREA)
+
+        logger.debug(f"图片自动调整: {width}x{height} → {new_width}x{new_height} (缩放: {scale:.2f})")
+        return resized_img, True
+
+    def enhance_array(self, img: np.ndarray, method: str = "standard") -> np.ndarray:
+        """针对OCR优化图片质量（内存版本）
+
+        Returns:
+            增强后的灰度图像数组
+        """
+        # 转换为灰度图
+        if len(img.shape) == 3:
+            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        else:
+            gray = img
+
+        if method == "standard":
+            enhanced = self._standard_enhancement(gray)
+        elif method == "aggressive":
+            enhanced = self._aggressive_enhancement(gray)
+        elif method == "super_aggressive":
+            enhanced = self._super_aggressive_enhancement(gray)
+        elif method == "gentle":
+            enhanced = self._gentle_enhancement(gray)
+        else:
+            enhanced = gray
+
+        logger.debug(f"图片增强完成: {method}方法")
+        return enhanced
+
     def auto_resize(self, image_path: str) -> Tuple[str, bool]:
         """自动调整图片尺寸"""
         try:
@@ -23,40 +86,18 @@ class SmartImageProcessor:
             if img is None:
                 return image_path, False
             
-            height, width = img.shape[:2]
-            
-            # 如果图片尺寸合适，直接返回
-            if width <= self.max_size and height <= self.max_size and width >= self.min_size and height >= self.min_size:
+            resized_img, changed = self.auto_resize_array(img)
+            if not changed:
                 return image_path, False
             
-            # 计算缩放比例
-            if width > self.max_size or height > self.max_size:
-                # 缩小大图片
-                scale = min(self.max_size / width, self.max_size / height)
-            else:
-                # 放大小图片
-                scale = max(self.min_size / width, self.min_size / height)
-            
-            new_width = int(width * scale)
-            new_height = int(height * scale)
-            
-            # 缩放图片
-            if scale != 1.0:
-                resized_img = cv2.resize(img, (new_width, new_height), 
-                                       interpolation=cv2.INTER_CUBIC if scale > 1 else cv2.INTER_AREA)
-                
-                # 保存到临时文件
-                temp_fd, temp_path = tempfile.mkstemp(suffix='.jpg')
-                os.close(temp_fd)
-                cv2.imwrite(temp_path, resized_img, [cv2.IMWRITE_JPEG_QUALITY, 95])
-                
-                print(f"图片自动调整: {width}x{height} → {new_width}x{new_height} (缩放: {scale:.2f})")
-                return temp_path, True
-            
-            return image_path, False
+            # 保存到临时文件
+            temp_fd, temp_path = tempfile.mkstemp(suffix='.jpg')
+            os.close(temp_fd)
+            cv2.imwrite(temp_path, resized_img, [cv2.IMWRITE_JPEG_QUALITY, 95])
+            return temp_path, True
             
         except Exception as e:
-            print(f"图片尺寸调整失败: {e}")
+            logger.warning(f"图片尺寸调整失败: {e}")
             return image_path, False
     
     def enhance_for_ocr(self, image_path: str, method: str = "standard") -> Tuple[str, bool]:
@@ -66,33 +107,17 @@ class SmartImageProcessor:
             if img is None:
                 return image_path, False
             
-            # 转换为灰度图
-            if len(img.shape) == 3:
-                gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            else:
-                gray = img
-            
-            if method == "standard":
-                enhanced = self._standard_enhancement(gray)
-            elif method == "aggressive":
-                enhanced = self._aggressive_enhancement(gray)
-            elif method == "super_aggressive":
-                enhanced = self._super_aggressive_enhancement(gray)
-            elif method == "gentle":
-                enhanced = self._gentle_enhancement(gray)
-            else:
-                enhanced = gray
+            enhanced = self.enhance_array(img, method)
             
             # 保存增强后的图片
             temp_fd, temp_path = tempfile.mkstemp(suffix='.jpg')
             os.close(temp_fd)
             cv2.imwrite(temp_path, enhanced)
             
-            print(f"图片增强完成: {method}方法")
             return temp_path, True
             
         except Exception as e:
-            print(f"图片增强失败: {e}")
+            logger.warning(f"图片增强失败: {e}")
             return image_path, False
     
     def _standard_enhancement(self, gray_img):
@@ -203,7 +228,7 @@ class SmartImageProcessor:
             return bboxes
             
         except Exception as e:
-            print(f"文本区域检测失败: {e}")
+            logger.warning(f"文本区域检测失败: {e}")
             return []
     
     def crop_text_regions(self, image_path: str, padding: int = 20) -> List[str]:
@@ -236,11 +261,11 @@ class SmartImageProcessor:
                 cv2.imwrite(temp_path, cropped)
                 cropped_paths.append(temp_path)
             
-            print(f"裁剪了 {len(cropped_paths)} 个文本区域")
+            logger.debug(f"裁剪了 {len(cropped_paths)} 个文本区域")
             return cropped_paths
             
         except Exception as e:
-            print(f"文本区域裁剪失败: {e}")
+            logger.warning(f"文本区域裁剪失败: {e}")
             return []
     
     def process_with_multiple_methods(self, image_path: str) -> List[Tuple[str, str]]:
@@ -276,7 +301,7 @@ class SmartImageProcessor:
                     os.unlink(temp_file)
                 except:
                     pass
-            print(f"多方法处理失败: {e}")
+            logger.warning(f"多方法处理失败: {e}")
             return [(image_path, "原始")]
     
     def cleanup_temp_files(self, file_paths: List[str]):
@@ -7,8 +7,12 @@ import cv2
 import numpy as np
 import tempfile
 import os
+import logging
 from typing import List, Tuple, Optional
 
+logger = logging.getLogger(__name__)
+
+
 class SmartROIDetector:
     """智能ROI(感兴趣区域)检测器"""
     
@@ -32,8 +36,30 @@ class SmartROIDetector:
             if img is None:
                 return []
             
+            return self.detect_text_regions_array(img)
+            
+        except Exception as e:
+            logger.warning(f"文本区域检测失败: {e}")
+            return []
+    
+    def detect_text_regions_array(self, img: np.ndarray,
+                                  gray: Optional[np.ndarray] = None) -> List[Tuple[int, int, int, int]]:
+        """检测图像数组中的文本区域（内存版本）
+        
+        Args:
+            img: 输入图像数组
+            gray: 已计算好的灰度图（可选，避免重复转换）
+        
+        Returns:
+            List of (x, y, width, height) tuples representing text regions
+        """
+        try:
             # 转换为灰度图
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+            if gray is None:
+                if len(img.shape) == 3:
+                    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+                else:
+                    gray = img
             
             # 使用多种方法检测文本区域
             regions = []
@@ -57,11 +83,11 @@ class SmartROIDetector:
             sorted_regions = self._sort_regions_by_importance(filtered_regions, img.shape[:2])
             final_regions = sorted_regions[:self.max_regions]
 
-            print(f"检测到 {len(regions)} 个原始区域，过滤后 {len(filtered_regions)} 个，最终选择 {len(final_regions)} 个")
+            logger.debug(f"检测到 {len(regions)} 个原始区域，过滤后 {len(filtered_regions)} 个，最终选择 {len(final_regions)} 个")
             return final_regions
             
         except Exception as e:
-            print(f"文本区域检测失败: {e}")
+            logger.warning(f"文本区域检测失败: {e}")
             return []
     
     def _detect_with_mser(self, gray_img) -> List[Tuple[int, int, int, int]]:
@@ -97,7 +123,7 @@ class SmartROIDetector:
             return bboxes
             
         except Exception as e:
-            print(f"MSER检测失败: {e}")
+            logger.warning(f"MSER检测失败: {e}")
             return []
     
     def _detect_with_edges(self, gray_img) -> List[Tuple[int, int, int, int]]:
@@ -123,7 +149,7 @@ class SmartROIDetector:
             return bboxes
             
         except Exception as e:
-            print(f"边缘检测失败: {e}")
+            logger.warning(f"边缘检测失败: {e}")
             return []
     
     def _detect_with_morphology(self, gray_img) -> List[Tuple[int, int, int, int]]:
@@ -156,7 +182,7 @@ class SmartROIDetector:
             return bboxes
             
         except Exception as e:
-            print(f"形态学检测失败: {e}")
+            logger.warning(f"形态学检测失败: {e}")
             return []
     
     def _is_valid_text_region(self, width: int, height: int) -> bool:
@@ -279,42 +305,68 @@ class SmartROIDetector:
         sorted_regions = sorted(regions, key=calculate_importance, reverse=True)
         return sorted_regions
 
-    def crop_text_regions(self, image_path: str, padding: int = 20) -> List[str]:
-        """裁剪文本区域并保存为临时文件"""
+    def crop_text_regions_array(self, img: np.ndarray, padding: int = 20,
+                                gray: Optional[np.ndarray] = None) -> List[np.ndarray]:
+        """裁剪文本区域（内存版本）
+        
+        Args:
+            img: 输入图像数组
+            padding: 裁剪边距
+            gray: 已计算好的灰度图（可选）
+        
+        Returns:
+            裁剪后的图像数组列表，未检测到区域时返回只包含原图的列表
+        """
         try:
-            img = cv2.imread(image_path)
-            if img is None:
-                return []
-            
-            regions = self.detect_text_regions(image_path)
+            regions = self.detect_text_regions_array(img, gray)
             if not regions:
                 # 如果没有检测到区域，返回原图
-                return [image_path]
+                return [img]
             
-            cropped_paths = []
             height, width = img.shape[:2]
+            crops = []
             
-            for i, (x, y, w, h) in enumerate(regions):
+            for x, y, w, h in regions:
                 # 添加padding
                 x1 = max(0, x - padding)
                 y1 = max(0, y - padding)
                 x2 = min(width, x + w + padding)
                 y2 = min(height, y + h + padding)
                 
-                # 裁剪区域
-                cropped = img[y1:y2, x1:x2]
-                
+                # 裁剪区域（复制一份，避免后续处理修改原图）
+                crops.append(img[y1:y2, x1:x2].copy())
+            
+            logger.debug(f"裁剪了 {len(crops)} 个文本区域")
+            return crops
+            
+        except Exception as e:
+            logger.warning(f"文本区域裁剪失败: {e}")
+            return [img]  # 失败时返回原图
+    
+    def crop_text_regions(self, image_path: str, padding: int = 20) -> List[str]:
+        """裁剪文本区域并保存为临时文件"""
+        try:
+            img = cv2.imread(image_path)
+            if img is None:
+                return []
+            
+            crops = self.crop_text_regions_array(img, padding)
+            if len(crops) == 1 and crops[0] is img:
+                # 如果没有检测到区域，返回原图
+                return [image_path]
+            
+            cropped_paths = []
+            for i, cropped in enumerate(crops):
                 # 保存裁剪的图片
                 temp_fd, temp_path = tempfile.mkstemp(suffix=f'_roi_{i}.jpg')
                 os.close(temp_fd)
                 cv2.imwrite(temp_path, cropped, [cv2.IMWRITE_JPEG_QUALITY, 95])
                 cropped_paths.append(temp_path)
             
-            print(f"裁剪了 {len(cropped_paths)} 个文本区域")
             return cropped_paths
             
         except Exception as e:
-            print(f"文本区域裁剪失败: {e}")
+            logger.warning(f"文本区域裁剪失败: {e}")
             return [image_path]  # 失败时返回原图
     
     def get_stats(self) -> dict:
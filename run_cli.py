@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+商品包装生产日期识别系统命令行启动脚本
+
+无界面批量识别入口，参数说明见: python run_cli.py --help
+"""
+
+import sys
+from pathlib import Path
+
+def main():
+    """主函数"""
+    script_dir = Path(__file__).parent.resolve()
+    
+    # 添加项目根目录到Python路径
+    if str(script_dir) not in sys.path:
+        sys.path.insert(0, str(script_dir))
+    
+    # 命令行中的路径按当前目录解析，之后切换到项目目录运行
+    from v1.cli import main as run_main
+    sys.exit(run_main(project_dir=str(script_dir)))
+
+if __name__ == "__main__":
+    main()
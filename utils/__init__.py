@@ -15,7 +15,14 @@ __all__ = [
     'reload_config',
     'get_logger',
     'timing_decorator',
-    'PerformanceLogger'
+    'PerformanceLogger',
+    'FileScanner',
+    'create_file_scanner',
+    'Tracer',
+    'get_tracer',
+    'create_tracer',
+    'KeywordMatcher',
+    'create_keyword_matcher'
 ]
 
 def __getattr__(name):
@@ -26,4 +33,13 @@ def __getattr__(name):
     elif name in ['setup_logging', 'get_logger', 'timing_decorator', 'PerformanceLogger']:
         from .logger import setup_logging, get_logger, timing_decorator, PerformanceLogger
         return locals()[name]
+    elif name in ['FileScanner', 'create_file_scanner']:
+        from .file_scanner import FileScanner, create_file_scanner
+        return locals()[name]
+    elif name in ['Tracer', 'get_tracer', 'create_tracer']:
+        from .tracing import Tracer, get_tracer, create_tracer
+        return locals()[name]
+    elif name in ['KeywordMatcher', 'create_keyword_matcher']:
+        from .keyword_matcher import KeywordMatcher, create_keyword_matcher
+        return locals()[name]
     raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
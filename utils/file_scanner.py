@@ -0,0 +1,197 @@
+"""
+目录扫描模块
+
+基于 os.scandir 的图片文件扫描器:
+- 按扩展名预过滤文件名，只对候选文件调用 is_file()（DirEntry 缓存了目录项类型，通常无需额外stat）
+- 递归扫描时多个线程并行读取不同的子目录，网络共享目录上延迟可以相互重叠
+- 以目录为单位流式产出结果，调用方无需等待整个目录树扫描完成
+"""
+
+import os
+import queue
+import logging
+import threading
+from typing import List, Optional, Iterator, NamedTuple, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.webp']
+
+
+class ScanBatch(NamedTuple):
+    """一个目录的扫描结果"""
+    directory: str                  # 目录路径
+    entries: List[os.DirEntry]      # 目录中符合扩展名的文件（按名称排序）
+    subdirectory_count: int         # 发现的子目录数（递归扫描时会继续扫描）
+
+
+class FileScanner:
+    """并行目录扫描器"""
+
+    def __init__(self, extensions: Optional[List[str]] = None, max_workers: int = 8,
+                 queue_size: int = 64):
+        """初始化扫描器
+
+        Args:
+            extensions: 支持的文件扩展名，None时使用默认图片格式
+            max_workers: 递归扫描时的并行线程数，1表示在调用线程中顺序扫描
+            queue_size: 已扫描但尚未被调用方取走的目录数上限
+        """
+        if extensions is None:
+            extensions = DEFAULT_IMAGE_EXTENSIONS
+        self.extensions = frozenset(ext.lower() for ext in extensions)
+        self.max_workers = max(1, max_workers)
+        self.queue_size = queue_size
+
+    def iter_batches(self, root: str, recursive: bool = True) -> Iterator[ScanBatch]:
+        """逐个目录产出扫描结果
+
+        并行扫描时目录的产出顺序不固定
+
+        Args:
+            root: 根目录
+            recursive: 是否递归扫描子目录
+
+        Yields:
+            目录扫描结果
+        """
+        if not recursive or self.max_workers == 1:
+            yield from self._iter_sequential(root, recursive)
+        else:
+            yield from self._iter_parallel(root)
+
+    def iter_files(self, root: str, recursive: bool = True) -> Iterator[str]:
+        """逐个产出符合扩展名的文件路径（顺序不固定）
+
+        Args:
+            root: 根目录
+            recursive: 是否递归扫描子目录
+
+        Yields:
+            文件路径
+        """
+        for batch in self.iter_batches(root, recursive):
+            for entry in batch.entries:
+                yield entry.path
+
+    def scan(self, root: str, recursive: bool = True) -> List[str]:
+        """扫描并返回排序后的文件路径列表
+
+        Args:
+            root: 根目录
+            recursive: 是否递归扫描子目录
+
+        Returns:
+            文件路径列表
+        """
+        files = list(self.iter_files(root, recursive))
+        files.sort()
+        return files
+
+    def _scan_directory(self, directory: str, recursive: bool) -> Tuple[List[os.DirEntry], List[str]]:
+        """读取单个目录
+
+        Returns:
+            (符合扩展名的文件, 子目录路径列表)
+        """
+        files = []
+        subdirectories = []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        # 先判断目录: 名称带图片扩展名的目录（如 c.jpg/）同样需要递归
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                subdirectories.append(entry.path)
+                        elif (os.path.splitext(entry.name)[1].lower() in self.extensions
+                              and entry.is_file()):
+                            files.append(entry)
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.warning(f"无法读取目录: {directory}, 错误: {e}")
+
+        files.sort(key=lambda entry: entry.name)
+        return files, subdirectories
+
+    def _iter_sequential(self, root: str, recursive: bool) -> Iterator[ScanBatch]:
+        """在调用线程中按深度优先顺序扫描"""
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            files, subdirectories = self._scan_directory(directory, recursive)
+            stack.extend(sorted(subdirectories, reverse=True))
+            yield ScanBatch(directory, files, len(subdirectories))
+
+    def _iter_parallel(self, root: str) -> Iterator[ScanBatch]:
+        """多个线程从共享队列中取目录扫描，结果经有界队列交给调用方"""
+        directories = queue.Queue()
+        batches = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        lock = threading.Lock()
+        unfinished = [1]  # 已发现但尚未扫描完成的目录数
+
+        def put_batch(item):
+            # 调用方提前停止迭代时不再阻塞
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+
+        def worker():
+            while True:
+                directory = directories.get()
+                if directory is None or stop.is_set():
+                    return
+                files, subdirectories = self._scan_directory(directory, True)
+                with lock:
+                    unfinished[0] += len(subdirectories)
+                for subdirectory in subdirectories:
+                    directories.put(subdirectory)
+                put_batch(ScanBatch(directory, files, len(subdirectories)))
+                with lock:
+                    unfinished[0] -= 1
+                    finished = unfinished[0] == 0
+                if finished:
+                    put_batch(None)
+
+        threads = [threading.Thread(target=worker, daemon=True, name=f"FileScanner-{i}")
+                   for i in range(self.max_workers)]
+        directories.put(root)
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                batch = batches.get()
+                if batch is None:
+                    break
+                yield batch
+        finally:
+            stop.set()
+            for _ in threads:
+                directories.put(None)
+            for thread in threads:
+                thread.join()
+
+
+# 工厂函数
+def create_file_scanner(config: Optional[dict] = None) -> FileScanner:
+    """根据配置创建目录扫描器
+
+    Args:
+        config: 配置字典，如果为None则使用全局配置
+
+    Returns:
+        目录扫描器实例
+    """
+    if config is None:
+        from utils.config_loader import get_config
+        config = get_config().config
+
+    extensions = config.get('image_processing', {}).get('supported_formats', DEFAULT_IMAGE_EXTENSIONS)
+    max_workers = config.get('performance', {}).get('scan_workers', 8)
+    return FileScanner(extensions, max_workers)
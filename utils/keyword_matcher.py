@@ -0,0 +1,130 @@
+"""
+多关键词匹配模块
+
+Aho-Corasick 自动机: 所有关键词构建一次，对任意文本只扫描一遍即可找出全部关键词，
+耗时与文本长度成正比，与关键词数量无关。
+
+用法:
+    matcher = KeywordMatcher({'生产日期': 'production', '保质期至': 'expiry'})
+    matcher.find_all('生产日期2024.06.15')  # [(0, 4, '生产日期', 'production')]
+"""
+
+import logging
+from collections import deque
+from typing import Dict, List, Tuple, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+def _is_ascii_letter(char: str) -> bool:
+    return 'a' <= char <= 'z' or 'A' <= char <= 'Z'
+
+
+class KeywordMatcher:
+    """Aho-Corasick 多关键词匹配器"""
+
+    def __init__(self, keywords: Dict[str, str], whole_word: bool = True):
+        """初始化匹配器
+
+        Args:
+            keywords: 关键词 -> 类别
+            whole_word: 为True时英文关键词的前后不能紧接英文字母（避免 EXP 匹配到 EXPORT）
+        """
+        self.keywords = dict(keywords)
+        self.whole_word = whole_word
+
+        # goto[state]: 字符 -> 下一状态; fail[state]: 失配跳转; output[state]: 以该状态结尾的关键词
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+        for keyword in self.keywords:
+            if keyword:
+                self._add(keyword)
+        self._build_failure_links()
+
+    def _add(self, keyword: str):
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append(keyword)
+
+    def _build_failure_links(self):
+        """按广度优先计算失配指针，并把失配状态的输出合并到当前状态"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def iter_matches(self, text: str) -> Iterable[Tuple[int, int, str, str]]:
+        """扫描文本，按结束位置依次产出所有（可能重叠的）匹配
+
+        Args:
+            text: 待匹配文本（大小写敏感，调用方需先统一大小写）
+
+        Yields:
+            (起始位置, 结束位置, 关键词, 类别)
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for keyword in output[state]:
+                start, end = index + 1 - len(keyword), index + 1
+                if self.whole_word and not self._at_word_boundary(text, start, end, keyword):
+                    continue
+                yield start, end, keyword, self.keywords[keyword]
+
+    def find_all(self, text: str) -> List[Tuple[int, int, str, str]]:
+        """查找互不重叠的关键词，位置重叠时保留更靠前、更长的（保质期至 优先于 保质期）
+
+        Args:
+            text: 待匹配文本
+
+        Returns:
+            按起始位置排列的 (起始位置, 结束位置, 关键词, 类别) 列表
+        """
+        matches = sorted(self.iter_matches(text), key=lambda match: (match[0], -match[1]))
+        selected = []
+        covered = 0
+        for match in matches:
+            if match[0] >= covered:
+                selected.append(match)
+                covered = match[1]
+        return selected
+
+    @staticmethod
+    def _at_word_boundary(text: str, start: int, end: int, keyword: str) -> bool:
+        if _is_ascii_letter(keyword[0]) and start > 0 and _is_ascii_letter(text[start - 1]):
+            return False
+        if _is_ascii_letter(keyword[-1]) and end < len(text) and _is_ascii_letter(text[end]):
+            return False
+        return True
+
+
+def create_keyword_matcher(keywords: Dict[str, str], whole_word: bool = True) -> KeywordMatcher:
+    """创建多关键词匹配器
+
+    Args:
+        keywords: 关键词 -> 类别
+        whole_word: 英文关键词是否要求整词匹配
+
+    Returns:
+        匹配器实例
+    """
+    return KeywordMatcher(keywords, whole_word)
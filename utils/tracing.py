@@ -0,0 +1,307 @@
+"""
+阶段耗时追踪模块
+
+识别流水线各阶段（load/analyze/roi/preprocess/ocr/format/parse/cache）用 span 计时，
+耗时累计到固定分桶的直方图，可导出为 Prometheus 文本格式或 JSON。
+
+未启用时 span() 返回共享的空操作对象，开销只有一次属性判断。
+
+用法:
+    tracer = get_tracer()
+    with tracer.span('preprocess', strategy='enhanced'):
+        ...
+"""
+
+import json
+import time
+import logging
+import threading
+from typing import Dict, Any, Optional, Tuple, Sequence, Callable
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+# 直方图分桶上界(秒)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# 流水线阶段名称
+STAGES = ('load', 'analyze', 'roi', 'preprocess', 'ocr', 'format', 'parse', 'cache')
+
+
+class Histogram:
+    """固定分桶的耗时直方图（线程安全）"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个为 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, error: bool = False):
+        """记录一个耗时(秒)"""
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+            if error:
+                self.errors += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """按分桶估算分位数（桶内线性插值）"""
+        with self._lock:
+            if self.count == 0:
+                return None
+            target = q * self.count
+            cumulative = 0
+            lower = 0.0
+            for i, bucket_count in enumerate(self.counts):
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                if cumulative + bucket_count >= target and bucket_count > 0:
+                    fraction = (target - cumulative) / bucket_count
+                    return min(self.max, lower + (upper - lower) * fraction)
+                cumulative += bucket_count
+                lower = upper
+            return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            result = {
+                'count': self.count,
+                'errors': self.errors,
+                'sum': round(self.sum, 6),
+                'mean': round(self.sum / self.count, 6) if self.count else None,
+                'min': round(self.min, 6) if self.min is not None else None,
+                'max': round(self.max, 6) if self.max is not None else None,
+                'buckets': {str(bound): count for bound, count in zip(self.buckets, self.counts)},
+                'overflow': self.counts[-1]
+            }
+        for name, q in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99)):
+            value = self.quantile(q)
+            result[name] = round(value, 6) if value is not None else None
+        return result
+
+
+class _NoopSpan:
+    """未启用追踪时使用的空操作span"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+    def set_label(self, key: str, value: Any):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """一次阶段计时"""
+
+    __slots__ = ('tracer', 'name', 'labels', 'start', 'duration')
+
+    def __init__(self, tracer: 'Tracer', name: str, labels: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.labels = labels
+        self.start = 0.0
+        self.duration = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.duration = time.perf_counter() - self.start
+        self.tracer.observe(self.name, self.duration, error=exc_type is not None, **self.labels)
+        return False
+
+    def set_label(self, key: str, value: Any):
+        """在span结束前补充标签（例如执行后才知道的结果状态）"""
+        self.labels[key] = value
+
+
+class Tracer:
+    """阶段耗时追踪器"""
+
+    def __init__(self, enabled: bool = False, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """初始化追踪器
+
+        Args:
+            enabled: 是否启用
+            buckets: 直方图分桶上界(秒)
+        """
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **labels):
+        """创建阶段计时上下文
+
+        Args:
+            name: 阶段名称
+            **labels: 附加标签，不同标签值分别统计
+
+        Returns:
+            上下文管理器；未启用时为共享的空操作对象
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, labels)
+
+    def observe(self, name: str, seconds: float, error: bool = False, **labels):
+        """记录一个已测得的耗时
+
+        Args:
+            name: 阶段名称
+            seconds: 耗时(秒)
+            error: 该次执行是否出错
+            **labels: 附加标签
+        """
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(self.buckets))
+        histogram.observe(seconds, error)
+        if logger.isEnabledFor(logging.DEBUG):
+            label_text = ''.join(f" {k}={v}" for k, v in key[1])
+            logger.debug(f"[{name}{label_text}] {seconds * 1000:.1f}ms")
+
+    def traced(self, name: str, **labels) -> Callable:
+        """函数计时装饰器"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with Span(self, name, dict(labels)):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        """清空所有直方图"""
+        with self._lock:
+            self._histograms.clear()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """导出为字典: {'enabled', 'stages': [{name, labels, ...直方图统计}]}"""
+        with self._lock:
+            items = sorted(self._histograms.items())
+        return {
+            'enabled': self.enabled,
+            'stages': [
+                {'name': name, 'labels': dict(labels), **histogram.to_dict()}
+                for (name, labels), histogram in items
+            ]
+        }
+
+    def dump_json(self, output_path: str):
+        """将直方图写入JSON文件"""
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def export_prometheus(self, metric: str = 'ocr_stage_duration_seconds') -> str:
+        """导出为 Prometheus 文本格式
+
+        Args:
+            metric: 指标名称
+
+        Returns:
+            Prometheus exposition 格式文本
+        """
+        with self._lock:
+            items = sorted(self._histograms.items())
+
+        lines = [
+            f"# HELP {metric} 识别流水线各阶段耗时(秒)",
+            f"# TYPE {metric} histogram"
+        ]
+        for (name, labels), histogram in items:
+            base_labels = [f'stage="{name}"'] + [f'{key}="{_escape(value)}"' for key, value in labels]
+            with histogram._lock:
+                counts = list(histogram.counts)
+                total, count = histogram.sum, histogram.count
+            label_text = ','.join(base_labels)
+            cumulative = 0
+            for bound, bucket_count in zip(histogram.buckets, counts):
+                cumulative += bucket_count
+                lines.append('%s_bucket{%s,le="%s"} %d' % (metric, label_text, bound, cumulative))
+            lines.append('%s_bucket{%s,le="+Inf"} %d' % (metric, label_text, count))
+            lines.append(f"{metric}_sum{{{label_text}}} {total:.6f}")
+            lines.append(f"{metric}_count{{{label_text}}} {count}")
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# 全局追踪器
+_global_tracer = None
+_global_tracer_lock = threading.Lock()
+
+
+def create_tracer(config: Optional[Dict] = None) -> Tracer:
+    """根据配置创建追踪器
+
+    Args:
+        config: 配置字典，如果为None则使用全局配置
+
+    Returns:
+        追踪器实例
+    """
+    if config is None:
+        from utils.config_loader import get_config
+        config = get_config().config
+
+    tracing_config = config.get('tracing', {})
+    return Tracer(
+        enabled=tracing_config.get('enabled', False),
+        buckets=tracing_config.get('buckets') or DEFAULT_BUCKETS
+    )
+
+
+def get_tracer() -> Tracer:
+    """获取全局追踪器（首次调用时按全局配置创建）"""
+    global _global_tracer
+    if _global_tracer is None:
+        with _global_tracer_lock:
+            if _global_tracer is None:
+                _global_tracer = create_tracer()
+    return _global_tracer
+
+
+def enable_tracing(enabled: bool = True) -> Tracer:
+    """启用或停用全局追踪器
+
+    Args:
+        enabled: 是否启用
+
+    Returns:
+        全局追踪器
+    """
+    tracer = get_tracer()
+    tracer.enabled = enabled
+    return tracer
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+商品包装生产日期识别系统 命令行批处理
+
+无需GUI，对文件夹或文件列表执行批量识别，结果逐条写出为JSONL或CSV。
+输出文件同时作为进度记录: 使用 --resume 重新运行时跳过已写出的文件，
+适合由定时任务分多次处理大量归档图片。
+
+示例:
+    python run_cli.py /data/photos -o results.jsonl
+    python run_cli.py /data/photos -o results.csv --resume --workers 4
+    find /data -name '*.jpg' | python run_cli.py --file-list - -o results.jsonl
+"""
+
+import os
+import sys
+import copy
+import time
+import logging
+import argparse
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from utils.config_loader import ConfigLoader, get_config
+from utils.file_scanner import create_file_scanner
+from utils.logger import setup_logging
+from utils.tracing import enable_tracing
+from v1.handlers.batch_processor import ProcessingResult, create_batch_processor
+from v1.handlers.result_writer import ResultWriter, ResultWriterError, create_result_writer
+
+logger = logging.getLogger(__name__)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(
+        description="批量识别图片中的生产日期，结果逐条写出为JSONL或CSV",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('inputs', nargs='*', help='图片文件或文件夹')
+    parser.add_argument('--file-list', action='append', default=[],
+                        help='文件列表，每行一个路径，"-" 表示标准输入（可多次指定）')
+    parser.add_argument('-o', '--output', required=True, help='输出文件路径')
+    parser.add_argument('--format', choices=['jsonl', 'csv'],
+                        help='输出格式（默认根据输出文件扩展名判断）')
+    parser.add_argument('--resume', action='store_true',
+                        help='在已有输出文件上继续，跳过已写出的文件')
+    parser.add_argument('--no-recursive', action='store_true', help='不扫描子文件夹')
+    parser.add_argument('--chunk-size', type=int, default=500,
+                        help='每批提交给批量处理器的文件数（默认500）')
+    parser.add_argument('--trace', metavar='PATH',
+                        help='记录各阶段耗时并在结束时写出JSON直方图（进程模式下只包含主进程中的阶段）')
+
+    group = parser.add_argument_group('配置', '以下选项覆盖配置文件中的对应设置')
+    group.add_argument('--config', help='配置文件路径（默认 config/settings.yaml）')
+    group.add_argument('--workers', type=int, help='工作线程数 (performance.max_workers)')
+    group.add_argument('--execution-mode', choices=['thread', 'process'],
+                       help='执行模式 (performance.execution_mode)')
+    group.add_argument('--ocr-processes', type=int, help='OCR工作进程数 (performance.ocr_processes)')
+    group.add_argument('--no-result-cache', action='store_true',
+                       help='不使用进程内结果缓存 (performance.cache_enabled)')
+    group.add_argument('--cache-dir', help='OCR缓存目录 (cache.cache_dir)')
+    group.add_argument('--cache-backend', choices=['sqlite', 'remote'], help='OCR缓存后端 (cache.backend)')
+    group.add_argument('--cache-server', help='remote缓存服务地址 (cache.server_url)')
+    group.add_argument('--log-level', default='WARNING', help='日志级别（默认WARNING）')
+    return parser
+
+
+def load_config(args: argparse.Namespace) -> Dict[str, Any]:
+    """加载配置并应用命令行覆盖
+
+    Args:
+        args: 命令行参数
+
+    Returns:
+        配置字典
+    """
+    loader = ConfigLoader(args.config) if args.config else get_config()
+    config = copy.deepcopy(loader.config)
+
+    performance = config.setdefault('performance', {})
+    cache = config.setdefault('cache', {})
+    overrides = [
+        (performance, 'max_workers', args.workers),
+        (performance, 'execution_mode', args.execution_mode),
+        (performance, 'ocr_processes', args.ocr_processes),
+        (cache, 'cache_dir', args.cache_dir),
+        (cache, 'backend', args.cache_backend),
+        (cache, 'server_url', args.cache_server)
+    ]
+    for section, key, value in overrides:
+        if value is not None:
+            section[key] = value
+    if args.no_result_cache:
+        performance['cache_enabled'] = False
+    return config
+
+
+def iter_input_files(args: argparse.Namespace, config: Dict[str, Any]) -> Iterator[str]:
+    """按命令行顺序逐个产出待处理的文件路径（文件夹边扫描边产出）
+
+    Args:
+        args: 命令行参数
+        config: 配置字典
+
+    Yields:
+        文件路径
+    """
+    scanner = create_file_scanner(config)
+    recursive = not args.no_recursive
+
+    for input_path in args.inputs:
+        path = Path(input_path)
+        if path.is_dir():
+            yield from scanner.iter_files(str(path), recursive)
+        else:
+            yield str(path)
+
+    # 文件列表中的相对路径按启动时的工作目录解析（main 会切换到项目目录）
+    base_dir = getattr(args, 'base_dir', None) or os.getcwd()
+    for list_path in args.file_list:
+        stream = sys.stdin if list_path == '-' else open(list_path, 'r', encoding='utf-8')
+        try:
+            for line in stream:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    yield os.path.abspath(os.path.join(base_dir, line))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+
+def iter_chunks(file_paths: Iterator[str], writer: ResultWriter,
+                chunk_size: int, counters: Dict[str, int]) -> Iterator[List[str]]:
+    """跳过已完成的文件，按批产出待处理文件
+
+    Args:
+        file_paths: 文件路径迭代器
+        writer: 结果写出器（提供已完成文件集合）
+        chunk_size: 每批文件数
+        counters: 统计计数，累计跳过的文件数
+
+    Yields:
+        文件路径列表
+    """
+    chunk = []
+    seen = set()
+    for file_path in file_paths:
+        if writer.is_completed(file_path):
+            counters['skipped'] += 1
+            continue
+        if file_path in seen:
+            continue
+        seen.add(file_path)
+        chunk.append(file_path)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run(args: argparse.Namespace) -> int:
+    """执行批处理
+
+    Args:
+        args: 命令行参数
+
+    Returns:
+        退出码: 0=全部成功, 1=有文件识别失败, 2=运行出错
+    """
+    if not args.inputs and not args.file_list:
+        print("错误: 请指定图片文件、文件夹或 --file-list", file=sys.stderr)
+        return 2
+
+    config = load_config(args)
+    try:
+        writer = create_result_writer(args.output, args.format, args.resume)
+    except (ResultWriterError, OSError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 2
+
+    counters = {'processed': 0, 'successful': 0, 'failed': 0, 'skipped': 0}
+    start_time = time.time()
+    tracer = enable_tracing() if args.trace else None
+
+    def on_result(processing_result: ProcessingResult):
+        recognition_result = processing_result.result
+        writer.write(processing_result.file_path, recognition_result, processing_result.error)
+        counters['processed'] += 1
+        if recognition_result is not None and recognition_result.success:
+            counters['successful'] += 1
+        else:
+            counters['failed'] += 1
+
+    processor = create_batch_processor(config)
+    try:
+        with writer:
+            for chunk in iter_chunks(iter_input_files(args, config), writer,
+                                     max(1, args.chunk_size), counters):
+                processor.process_files(chunk, result_callback=on_result)
+                elapsed = time.time() - start_time
+                print(f"已处理 {counters['processed']} 个文件 (成功 {counters['successful']}, "
+                      f"失败 {counters['failed']}, 跳过 {counters['skipped']}), "
+                      f"耗时 {elapsed:.1f}秒", file=sys.stderr)
+    except KeyboardInterrupt:
+        print("已中断，使用 --resume 可从中断处继续", file=sys.stderr)
+        return 130
+    except Exception as e:
+        logger.error(f"批处理失败: {e}")
+        print(f"错误: {e}", file=sys.stderr)
+        return 2
+    finally:
+        processor.shutdown()
+        if tracer is not None:
+            tracer.dump_json(args.trace)
+
+    elapsed = time.time() - start_time
+    print(f"完成: 处理 {counters['processed']} 个文件, 成功 {counters['successful']}, "
+          f"失败 {counters['failed']}, 跳过已完成 {counters['skipped']}, 耗时 {elapsed:.1f}秒, "
+          f"结果: {args.output}", file=sys.stderr)
+    return 1 if counters['failed'] else 0
+
+
+def resolve_paths(args: argparse.Namespace):
+    """将命令行中的路径转换为绝对路径，并记录文件列表内相对路径的基准目录（切换工作目录之前调用）"""
+    args.base_dir = os.getcwd()
+    args.inputs = [os.path.abspath(path) for path in args.inputs]
+    args.file_list = [path if path == '-' else os.path.abspath(path) for path in args.file_list]
+    args.output = os.path.abspath(args.output)
+    for name in ['config', 'cache_dir', 'trace']:
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+
+
+def main(argv: Optional[List[str]] = None, project_dir: Optional[str] = None) -> int:
+    """命令行入口
+
+    Args:
+        argv: 命令行参数，为None时使用 sys.argv
+        project_dir: 项目目录，指定时切换到该目录运行（配置和日志使用相对路径）
+
+    Returns:
+        退出码
+    """
+    args = build_parser().parse_args(argv)
+    resolve_paths(args)
+    if project_dir:
+        os.chdir(project_dir)
+    setup_logging(log_level=args.log_level.upper())
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
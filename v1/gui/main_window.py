@@ -271,11 +271,14 @@ class MainWindow:
             progress_tracker = create_progress_tracker()
             progress_tracker.add_callback(self._update_scan_progress)
             
-            # 扫描文件
-            files = self.file_handler.scan_directory(folder_path, True, progress_tracker)
+            # 逐个目录扫描，已发现的文件立即加入列表，不必等待整个目录扫描完成
+            files = []
+            for batch in self.file_handler.iter_directory(folder_path, True, progress_tracker):
+                files.extend(batch)
+                self._add_files(batch)
+                self.root.update_idletasks()
             
             if files:
-                self._add_files(files)
                 self._update_status(f"扫描完成，找到 {len(files)} 个文件")
             else:
                 self._update_status("未找到图像文件")
@@ -485,8 +488,10 @@ class MainWindow:
         if self.is_processing:
             if messagebox.askokcancel("确认", "正在处理中，确定要退出吗？"):
                 self.batch_processor.stop_processing()
+                self.batch_processor.shutdown()
                 self.root.destroy()
         else:
+            self.batch_processor.shutdown()
             self.root.destroy()
     
     def run(self):
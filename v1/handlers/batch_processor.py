@@ -10,11 +10,14 @@ import time
 import logging
 from typing import List, Optional, Dict, Any, Callable
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import json
+import os
 
 from core.date_recognizer import create_date_recognizer
-from core.models import RecognitionResult, BatchResult, create_batch_result
+from core.image_context import ImageContext
+from core.models import RecognitionResult, BatchResult, TextResult, create_batch_result
+from core.ocr_worker_pool import OCRWorkerPool, create_ocr_worker_pool
 from v1.handlers.file_handler import FileHandler, ProgressTracker, create_file_handler
 from utils.config_loader import get_config
 from utils.logger import performance_logger
@@ -48,6 +51,30 @@ class ProcessingResult:
     processing_time: float
 
 
+@dataclass
+class BatchPlan:
+    """批处理计划：OCR开始前按缓存状态对文件分类"""
+    hits: Dict[str, RecognitionResult] = field(default_factory=dict)    # 识别结论可直接使用
+    stale: Dict[str, Dict[str, Any]] = field(default_factory=dict)     # 有缓存的OCR文本，需重新解析日期
+    misses: List[str] = field(default_factory=list)                    # 需要执行OCR
+    miss_hashes: Dict[str, str] = field(default_factory=dict)          # 未命中文件的内容哈希，识别时不再查询缓存
+    planning_time: float = 0.0
+    
+    @property
+    def total(self) -> int:
+        return len(self.hits) + len(self.stale) + len(self.misses)
+    
+    def summary(self) -> Dict[str, Any]:
+        """计划摘要"""
+        return {
+            'total': self.total,
+            'hits': len(self.hits),
+            'stale': len(self.stale),
+            'misses': len(self.misses),
+            'planning_time': round(self.planning_time, 3)
+        }
+
+
 class TaskQueue:
     """任务队列管理器"""
     
@@ -162,13 +189,28 @@ class BatchProcessor:
         self.single_timeout = perf_config.get('single_image_timeout', 30)
         self.batch_timeout = perf_config.get('batch_timeout', 300)
         
+        # 执行模式: thread=线程池(共享一个OCR引擎), process=进程池(每个进程独立OCR引擎)
+        self.execution_mode = perf_config.get('execution_mode', 'thread')
+        self.ocr_processes = perf_config.get('ocr_processes', 0)
+        self._worker_pool = None
+        self._worker_pool_lock = threading.Lock()
+        
         # 缓存配置
         self.cache_enabled = perf_config.get('cache_enabled', True)
         self.cache_size = perf_config.get('cache_size', 1000)
         
+        # 预检查配置: OCR开始前批量查询缓存，只把未命中的文件交给执行器
+        self.plan_enabled = perf_config.get('plan_enabled', True)
+        self.plan_workers = perf_config.get('plan_workers', 0) or min(32, (os.cpu_count() or 1) + 4)
+        # 目录流式处理: 扫描中每累积这么多文件即开始处理，无需等待整个目录扫描完成
+        self.scan_chunk_size = max(1, perf_config.get('scan_chunk_size', 500))
+        self.last_plan: Optional[BatchPlan] = None
+        self._result_callback: Optional[Callable[[ProcessingResult], None]] = None
+        
         # 初始化组件
         self.file_handler = create_file_handler(self.config)
-        self.date_recognizer = create_date_recognizer(self.config)
+        # 进程池模式下OCR在工作进程中执行，主进程只解析日期和读写缓存，不加载OCR模型
+        self.date_recognizer = create_date_recognizer(self.config, load_ocr=self.execution_mode != 'process')
         self.task_queue = TaskQueue()
         
         # 结果缓存
@@ -179,15 +221,23 @@ class BatchProcessor:
         self.is_processing = False
         self.processing_lock = threading.Lock()
         
-        logger.info(f"批量处理器初始化完成: {self.max_workers} 工作线程")
+        if self.execution_mode == 'process':
+            logger.info(f"批量处理器初始化完成: 进程池模式, {self.ocr_processes or '自动'} 工作进程")
+        else:
+            logger.info(f"批量处理器初始化完成: {self.max_workers} 工作线程")
     
     def process_files(self, file_paths: List[str], 
-                     progress_callback: Optional[Callable] = None) -> BatchResult:
+                     progress_callback: Optional[Callable] = None,
+                     plan_callback: Optional[Callable[[BatchPlan], None]] = None,
+                     result_callback: Optional[Callable[[ProcessingResult], None]] = None) -> BatchResult:
         """批量处理文件
         
         Args:
             file_paths: 文件路径列表
             progress_callback: 进度回调函数
+            plan_callback: 预检查完成、OCR开始前调用，参数为批处理计划
+            result_callback: 每个文件处理完成后立即调用（在调用线程中，按完成顺序），
+                参数为处理结果，可用于流式写出结果
             
         Returns:
             批量处理结果
@@ -212,6 +262,19 @@ class BatchProcessor:
             validation_result = self.file_handler.validate_batch_files(file_paths)
             valid_files = [f['path'] for f in validation_result['valid_files']]
             
+            # 未通过验证的文件不参与处理，但也通知结果回调，便于调用方完整记录
+            self._result_callback = result_callback
+            if result_callback:
+                for invalid in validation_result['invalid_files']:
+                    self._notify_result(ProcessingResult(
+                        task_id=f"invalid_{invalid['path']}",
+                        file_path=invalid['path'],
+                        result=None,
+                        success=False,
+                        error=invalid['error'],
+                        processing_time=0.0
+                    ))
+            
             if not valid_files:
                 logger.warning("没有有效的文件需要处理")
                 batch_result.total_processed = 0
@@ -222,8 +285,24 @@ class BatchProcessor:
             if progress_callback:
                 progress_tracker.add_callback(progress_callback)
             
+            # 预检查缓存，命中的文件无需进入执行器
+            results = []
+            pending_files = valid_files
+            miss_hashes = {}
+            if self.plan_enabled:
+                plan = self.plan_batch(valid_files)
+                if plan_callback:
+                    plan_callback(plan)
+                results = self._resolve_planned(plan, progress_tracker)
+                pending_files = plan.misses
+                miss_hashes = plan.miss_hashes
+            
             # 执行并行处理
-            results = self._process_parallel(valid_files, progress_tracker)
+            if pending_files:
+                if self.execution_mode == 'process':
+                    results += self._process_with_worker_farm(pending_files, progress_tracker, miss_hashes)
+                else:
+                    results += self._process_parallel(pending_files, progress_tracker, miss_hashes)
             
             # 统计结果
             processing_time = time.time() - start_time
@@ -245,11 +324,10 @@ class BatchProcessor:
             
             logger.info(f"批量处理完成: {len(successful_results)}/{len(valid_files)} 成功")
 
-            # 显示OCR引擎统计信息
+            # 显示OCR引擎统计信息（进程池模式下主进程没有OCR引擎）
             try:
-                from core.ocr_engine import get_ocr_engine
-                ocr_engine = get_ocr_engine()
-                engine_info = ocr_engine.get_engine_info()
+                ocr_engine = self.date_recognizer.ocr_engine
+                engine_info = ocr_engine.get_engine_info() if ocr_engine is not None else {}
 
                 if 'ocr_stats' in engine_info:
                     stats = engine_info['ocr_stats']
@@ -266,16 +344,172 @@ class BatchProcessor:
             logger.error(f"批量处理失败: {e}")
             raise BatchProcessingError(f"批量处理失败: {e}")
         finally:
+            self._result_callback = None
             with self.processing_lock:
                 self.is_processing = False
     
-    def _process_parallel(self, file_paths: List[str], 
+    def process_directory(self, directory_path: str, recursive: bool = True,
+                          progress_callback: Optional[Callable] = None,
+                          result_callback: Optional[Callable[[ProcessingResult], None]] = None) -> BatchResult:
+        """边扫描边处理目录中的图像文件
+        
+        扫描按目录产出文件，每累积 scan_chunk_size 个文件调用一次 process_files，
+        网络共享等扫描较慢的目录不必等待扫描完成即可开始OCR
+        
+        Args:
+            directory_path: 目录路径
+            recursive: 是否递归扫描子目录
+            progress_callback: 进度回调函数（按批报告，每批重新计数）
+            result_callback: 每个文件处理完成后立即调用
+            
+        Returns:
+            整个目录的批量处理结果
+            
+        Raises:
+            BatchProcessingError: 批量处理失败
+        """
+        start_time = time.time()
+        batch_result = create_batch_result(directory_path)
+        
+        def process(chunk: List[str]):
+            chunk_result = self.process_files(chunk, progress_callback=progress_callback,
+                                              result_callback=result_callback)
+            batch_result.total_files += chunk_result.total_files
+            batch_result.total_processed += chunk_result.total_processed
+            batch_result.successful_recognitions += chunk_result.successful_recognitions
+            batch_result.failed_recognitions += chunk_result.failed_recognitions
+            batch_result.results.extend(chunk_result.results)
+        
+        try:
+            chunk = []
+            for files in self.file_handler.iter_directory(directory_path, recursive):
+                chunk.extend(files)
+                if len(chunk) >= self.scan_chunk_size:
+                    process(chunk)
+                    chunk = []
+            if chunk:
+                process(chunk)
+        except BatchProcessingError:
+            raise
+        except Exception as e:
+            logger.error(f"目录处理失败: {directory_path}, 错误: {e}")
+            raise BatchProcessingError(f"目录处理失败: {e}")
+        
+        batch_result.processing_time = time.time() - start_time
+        logger.info(f"目录处理完成: {batch_result.successful_recognitions}/{batch_result.total_files} 成功, "
+                    f"耗时 {batch_result.processing_time:.1f}秒")
+        return batch_result
+    
+    def plan_batch(self, file_paths: List[str]) -> BatchPlan:
+        """OCR开始前批量检查缓存
+        
+        并行获取文件状态和哈希，通过一次批量查询得到所有缓存条目，
+        按缓存状态将文件分为命中、需重新解析(stale)和未命中三类
+        
+        Args:
+            file_paths: 文件路径列表
+            
+        Returns:
+            批处理计划
+        """
+        start_time = time.time()
+        plan = BatchPlan()
+        remaining = []
+        
+        for file_path in file_paths:
+            if self.cache_enabled and self._check_cache(file_path):
+                plan.hits[file_path] = self._get_from_cache(file_path)
+            else:
+                remaining.append(file_path)
+        
+        cached_entries = {}
+        file_hashes = {}
+        cache_manager = self.date_recognizer.cache_manager
+        if remaining and cache_manager is not None:
+            cached_entries = cache_manager.lookup_many(remaining, max_workers=self.plan_workers,
+                                                       file_hashes=file_hashes)
+        
+        for file_path in remaining:
+            cached = cached_entries.get(file_path)
+            if not cached or not cached.get('ocr_results'):
+                plan.misses.append(file_path)
+                if file_path in file_hashes:
+                    plan.miss_hashes[file_path] = file_hashes[file_path]
+            elif self.date_recognizer.is_cached_result_current(cached):
+                plan.hits[file_path] = self.date_recognizer.recognize_from_cached(file_path, cached)
+            else:
+                plan.stale[file_path] = cached
+        
+        plan.planning_time = time.time() - start_time
+        self.last_plan = plan
+        
+        summary = plan.summary()
+        logger.info(f"批处理预检查完成: 命中 {summary['hits']}, 需重新解析 {summary['stale']}, "
+                    f"需OCR {summary['misses']}, 耗时 {summary['planning_time']}秒")
+        return plan
+    
+    def _resolve_planned(self, plan: BatchPlan,
                          progress_tracker: ProgressTracker) -> List[ProcessingResult]:
+        """处理计划中无需OCR的文件：命中直接使用，stale用缓存的OCR文本重新解析
+        
+        Args:
+            plan: 批处理计划
+            progress_tracker: 进度跟踪器
+            
+        Returns:
+            处理结果列表
+        """
+        results = []
+        
+        for file_path, cached_result in plan.hits.items():
+            self._add_result(results, ProcessingResult(
+                task_id=f"cached_{len(results)}",
+                file_path=file_path,
+                result=cached_result,
+                success=cached_result.success,
+                error=cached_result.warning_message,
+                processing_time=cached_result.processing_time
+            ), progress_tracker)
+        
+        for file_path, cached in plan.stale.items():
+            recognition_result = self.date_recognizer.recognize_from_cached(file_path, cached)
+            if self.cache_enabled:
+                self._save_to_cache(file_path, recognition_result)
+            self._add_result(results, ProcessingResult(
+                task_id=f"reparsed_{len(results)}",
+                file_path=file_path,
+                result=recognition_result,
+                success=recognition_result.success,
+                error=recognition_result.warning_message,
+                processing_time=recognition_result.processing_time
+            ), progress_tracker)
+        
+        return results
+    
+    def _add_result(self, results: List[ProcessingResult], result: ProcessingResult,
+                    progress_tracker: ProgressTracker):
+        """记录一个处理结果，更新进度并通知结果回调"""
+        results.append(result)
+        progress_tracker.update(1)
+        self._notify_result(result)
+    
+    def _notify_result(self, result: ProcessingResult):
+        """通知结果回调，回调异常不影响批处理"""
+        if self._result_callback:
+            try:
+                self._result_callback(result)
+            except Exception as e:
+                logger.error(f"结果回调失败: {result.file_path}, 错误: {e}")
+    
+    def _process_parallel(self, file_paths: List[str], 
+                         progress_tracker: ProgressTracker,
+                         file_hashes: Optional[Dict[str, str]] = None) -> List[ProcessingResult]:
         """并行处理文件
         
         Args:
             file_paths: 文件路径列表
             progress_tracker: 进度跟踪器
+            file_hashes: 预检查中已确认缓存未命中的 文件路径 -> 内容哈希
             
         Returns:
             处理结果列表
@@ -286,7 +520,8 @@ class BatchProcessor:
         with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
             # 提交所有任务
             future_to_path = {
-                executor.submit(self._process_single_file, file_path): file_path
+                executor.submit(self._process_single_file, file_path,
+                                (file_hashes or {}).get(file_path)): file_path
                 for file_path in file_paths
             }
             
@@ -296,10 +531,7 @@ class BatchProcessor:
                 
                 try:
                     result = future.result(timeout=self.single_timeout)
-                    results.append(result)
-                    
-                    # 更新进度
-                    progress_tracker.update(1)
+                    self._add_result(results, result, progress_tracker)
                     
                     logger.debug(f"文件处理完成: {file_path}")
                     
@@ -313,18 +545,104 @@ class BatchProcessor:
                         error=str(e),
                         processing_time=0.0
                     )
-                    results.append(error_result)
-                    progress_tracker.update(1)
+                    self._add_result(results, error_result, progress_tracker)
                     
                     logger.error(f"文件处理失败: {file_path}, 错误: {e}")
         
         return results
     
-    def _process_single_file(self, file_path: str) -> ProcessingResult:
+    def _get_worker_pool(self) -> OCRWorkerPool:
+        """获取OCR进程池（首次使用时启动，之后在多次批处理间复用）"""
+        with self._worker_pool_lock:
+            if self._worker_pool is None:
+                self._worker_pool = create_ocr_worker_pool(self.ocr_processes, self.config)
+                self._worker_pool.start()
+            return self._worker_pool
+    
+    def _process_with_worker_farm(self, file_paths: List[str],
+                                  progress_tracker: ProgressTracker,
+                                  file_hashes: Optional[Dict[str, str]] = None) -> List[ProcessingResult]:
+        """使用OCR进程池处理文件
+        
+        OCR在各工作进程中执行，日期解析在主进程中完成
+        
+        Args:
+            file_paths: 文件路径列表
+            progress_tracker: 进度跟踪器
+            file_hashes: 预检查中已确认缓存未命中的 文件路径 -> 内容哈希
+            
+        Returns:
+            处理结果列表
+        """
+        results = []
+        pending_paths = []
+        
+        # 命中结果缓存的文件无需分发到工作进程
+        for file_path in file_paths:
+            if self.cache_enabled and self._check_cache(file_path):
+                cached_result = self._get_from_cache(file_path)
+                self._add_result(results, ProcessingResult(
+                    task_id=f"cached_{len(results)}",
+                    file_path=file_path,
+                    result=cached_result,
+                    success=True,
+                    error=None,
+                    processing_time=0.0
+                ), progress_tracker)
+            else:
+                pending_paths.append(file_path)
+        
+        worker_pool = self._get_worker_pool()
+        
+        for worker_result in worker_pool.imap_unordered(pending_paths, file_hashes=file_hashes):
+            file_path = worker_result.image_path
+            task_id = f"worker_{worker_result.worker_pid}_{len(results)}"
+            
+            if worker_result.error:
+                self._add_result(results, ProcessingResult(
+                    task_id=task_id,
+                    file_path=file_path,
+                    result=None,
+                    success=False,
+                    error=worker_result.error,
+                    processing_time=worker_result.processing_time
+                ), progress_tracker)
+                logger.error(f"文件处理失败: {file_path}, 错误: {worker_result.error}")
+                continue
+            
+            text_results = [
+                TextResult(text=record.text, confidence=record.confidence,
+                           bbox=[list(point) for point in record.bbox])
+                for record in worker_result.records
+            ]
+            recognition_result = self.date_recognizer.recognize_from_ocr(
+                file_path, text_results,
+                worker_result.processing_time, worker_result.image_size
+            )
+            
+            # 工作进程已缓存OCR文本，主进程补充识别结论
+            self.date_recognizer.cache_recognition(file_path, recognition_result)
+            if self.cache_enabled:
+                self._save_to_cache(file_path, recognition_result)
+            
+            self._add_result(results, ProcessingResult(
+                task_id=task_id,
+                file_path=file_path,
+                result=recognition_result,
+                success=recognition_result.success,
+                error=recognition_result.warning_message,
+                processing_time=recognition_result.processing_time
+            ), progress_tracker)
+            logger.debug(f"文件处理完成: {file_path}")
+        
+        return results
+    
+    def _process_single_file(self, file_path: str, file_hash: Optional[str] = None) -> ProcessingResult:
         """处理单个文件
         
         Args:
             file_path: 文件路径
+            file_hash: 预检查中已确认缓存未命中的文件内容哈希，提供时不再查询缓存
             
         Returns:
             处理结果
@@ -346,7 +664,12 @@ class BatchProcessor:
                 )
             
             # 执行识别
-            recognition_result = self.date_recognizer.recognize_single(file_path)
+            image_context = None
+            if file_hash:
+                image_context = ImageContext(file_path)
+                image_context.seed_file_hash(file_hash)
+                image_context.cache_checked = True
+            recognition_result = self.date_recognizer.recognize_single(file_path, image_context)
             
             # 缓存结果
             if self.cache_enabled:
@@ -449,19 +772,35 @@ class BatchProcessor:
         Returns:
             处理器统计信息
         """
-        return {
+        stats = {
             'max_workers': self.max_workers,
+            'execution_mode': self.execution_mode,
             'batch_size': self.batch_size,
             'is_processing': self.is_processing,
             'cache_stats': self.get_cache_stats(),
             'queue_stats': self.task_queue.get_stats()
         }
+        
+        if self.last_plan is not None:
+            stats['last_plan'] = self.last_plan.summary()
+        
+        if self._worker_pool is not None:
+            stats['worker_pool_stats'] = self._worker_pool.get_stats()
+        
+        return stats
     
     def stop_processing(self):
         """停止处理（优雅关闭）"""
         logger.info("正在停止批量处理...")
         with self.processing_lock:
             self.is_processing = False
+    
+    def shutdown(self):
+        """释放资源（关闭OCR进程池）"""
+        with self._worker_pool_lock:
+            if self._worker_pool is not None:
+                self._worker_pool.shutdown()
+                self._worker_pool = None
 
 
 # 工厂函数
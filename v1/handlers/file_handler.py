@@ -6,13 +6,14 @@
 
 import os
 import logging
-from typing import List, Optional, Dict, Any, Callable
+from typing import List, Optional, Dict, Any, Callable, Iterator
 from pathlib import Path
 import threading
 import time
 
 from utils.config_loader import get_config
 from utils.validators import validate_image_file, validate_directory, is_valid_image_extension
+from utils.file_scanner import FileScanner
 
 logger = logging.getLogger(__name__)
 
@@ -139,6 +140,7 @@ class FileHandler:
         # 性能配置
         perf_config = self.config.get('performance', {})
         self.max_file_size = perf_config.get('max_memory_usage', 2048) * 1024 * 1024  # MB转字节
+        self.scanner = FileScanner(self.supported_formats, perf_config.get('scan_workers', 8))
         
         logger.info("文件处理器初始化完成")
     
@@ -260,6 +262,32 @@ class FileHandler:
         Returns:
             图像文件路径列表
             
+        Raises:
+            FileHandlingError: 目录扫描失败
+        """
+        image_files = []
+        for batch in self.iter_directory(directory_path, recursive, progress_tracker):
+            image_files.extend(batch)
+        
+        # 排序确保一致性
+        image_files.sort()
+        
+        logger.info(f"目录扫描完成: 找到 {len(image_files)} 个图像文件")
+        return image_files
+    
+    def iter_directory(self, directory_path: str,
+                       recursive: bool = True,
+                       progress_tracker: Optional[ProgressTracker] = None) -> Iterator[List[str]]:
+        """逐个目录产出图像文件，扫描尚未结束时即可开始处理已发现的文件
+        
+        Args:
+            directory_path: 目录路径
+            recursive: 是否递归扫描子目录
+            progress_tracker: 进度跟踪器
+            
+        Yields:
+            一个目录中的图像文件路径列表（已排序，目录的产出顺序不固定）
+            
         Raises:
             FileHandlingError: 目录扫描失败
         """
@@ -268,40 +296,22 @@ class FileHandler:
             validate_directory(directory_path)
             
             logger.info(f"开始扫描目录: {directory_path}, 递归: {recursive}")
+            root = os.path.realpath(directory_path)
             
-            image_files = []
-            directory = Path(directory_path)
-            
-            # 获取所有文件（用于进度跟踪）
+            # 单次扫描，进度按目录计算：总数为已发现的目录数，随扫描增长
+            directories_found = 1
             if progress_tracker:
-                all_files = []
-                if recursive:
-                    all_files = list(directory.rglob('*'))
-                else:
-                    all_files = list(directory.iterdir())
-                
-                progress_tracker.set_total(len(all_files))
+                progress_tracker.set_total(directories_found)
                 progress_tracker.reset()
             
-            # 扫描文件
-            if recursive:
-                file_iterator = directory.rglob('*')
-            else:
-                file_iterator = directory.iterdir()
-            
-            for file_path in file_iterator:
+            for batch in self.scanner.iter_batches(root, recursive):
                 if progress_tracker:
+                    directories_found += batch.subdirectory_count
+                    progress_tracker.set_total(directories_found)
                     progress_tracker.update(1)
                 
-                if file_path.is_file():
-                    if is_valid_image_extension(str(file_path), self.supported_formats):
-                        image_files.append(str(file_path.resolve()))
-            
-            # 排序确保一致性
-            image_files.sort()
-            
-            logger.info(f"目录扫描完成: 找到 {len(image_files)} 个图像文件")
-            return image_files
+                if batch.entries:
+                    yield sorted(entry.path for entry in batch.entries)
             
         except Exception as e:
             logger.error(f"目录扫描失败: {directory_path}, 错误: {e}")
@@ -396,40 +406,35 @@ class FileHandler:
             目录统计信息字典
         """
         try:
-            image_files = self.scan_directory(directory_path, recursive)
-            
-            if not image_files:
-                return {
-                    'directory': directory_path,
-                    'total_files': 0,
-                    'total_size': 0,
-                    'formats': {}
-                }
+            validate_directory(directory_path)
             
+            total_files = 0
             total_size = 0
             formats = {}
             
-            for file_path in image_files:
-                try:
-                    file_size = os.path.getsize(file_path)
+            # 直接使用扫描得到的目录项，文件大小来自 DirEntry.stat()
+            for batch in self.scanner.iter_batches(os.path.realpath(directory_path), recursive):
+                for entry in batch.entries:
+                    try:
+                        file_size = entry.stat().st_size
+                    except OSError:
+                        continue
+                    total_files += 1
                     total_size += file_size
                     
-                    file_ext = Path(file_path).suffix.lower()
+                    file_ext = os.path.splitext(entry.name)[1].lower()
                     if file_ext not in formats:
                         formats[file_ext] = {'count': 0, 'size': 0}
                     formats[file_ext]['count'] += 1
                     formats[file_ext]['size'] += file_size
-                    
-                except OSError:
-                    continue
             
             return {
                 'directory': directory_path,
-                'total_files': len(image_files),
+                'total_files': total_files,
                 'total_size': total_size,
                 'total_size_mb': total_size / 1024 / 1024,
                 'formats': formats,
-                'average_file_size': total_size / len(image_files) if image_files else 0
+                'average_file_size': total_size / total_files if total_files else 0
             }
             
         except Exception as e:
@@ -0,0 +1,263 @@
+"""
+结果写出模块
+
+逐条写出识别结果（JSONL或CSV，每个文件一行），每条写入后立即刷新，
+批处理中断时已完成的结果不会丢失；再次运行时可读取已有输出文件跳过已完成的文件。
+"""
+
+import os
+import csv
+import json
+import logging
+from typing import Optional, Dict, Any, Set
+
+from core.models import RecognitionResult
+
+logger = logging.getLogger(__name__)
+
+# CSV输出的列
+CSV_FIELDS = [
+    'image_path', 'success', 'best_date', 'dates_found', 'confidence',
+    'warning_level', 'warning_message', 'processing_time', 'image_width', 'image_height', 'raw_text'
+]
+
+# CSV中列表字段的分隔符
+CSV_LIST_SEPARATOR = ';'
+
+
+class ResultWriterError(Exception):
+    """结果写出异常"""
+    pass
+
+
+def result_to_record(image_path: str, result: Optional[RecognitionResult] = None,
+                     error: Optional[str] = None) -> Dict[str, Any]:
+    """将识别结果转换为一行输出记录（不含OCR文本框坐标等详细结果）
+
+    Args:
+        image_path: 图片路径
+        result: 识别结果，处理失败时为None
+        error: 处理失败时的错误信息
+
+    Returns:
+        输出记录字典
+    """
+    if result is None:
+        return {
+            'image_path': image_path,
+            'success': False,
+            'best_date': None,
+            'production_date': None,
+            'expiry_date': None,
+            'dates_found': [],
+            'confidence': 0.0,
+            'warning_level': 'high',
+            'warning_message': error,
+            'processing_time': 0.0,
+            'image_size': [0, 0],
+            'raw_text': [],
+            'date_details': []
+        }
+
+    record = result.to_dict()
+    record.pop('ocr_results', None)
+    return record
+
+
+class ResultWriter:
+    """结果写出器基类"""
+
+    format_name = ''
+
+    def __init__(self, output_path: str, resume: bool = False):
+        """初始化写出器
+
+        Args:
+            output_path: 输出文件路径
+            resume: 为True时保留已有内容并追加，否则覆盖
+        """
+        self.output_path = output_path
+        self.resume = resume
+        self.completed: Set[str] = set()
+        self.written = 0
+        self._file = None
+
+        directory = os.path.dirname(os.path.abspath(output_path))
+        os.makedirs(directory, exist_ok=True)
+
+        if resume and os.path.exists(output_path):
+            self._truncate_partial_line()
+            self.completed = self._load_completed()
+            logger.info(f"从已有输出继续: {output_path}, 已完成 {len(self.completed)} 个文件")
+
+    # ---- 子类实现 ----
+
+    def _load_completed(self) -> Set[str]:
+        """读取已有输出中的图片路径"""
+        raise NotImplementedError
+
+    def _write_record(self, record: Dict[str, Any]):
+        raise NotImplementedError
+
+    def _on_open(self, is_new: bool):
+        """文件打开后调用，is_new表示文件为空"""
+        pass
+
+    # ---- 公共接口 ----
+
+    def open(self) -> 'ResultWriter':
+        """打开输出文件"""
+        if self._file is None:
+            mode = 'a' if self.resume else 'w'
+            self._file = open(self.output_path, mode, encoding='utf-8', newline='')
+            self._on_open(self._file.tell() == 0)
+        return self
+
+    def is_completed(self, image_path: str) -> bool:
+        """文件是否已在输出中（resume模式）"""
+        return self._normalize(image_path) in self.completed
+
+    def write(self, image_path: str, result: Optional[RecognitionResult] = None,
+              error: Optional[str] = None):
+        """写出一条结果并立即刷新
+
+        Args:
+            image_path: 图片路径
+            result: 识别结果，处理失败时为None
+            error: 处理失败时的错误信息
+        """
+        if self._file is None:
+            self.open()
+        try:
+            self._write_record(result_to_record(image_path, result, error))
+            self._file.flush()
+        except OSError as e:
+            raise ResultWriterError(f"写出结果失败: {self.output_path}, 错误: {e}")
+        self.completed.add(self._normalize(image_path))
+        self.written += 1
+
+    def close(self):
+        """关闭输出文件"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # ---- 内部方法 ----
+
+    @staticmethod
+    def _normalize(image_path: str) -> str:
+        return os.path.normcase(os.path.abspath(image_path))
+
+    def _truncate_partial_line(self):
+        """截掉上次运行中断时写了一半的最后一行"""
+        with open(self.output_path, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b'\n':
+                return
+
+            # 从文件末尾向前找最后一个换行
+            position = size
+            while position > 0:
+                step = min(4096, position)
+                position -= step
+                f.seek(position)
+                chunk = f.read(step)
+                index = chunk.rfind(b'\n')
+                if index >= 0:
+                    f.truncate(position + index + 1)
+                    break
+            else:
+                f.truncate(0)
+            logger.warning(f"输出文件最后一行不完整，已截断: {self.output_path}")
+
+
+class JSONLResultWriter(ResultWriter):
+    """JSON Lines 写出器: 每行一个JSON对象"""
+
+    format_name = 'jsonl'
+
+    def _load_completed(self) -> Set[str]:
+        completed = set()
+        with open(self.output_path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    completed.add(self._normalize(json.loads(line)['image_path']))
+                except (ValueError, KeyError, TypeError):
+                    logger.warning(f"跳过无法解析的输出行: {self.output_path}:{line_number}")
+        return completed
+
+    def _write_record(self, record: Dict[str, Any]):
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+class CSVResultWriter(ResultWriter):
+    """CSV 写出器: 每行一个文件，列表字段以分号连接"""
+
+    format_name = 'csv'
+
+    def _load_completed(self) -> Set[str]:
+        completed = set()
+        with open(self.output_path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                if row.get('image_path'):
+                    completed.add(self._normalize(row['image_path']))
+        return completed
+
+    def _on_open(self, is_new: bool):
+        self._writer = csv.DictWriter(self._file, fieldnames=CSV_FIELDS, extrasaction='ignore')
+        if is_new:
+            self._writer.writeheader()
+
+    def _write_record(self, record: Dict[str, Any]):
+        width, height = record.get('image_size') or (0, 0)
+        row = dict(record)
+        row['dates_found'] = CSV_LIST_SEPARATOR.join(record.get('dates_found') or [])
+        row['raw_text'] = CSV_LIST_SEPARATOR.join(record.get('raw_text') or [])
+        row['image_width'] = width
+        row['image_height'] = height
+        self._writer.writerow(row)
+
+
+WRITERS = {
+    'jsonl': JSONLResultWriter,
+    'csv': CSVResultWriter
+}
+
+
+# 工厂函数
+def create_result_writer(output_path: str, output_format: Optional[str] = None,
+                         resume: bool = False) -> ResultWriter:
+    """创建结果写出器
+
+    Args:
+        output_path: 输出文件路径
+        output_format: 输出格式 jsonl/csv，为None时根据扩展名判断
+        resume: 是否在已有输出上继续
+
+    Returns:
+        结果写出器实例
+
+    Raises:
+        ResultWriterError: 不支持的输出格式
+    """
+    if output_format is None:
+        extension = os.path.splitext(output_path)[1].lower().lstrip('.')
+        output_format = 'csv' if extension == 'csv' else 'jsonl'
+
+    writer_class = WRITERS.get(output_format.lower())
+    if writer_class is None:
+        raise ResultWriterError(f"不支持的输出格式: {output_format}")
+    return writer_class(output_path, resume)
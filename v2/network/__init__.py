@@ -0,0 +1,21 @@
+"""
+网络服务模块
+
+- recognition_server: 本地HTTP识别服务，常驻预热的识别器池
+"""
+
+__version__ = "2.0.0"
+__author__ = "OCR Date Recognition Team"
+
+__all__ = [
+    'RecognitionServer',
+    'RecognizerPool',
+    'create_recognition_server'
+]
+
+def __getattr__(name):
+    """延迟导入，避免导入包时加载识别引擎"""
+    if name in ['RecognitionServer', 'RecognizerPool', 'create_recognition_server']:
+        from .recognition_server import RecognitionServer, RecognizerPool, create_recognition_server
+        return locals()[name]
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
@@ -0,0 +1,543 @@
+"""
+本地HTTP识别服务
+
+常驻进程持有若干个已预热的日期识别器，其他程序通过JSON接口调用，
+无需每次加载PaddleOCR模型。
+
+接口:
+    POST /recognize        单张图片: {"path": ...} 或 {"image_base64": ..., "filename": ...}，
+                           也可以直接以 image/* 或 application/octet-stream 发送图片数据
+    POST /recognize_batch  多张图片: {"paths": [...], "images": [{"image_base64": ..., "filename": ...}]}
+    GET  /health           健康检查
+    GET  /stats            各接口延迟分位数、识别器池和排队情况
+    GET  /metrics          识别流水线各阶段耗时直方图（Prometheus文本格式，需开启 tracing.enabled）
+
+背压: 已接收但未完成的图片数达到 max_pending 时新请求立即返回503，
+客户端按 Retry-After 重试，服务端不会无限排队。
+
+运行:
+    python -m v2.network.recognition_server --port 8080 --pool-size 2
+"""
+
+import os
+import json
+import time
+import base64
+import asyncio
+import logging
+import argparse
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple, Callable
+from urllib.parse import urlsplit, parse_qs
+
+import cv2
+import numpy as np
+
+from core.date_recognizer import DateRecognizer, create_date_recognizer
+from core.image_context import ImageContext
+from core.models import RecognitionResult
+from utils.config_loader import get_config
+from utils.tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+HTTP_REASONS = {
+    200: 'OK', 400: 'Bad Request', 403: 'Forbidden', 404: 'Not Found',
+    405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error',
+    503: 'Service Unavailable', 504: 'Gateway Timeout'
+}
+
+
+class RecognitionServerError(Exception):
+    """识别服务异常"""
+    pass
+
+
+class _HTTPError(Exception):
+    """请求处理中需要返回给客户端的错误"""
+
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class RecognizerPool:
+    """预热的日期识别器池
+
+    每个识别器持有独立的OCR引擎，同一时间只被一个线程使用
+    """
+
+    def __init__(self, size: int, config: Dict, warmup: bool = True):
+        """
+        Args:
+            size: 识别器数量
+            config: 配置字典
+            warmup: 启动时是否预热
+        """
+        self.size = max(1, size)
+        self.config = config
+        self.warmup = warmup
+        self.executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix='recognizer')
+        self._idle: Optional[asyncio.Queue] = None
+        self._recognizers: List[DateRecognizer] = []
+
+    async def start(self):
+        """在工作线程中创建并预热所有识别器"""
+        loop = asyncio.get_running_loop()
+        self._idle = asyncio.Queue()
+        start_time = time.time()
+
+        def build() -> DateRecognizer:
+            recognizer = create_date_recognizer(self.config)
+            if self.warmup:
+                recognizer.warmup()
+            return recognizer
+
+        self._recognizers = await asyncio.gather(
+            *[loop.run_in_executor(self.executor, build) for _ in range(self.size)]
+        )
+        for recognizer in self._recognizers:
+            self._idle.put_nowait(recognizer)
+        logger.info(f"识别器池就绪: {self.size} 个识别器, 耗时 {time.time() - start_time:.1f}秒")
+
+    async def run(self, timeout: float, image_path: str,
+                  image_context: Optional[ImageContext] = None,
+                  on_done: Optional[Callable[[], None]] = None) -> RecognitionResult:
+        """取一个空闲识别器执行识别
+
+        timeout 包括等待空闲识别器的时间。超时后立即返回，识别线程无法中断，
+        识别器在其真正完成后才归还池中
+
+        Args:
+            timeout: 超时时间(秒)
+            image_path: 图片路径
+            image_context: 图像上下文
+            on_done: 识别真正结束（或没有开始）后调用，用于清理识别用到的临时文件
+
+        Raises:
+            asyncio.TimeoutError: 超时
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        try:
+            recognizer = await self._acquire(timeout)
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                self._idle.put_nowait(recognizer)
+                raise asyncio.TimeoutError()
+        except BaseException:
+            if on_done is not None:
+                on_done()
+            raise
+
+        future = loop.run_in_executor(self.executor, recognizer.recognize_single,
+                                      image_path, image_context)
+
+        def release(_):
+            self._idle.put_nowait(recognizer)
+            if on_done is not None:
+                on_done()
+
+        future.add_done_callback(release)
+        return await asyncio.wait_for(asyncio.shield(future), remaining)
+
+    async def _acquire(self, timeout: float) -> DateRecognizer:
+        """等待空闲识别器；超时或请求被取消时，已经取出的识别器归还池中"""
+        getter = asyncio.ensure_future(self._idle.get())
+        try:
+            return await asyncio.wait_for(asyncio.shield(getter), timeout)
+        except BaseException:
+            getter.cancel()
+            getter.add_done_callback(
+                lambda task: None if task.cancelled() else self._idle.put_nowait(task.result())
+            )
+            raise
+
+    @property
+    def idle(self) -> int:
+        return self._idle.qsize() if self._idle is not None else 0
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self._recognizers = []
+
+
+class RecognitionServer:
+    """asyncio HTTP识别服务"""
+
+    def __init__(self, config: Optional[Dict] = None, host: Optional[str] = None,
+                 port: Optional[int] = None, pool_size: Optional[int] = None):
+        """初始化识别服务
+
+        Args:
+            config: 配置字典，如果为None则使用全局配置
+            host: 监听地址，为None时使用配置 v2.network.host
+            port: 监听端口，为None时使用配置 v2.network.port
+            pool_size: 识别器数量，为None时使用配置 v2.network.pool_size
+        """
+        self.config = config or get_config().config
+        network_config = self.config.get('v2', {}).get('network', {})
+
+        self.host = host or network_config.get('host', 'localhost')
+        self.port = port if port is not None else network_config.get('port', 8080)
+        self.max_pending = network_config.get('max_pending', 32)
+        self.max_body_size = network_config.get('max_body_mb', 20) * 1024 * 1024
+        self.request_timeout = network_config.get('request_timeout', 120)
+        self.allowed_roots = [os.path.realpath(root) for root in network_config.get('allowed_roots') or []]
+        self.latency_window = network_config.get('latency_window', 1000)
+
+        self.pool = RecognizerPool(
+            pool_size or network_config.get('pool_size', 1), self.config,
+            warmup=network_config.get('warmup', True)
+        )
+        self.spool_dir = tempfile.mkdtemp(prefix='recognition_server_')
+
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._pending = 0
+        self._endpoint_stats: Dict[str, Dict[str, Any]] = {}
+        self._started_at = None
+
+    # ---- 生命周期 ----
+
+    async def start(self):
+        """预热识别器池并开始监听"""
+        await self.pool.start()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started_at = time.time()
+        logger.info(f"识别服务已启动: http://{self.host}:{self.port}")
+
+    async def serve_forever(self):
+        """启动并持续运行，直到被取消"""
+        if self._server is None:
+            await self.start()
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        """停止监听并释放识别器"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        await asyncio.get_running_loop().run_in_executor(None, self.pool.close)
+        try:
+            os.rmdir(self.spool_dir)
+        except OSError:
+            pass
+        logger.info("识别服务已停止")
+
+    # ---- HTTP ----
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """处理一个连接上的请求（支持keep-alive）"""
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+
+                status, payload, extra_headers = await self._dispatch(method, target, headers, body)
+                self._write_response(writer, status, payload, extra_headers, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except _HTTPError as e:
+            self._write_response(writer, e.status, {'error': str(e)}, e.headers, False)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logger.error(f"连接处理失败: {e}")
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader
+                            ) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        """读取一个HTTP请求，连接关闭时返回None"""
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            raise _HTTPError(400, "请求行格式错误")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get('content-length', 0) or 0)
+        if length > self.max_body_size:
+            raise _HTTPError(413, f"请求体超过 {self.max_body_size // 1024 // 1024}MB")
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), target, headers, body
+
+    def _write_response(self, writer: asyncio.StreamWriter, status: int, payload: Any,
+                        extra_headers: Dict[str, str], keep_alive: bool):
+        if isinstance(payload, str):
+            body = payload.encode('utf-8')
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            content_type = "application/json; charset=utf-8"
+        lines = [
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}"
+        ]
+        lines.extend(f"{name}: {value}" for name, value in extra_headers.items())
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+
+    async def _dispatch(self, method: str, target: str, headers: Dict[str, str],
+                        body: bytes) -> Tuple[int, Any, Dict[str, str]]:
+        """按路径分发请求并记录该接口的延迟"""
+        url = urlsplit(target)
+        routes = {
+            ('POST', '/recognize'): self._handle_recognize,
+            ('POST', '/recognize_batch'): self._handle_recognize_batch,
+            ('GET', '/health'): self._handle_health,
+            ('GET', '/stats'): self._handle_stats,
+            ('GET', '/metrics'): self._handle_metrics
+        }
+        handler = routes.get((method, url.path.rstrip('/') or '/'))
+        if handler is None:
+            known_path = any(path == url.path.rstrip('/') for _, path in routes)
+            return (405 if known_path else 404), {'error': f"不支持的请求: {method} {url.path}"}, {}
+
+        endpoint = url.path.rstrip('/')
+        start_time = time.perf_counter()
+        try:
+            status, payload, extra_headers = 200, await handler(headers, body, parse_qs(url.query)), {}
+        except _HTTPError as e:
+            status, payload, extra_headers = e.status, {'error': str(e)}, e.headers
+        except Exception as e:
+            logger.error(f"请求处理失败: {endpoint}, 错误: {e}")
+            status, payload, extra_headers = 500, {'error': str(e)}, {}
+        self._record(endpoint, status, time.perf_counter() - start_time)
+        return status, payload, extra_headers
+
+    # ---- 接口 ----
+
+    async def _handle_recognize(self, headers: Dict[str, str], body: bytes,
+                                query: Dict[str, List[str]]) -> Dict[str, Any]:
+        content_type = headers.get('content-type', '')
+        if content_type.startswith('image/') or content_type.startswith('application/octet-stream'):
+            filename = query.get('filename', ['upload.jpg'])[0]
+            item = {'data': body, 'filename': filename}
+        else:
+            item = self._parse_item(self._parse_json(body))
+
+        with self._admit(1):
+            return await self._recognize_item(item)
+
+    async def _handle_recognize_batch(self, headers: Dict[str, str], body: bytes,
+                                      query: Dict[str, List[str]]) -> Dict[str, Any]:
+        request = self._parse_json(body)
+        items = [{'path': path} for path in request.get('paths', [])]
+        items += [self._parse_item(image) for image in request.get('images', [])]
+        if not items:
+            raise _HTTPError(400, "paths 和 images 不能同时为空")
+        if len(items) > self.max_pending:
+            raise _HTTPError(413, f"单次最多提交 {self.max_pending} 张图片")
+
+        with self._admit(len(items)):
+            results = await asyncio.gather(*[self._recognize_item(item) for item in items],
+                                           return_exceptions=True)
+
+        return {'results': [
+            {'error': str(result), 'status': getattr(result, 'status', 500)}
+            if isinstance(result, Exception) else result
+            for result in results
+        ]}
+
+    async def _handle_health(self, headers, body, query) -> Dict[str, Any]:
+        return {'status': 'ok', 'pool_size': self.pool.size, 'idle_recognizers': self.pool.idle}
+
+    async def _handle_stats(self, headers, body, query) -> Dict[str, Any]:
+        return self.get_stats()
+
+    async def _handle_metrics(self, headers, body, query) -> str:
+        return get_tracer().export_prometheus()
+
+    # ---- 识别 ----
+
+    def _parse_json(self, body: bytes) -> Dict[str, Any]:
+        try:
+            request = json.loads(body.decode('utf-8')) if body else {}
+        except (UnicodeDecodeError, ValueError) as e:
+            raise _HTTPError(400, f"JSON格式错误: {e}")
+        if not isinstance(request, dict):
+            raise _HTTPError(400, "请求体必须是JSON对象")
+        return request
+
+    def _parse_item(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """解析单张图片的描述: 路径或base64数据"""
+        if 'path' in request:
+            return {'path': request['path']}
+        if 'image_base64' in request:
+            try:
+                data = base64.b64decode(request['image_base64'], validate=True)
+            except ValueError as e:
+                raise _HTTPError(400, f"base64数据无效: {e}")
+            return {'data': data, 'filename': request.get('filename', 'upload.jpg')}
+        raise _HTTPError(400, "需要提供 path 或 image_base64")
+
+    def _admit(self, count: int):
+        """准入控制: 在途图片数超过上限时拒绝请求"""
+        server = self
+
+        class _Admission:
+            def __enter__(self):
+                if server._pending + count > server.max_pending:
+                    raise _HTTPError(503, "服务繁忙，请稍后重试", {'Retry-After': '1'})
+                server._pending += count
+
+            def __exit__(self, exc_type, exc_val, exc_tb):
+                server._pending -= count
+
+        return _Admission()
+
+    async def _recognize_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """识别一张图片，返回结果字典"""
+        if 'path' in item:
+            path = os.path.realpath(item['path'])
+            if self.allowed_roots and not any(
+                    path == root or path.startswith(root + os.sep) for root in self.allowed_roots):
+                raise _HTTPError(403, f"路径不在允许的目录中: {item['path']}")
+            if not os.path.isfile(path):
+                raise _HTTPError(400, f"文件不存在: {item['path']}")
+            result = await self._run(path)
+            return result.to_dict()
+
+        # 图片数据只解码一次；写入临时文件供文件校验和内容哈希缓存使用
+        data = item['data']
+        image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise _HTTPError(400, "无法解码图片数据")
+
+        suffix = os.path.splitext(item['filename'])[1] or '.jpg'
+        fd, spool_path = tempfile.mkstemp(suffix=suffix, dir=self.spool_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+        except BaseException:
+            self._remove_spool(spool_path)
+            raise
+        # 超时返回504后识别仍在进行，临时文件在识别真正结束后才删除
+        result = await self._run(spool_path, ImageContext.from_array(image, spool_path),
+                                 on_done=lambda: self._remove_spool(spool_path))
+
+        result.image_path = item['filename']
+        return result.to_dict()
+
+    async def _run(self, image_path: str, image_context: Optional[ImageContext] = None,
+                   on_done: Optional[Callable[[], None]] = None) -> RecognitionResult:
+        try:
+            return await self.pool.run(self.request_timeout, image_path, image_context, on_done)
+        except asyncio.TimeoutError:
+            raise _HTTPError(504, f"识别超时 ({self.request_timeout}秒)")
+
+    @staticmethod
+    def _remove_spool(spool_path: str):
+        try:
+            os.unlink(spool_path)
+        except OSError:
+            pass
+
+    # ---- 统计 ----
+
+    def _record(self, endpoint: str, status: int, elapsed: float):
+        stats = self._endpoint_stats.setdefault(endpoint, {
+            'requests': 0, 'errors': 0, 'rejected': 0,
+            'latencies': deque(maxlen=self.latency_window)
+        })
+        stats['requests'] += 1
+        if status == 503:
+            stats['rejected'] += 1
+        elif status >= 400:
+            stats['errors'] += 1
+        else:
+            stats['latencies'].append(elapsed)
+
+    @staticmethod
+    def _percentiles(values) -> Dict[str, float]:
+        if not values:
+            return {}
+        ordered = sorted(values)
+        last = len(ordered) - 1
+        return {
+            'p50_ms': round(ordered[int(last * 0.50)] * 1000, 1),
+            'p90_ms': round(ordered[int(last * 0.90)] * 1000, 1),
+            'p99_ms': round(ordered[int(last * 0.99)] * 1000, 1),
+            'max_ms': round(ordered[-1] * 1000, 1)
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取服务统计信息（延迟为各接口最近 latency_window 个成功请求的分位数）"""
+        return {
+            'uptime': round(time.time() - self._started_at, 1) if self._started_at else 0,
+            'pool_size': self.pool.size,
+            'idle_recognizers': self.pool.idle,
+            'pending_images': self._pending,
+            'max_pending': self.max_pending,
+            'endpoints': {
+                endpoint: {
+                    'requests': stats['requests'],
+                    'errors': stats['errors'],
+                    'rejected': stats['rejected'],
+                    **self._percentiles(stats['latencies'])
+                }
+                for endpoint, stats in self._endpoint_stats.items()
+            }
+        }
+
+
+# 工厂函数
+def create_recognition_server(config: Optional[Dict] = None, **kwargs) -> RecognitionServer:
+    """创建识别服务实例
+
+    Args:
+        config: 配置字典
+        **kwargs: 传给 RecognitionServer 的其他参数
+
+    Returns:
+        识别服务实例
+    """
+    return RecognitionServer(config, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地HTTP日期识别服务")
+    parser.add_argument('--host', help='监听地址（默认使用配置 v2.network.host）')
+    parser.add_argument('--port', type=int, help='监听端口（默认使用配置 v2.network.port）')
+    parser.add_argument('--pool-size', type=int, help='预热的识别器数量')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    server = create_recognition_server(host=args.host, port=args.port, pool_size=args.pool_size)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
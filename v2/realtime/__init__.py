@@ -1,8 +1,22 @@
 """
-实时识别模块 (预留)
+实时识别模块
 
-为V2版本实时摄像头识别功能预留的模块
+- folder_watcher: 监视文件夹模式，检测新写入的图片并识别日期
+- 实时摄像头识别 (预留)
 """
 
 __version__ = "2.0.0"
 __author__ = "OCR Date Recognition Team"
+
+__all__ = [
+    'FolderWatcher',
+    'WatchCheckpoint',
+    'create_folder_watcher'
+]
+
+def __getattr__(name):
+    """延迟导入，避免导入包时加载识别引擎"""
+    if name in ['FolderWatcher', 'WatchCheckpoint', 'create_folder_watcher']:
+        from .folder_watcher import FolderWatcher, WatchCheckpoint, create_folder_watcher
+        return locals()[name]
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
@@ -0,0 +1,517 @@
+"""
+监视文件夹模式
+
+产线持续向热文件夹写入图片，本模块检测新增/修改的图片并送入日期识别器:
+- 检测: 优先使用 watchdog（Linux下为inotify），未安装时定期轮询扫描
+- 防抖: 文件大小和修改时间在 settle_time 内保持不变才认为写入完成
+- 背压: 待识别任务经有界队列交给识别线程，识别跟不上时检测端等待
+- 检查点: 已处理文件的 (路径, 大小, 修改时间) 持久保存，重启后不重复识别
+- 延迟: 记录文件落盘→识别完成的端到端延迟及各阶段耗时
+
+运行:
+    python -m v2.realtime.folder_watcher <监视目录>
+"""
+
+import os
+import time
+import queue
+import sqlite3
+import logging
+import threading
+import argparse
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Dict, Any, Callable, List, Tuple
+
+from core.date_recognizer import DateRecognizer, create_date_recognizer
+from core.models import RecognitionResult
+from utils.config_loader import get_config
+from utils.file_scanner import FileScanner
+
+# watchdog为可选依赖，未安装时使用轮询
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+logger = logging.getLogger(__name__)
+
+
+class FolderWatcherError(Exception):
+    """监视文件夹异常"""
+    pass
+
+
+@dataclass
+class WatchTask:
+    """一个待识别的文件"""
+    path: str
+    size: int
+    mtime_ns: int
+    detected_at: float      # 首次检测到的时间
+    ready_at: float         # 判定写入完成、进入队列的时间
+
+
+class WatchCheckpoint:
+    """已处理文件的持久检查点"""
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path: 检查点数据库路径
+        """
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS processed_files (
+                    path TEXT PRIMARY KEY,
+                    file_size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    success INTEGER NOT NULL,
+                    processed_at REAL NOT NULL
+                )
+            ''')
+            self._conn.commit()
+
+    def is_processed(self, path: str, size: int, mtime_ns: int) -> bool:
+        """文件当前版本是否已处理过"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT file_size, mtime_ns FROM processed_files WHERE path = ?', (path,)
+            ).fetchone()
+        return row is not None and row[0] == size and row[1] == mtime_ns
+
+    def mark_processed(self, path: str, size: int, mtime_ns: int, success: bool):
+        """记录文件已处理"""
+        with self._lock:
+            self._conn.execute('''
+                INSERT OR REPLACE INTO processed_files
+                (path, file_size, mtime_ns, success, processed_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (path, size, mtime_ns, int(success), time.time()))
+            self._conn.commit()
+
+    def count(self) -> int:
+        """已处理文件数"""
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM processed_files').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class _WatchdogHandler(FileSystemEventHandler):
+    """把 watchdog 文件事件转发给监视器"""
+
+    def __init__(self, watcher: 'FolderWatcher'):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.watcher.notify(event.src_path)
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.watcher.notify(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.watcher.notify(event.dest_path)
+
+
+class FolderWatcher:
+    """监视文件夹并识别新图片"""
+
+    def __init__(self, watch_dir: str, recognizer: Optional[DateRecognizer] = None,
+                 config: Optional[Dict] = None,
+                 result_callback: Optional[Callable[[RecognitionResult, WatchTask], None]] = None):
+        """初始化监视器
+
+        Args:
+            watch_dir: 监视目录
+            recognizer: 日期识别器，为None时按配置创建
+            config: 配置字典，如果为None则使用全局配置
+            result_callback: 每个文件识别完成后调用（在识别线程中）
+        """
+        self.config = config or get_config().config
+        watch_config = self.config.get('v2', {}).get('watch', {})
+
+        self.watch_dir = os.path.realpath(watch_dir)
+        if not os.path.isdir(self.watch_dir):
+            raise FolderWatcherError(f"监视目录不存在: {watch_dir}")
+
+        self.recursive = watch_config.get('recursive', True)
+        self.backend = watch_config.get('backend', 'auto')   # auto / inotify / polling
+        self.poll_interval = watch_config.get('poll_interval', 2.0)
+        self.settle_time = watch_config.get('settle_time', 1.0)
+        self.queue_size = watch_config.get('queue_size', 100)
+        self.num_workers = watch_config.get('workers', 1)
+        self.process_existing = watch_config.get('process_existing', True)
+        self.latency_window = watch_config.get('latency_window', 1000)
+
+        self.recognizer = recognizer
+        self.result_callback = result_callback
+        self.checkpoint = WatchCheckpoint(
+            watch_config.get('checkpoint_path', 'cache/watch_checkpoint.db')
+        )
+
+        extensions = self.config.get('image_processing', {}).get('supported_formats')
+        self._scanner = FileScanner(extensions, self.config.get('performance', {}).get('scan_workers', 8))
+        self._extensions = self._scanner.extensions
+
+        # 候选文件: path -> (size, mtime_ns, 首次检测时间, 最近一次变化时间)
+        self._candidates: Dict[str, Tuple[int, int, float, float]] = {}
+        self._candidates_lock = threading.Lock()
+        self._queue: "queue.Queue[WatchTask]" = queue.Queue(maxsize=self.queue_size)
+        # 已入队但尚未处理完成的文件版本，避免同一版本重复入队
+        self._in_flight = set()
+
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._observer = None
+        self.active_backend = None
+
+        self.stats = {
+            'detected': 0,
+            'skipped_checkpoint': 0,
+            'enqueued': 0,
+            'processed': 0,
+            'failed': 0,
+            'queue_full_waits': 0
+        }
+        self._stats_lock = threading.Lock()
+        # 各阶段延迟(秒): 落盘→完成、检测→完成、队列等待、识别
+        self._latencies = {
+            'end_to_end': deque(maxlen=self.latency_window),
+            'detect_to_result': deque(maxlen=self.latency_window),
+            'queue_wait': deque(maxlen=self.latency_window),
+            'recognition': deque(maxlen=self.latency_window)
+        }
+
+    # ---- 检测 ----
+
+    def notify(self, path: str):
+        """登记一个可能新增或修改的文件（watchdog事件、轮询扫描均调用此方法）"""
+        if os.path.splitext(path)[1].lower() not in self._extensions:
+            return
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+
+        now = time.time()
+        signature = (stat.st_size, stat.st_mtime_ns)
+        with self._candidates_lock:
+            if (path,) + signature in self._in_flight:
+                return
+            previous = self._candidates.get(path)
+            if previous is None:
+                self._candidates[path] = signature + (now, now)
+                with self._stats_lock:
+                    self.stats['detected'] += 1
+            elif previous[:2] != signature:
+                self._candidates[path] = signature + (previous[2], now)
+
+    def _start_detection(self):
+        """启动watchdog观察器，不可用时启动轮询线程"""
+        use_inotify = self.backend in ('auto', 'inotify') and Observer is not None
+        if self.backend == 'inotify' and Observer is None:
+            logger.warning("未安装watchdog，改用轮询检测")
+
+        if use_inotify:
+            self._observer = Observer()
+            self._observer.schedule(_WatchdogHandler(self), self.watch_dir, recursive=self.recursive)
+            self._observer.start()
+            self.active_backend = 'inotify'
+        else:
+            self._spawn(self._poll_loop, 'FolderWatcher-poll')
+            self.active_backend = 'polling'
+
+    def _poll_loop(self):
+        """定期扫描监视目录，(大小, 修改时间) 与上次不同的文件视为新增或修改"""
+        # 不处理已有文件时，首次扫描只记录状态，之后出现变化的文件才登记
+        known: Dict[str, Tuple[int, int]] = {} if self.process_existing else self._poll_snapshot()
+        while not self._stop.is_set():
+            current = self._poll_snapshot()
+            for path, signature in current.items():
+                if known.get(path) != signature:
+                    self.notify(path)
+            known = current
+            self._stop.wait(self.poll_interval)
+
+    def _poll_snapshot(self) -> Dict[str, Tuple[int, int]]:
+        """扫描监视目录，返回 路径 -> (大小, 修改时间)"""
+        snapshot = {}
+        for batch in self._scanner.iter_batches(self.watch_dir, self.recursive):
+            for entry in batch.entries:
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                snapshot[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def _scan_existing(self):
+        """启动时登记目录中已有的、检查点中未记录的文件"""
+        for path in self._scanner.iter_files(self.watch_dir, self.recursive):
+            if self._stop.is_set():
+                return
+            self.notify(path)
+
+    # ---- 防抖与入队 ----
+
+    def _settle_loop(self):
+        """文件状态在 settle_time 内不变后放入识别队列"""
+        interval = max(0.05, self.settle_time / 4)
+        while not self._stop.is_set():
+            now = time.time()
+            with self._candidates_lock:
+                candidates = list(self._candidates.items())
+
+            for path, (size, mtime_ns, detected_at, changed_at) in candidates:
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    # 文件已被删除或移走
+                    with self._candidates_lock:
+                        self._candidates.pop(path, None)
+                    continue
+
+                if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                    # 仍在写入
+                    with self._candidates_lock:
+                        self._candidates[path] = (stat.st_size, stat.st_mtime_ns, detected_at, now)
+                    continue
+                if now - changed_at < self.settle_time:
+                    continue
+
+                # 移出候选与登记为在途必须在同一临界区内完成，否则其间的 notify 会重复登记同一版本，
+                # wait_idle 也可能在两者都为空时提前返回
+                version = (path, size, mtime_ns)
+                with self._candidates_lock:
+                    current = self._candidates.get(path)
+                    if current is None or current[:2] != (size, mtime_ns):
+                        # 期间又有变化，下一轮重新判断
+                        continue
+                    del self._candidates[path]
+                    self._in_flight.add(version)
+
+                if self.checkpoint.is_processed(path, size, mtime_ns):
+                    with self._candidates_lock:
+                        self._in_flight.discard(version)
+                    with self._stats_lock:
+                        self.stats['skipped_checkpoint'] += 1
+                    continue
+
+                self._enqueue(WatchTask(path, size, mtime_ns, detected_at, time.time()))
+
+            self._stop.wait(interval)
+
+    def _enqueue(self, task: WatchTask):
+        """放入有界队列，队列满时等待识别线程（调用方已将文件登记为在途）"""
+        waited = False
+        while not self._stop.is_set():
+            try:
+                self._queue.put(task, timeout=0.5)
+                with self._stats_lock:
+                    self.stats['enqueued'] += 1
+                    if waited:
+                        self.stats['queue_full_waits'] += 1
+                return
+            except queue.Full:
+                waited = True
+
+    # ---- 识别 ----
+
+    def _worker_loop(self):
+        """从队列中取文件识别，写检查点并记录延迟"""
+        while not self._stop.is_set():
+            try:
+                task = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            started_at = time.time()
+            try:
+                result = self.recognizer.recognize_single(task.path)
+            except Exception as e:
+                logger.error(f"监视文件识别失败: {task.path}, 错误: {e}")
+                result = None
+            finished_at = time.time()
+
+            success = result is not None and result.success
+            self.checkpoint.mark_processed(task.path, task.size, task.mtime_ns, success)
+            with self._candidates_lock:
+                self._in_flight.discard((task.path, task.size, task.mtime_ns))
+
+            with self._stats_lock:
+                self.stats['processed'] += 1
+                if not success:
+                    self.stats['failed'] += 1
+                self._latencies['end_to_end'].append(finished_at - task.mtime_ns / 1e9)
+                self._latencies['detect_to_result'].append(finished_at - task.detected_at)
+                self._latencies['queue_wait'].append(started_at - task.ready_at)
+                self._latencies['recognition'].append(finished_at - started_at)
+
+            if result is not None and self.result_callback:
+                try:
+                    self.result_callback(result, task)
+                except Exception as e:
+                    logger.warning(f"结果回调执行失败: {e}")
+
+            self._queue.task_done()
+
+    # ---- 生命周期 ----
+
+    def _spawn(self, target: Callable, name: str):
+        thread = threading.Thread(target=target, daemon=True, name=name)
+        thread.start()
+        self._threads.append(thread)
+
+    def start(self):
+        """启动检测、防抖和识别线程"""
+        if self._threads:
+            return
+        if self.recognizer is None:
+            self.recognizer = create_date_recognizer(self.config)
+
+        self._stop.clear()
+        for i in range(self.num_workers):
+            self._spawn(self._worker_loop, f"FolderWatcher-worker-{i}")
+        self._spawn(self._settle_loop, 'FolderWatcher-settle')
+        self._start_detection()
+        if self.process_existing and self.active_backend == 'inotify':
+            # 轮询模式的首次扫描即会登记已有文件（process_existing 为 false 时只记录不登记）
+            self._spawn(self._scan_existing, 'FolderWatcher-initial-scan')
+
+        logger.info(f"开始监视文件夹: {self.watch_dir} (检测方式: {self.active_backend}, "
+                    f"已处理 {self.checkpoint.count()} 个文件)")
+
+    def stop(self):
+        """停止所有线程并关闭检查点"""
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.checkpoint.close()
+        logger.info("文件夹监视已停止")
+
+    def run_forever(self):
+        """在当前线程中运行，直到中断"""
+        self.start()
+        try:
+            while not self._stop.wait(1.0):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """等待所有已检测到的文件处理完成
+
+        Args:
+            timeout: 最长等待时间(秒)，None表示一直等待
+
+        Returns:
+            是否在超时前处理完成
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while deadline is None or time.time() < deadline:
+            with self._candidates_lock:
+                busy = bool(self._candidates) or bool(self._in_flight)
+            if not busy:
+                return True
+            time.sleep(0.05)
+        return False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    # ---- 统计 ----
+
+    @staticmethod
+    def _summarize(values) -> Dict[str, float]:
+        if not values:
+            return {'count': 0}
+        ordered = sorted(values)
+        last = len(ordered) - 1
+        return {
+            'count': len(ordered),
+            'p50': round(ordered[int(last * 0.5)], 3),
+            'p95': round(ordered[int(last * 0.95)], 3),
+            'max': round(ordered[-1], 3)
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取监视统计信息（延迟为最近 latency_window 个文件的分位数，单位秒）"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+            latency = {name: self._summarize(values) for name, values in self._latencies.items()}
+        with self._candidates_lock:
+            pending = len(self._candidates)
+        stats.update({
+            'watch_dir': self.watch_dir,
+            'backend': self.active_backend,
+            'pending_settle': pending,
+            'queue_depth': self._queue.qsize(),
+            'queue_size': self.queue_size,
+            'latency': latency
+        })
+        return stats
+
+
+# 工厂函数
+def create_folder_watcher(watch_dir: Optional[str] = None, config: Optional[Dict] = None,
+                          **kwargs) -> FolderWatcher:
+    """创建文件夹监视器实例
+
+    Args:
+        watch_dir: 监视目录，为None时使用配置 v2.watch.watch_dir
+        config: 配置字典
+        **kwargs: 传给 FolderWatcher 的其他参数
+
+    Returns:
+        文件夹监视器实例
+    """
+    config = config or get_config().config
+    if watch_dir is None:
+        watch_dir = config.get('v2', {}).get('watch', {}).get('watch_dir')
+    if not watch_dir:
+        raise FolderWatcherError("未指定监视目录")
+    return FolderWatcher(watch_dir, config=config, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="监视文件夹并识别新图片中的日期")
+    parser.add_argument('watch_dir', nargs='?', help='监视目录（默认使用配置 v2.watch.watch_dir）')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    def print_result(result: RecognitionResult, task: WatchTask):
+        latency = time.time() - task.mtime_ns / 1e9
+        dates = ', '.join(result.dates_found) or '-'
+        print(f"{task.path}\t{dates}\t{latency:.2f}s")
+
+    create_folder_watcher(args.watch_dir, result_callback=print_result).run_forever()
+
+
+if __name__ == "__main__":
+    main()